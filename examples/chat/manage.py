@@ -47,6 +47,7 @@ except ImportError:  # pragma nocover
     sys.path.append('../../')
     import pulsar
 from pulsar.utils.path import Path
+from pulsar.utils.websocket import FrameParser
 from pulsar.apps import ws, wsgi, rpc, pubsub
 
 CHAT_DIR = os.path.dirname(__file__)
@@ -59,7 +60,18 @@ if stdnet:
     import pulsar.utils.settings.backend
 
 
+def encode_frame(message):
+    # The websocket frame is encoded once for all clients
+    return FrameParser().encode(message)
+
+
+# Messages are queued while a websocket has more bytes than this waiting
+# to be sent
+MAX_WRITE_BUFFER = 65536
+
+
 class PubSubClient(pubsub.Client):
+    encoder = staticmethod(encode_frame)
 
     def __init__(self, connection):
         self.connection = connection
@@ -68,6 +80,15 @@ class PubSubClient(pubsub.Client):
         if channel == 'webchat':
             self.connection.write(message)
 
+    def ready(self):
+        transport = self.connection.transport
+        return not (transport and (
+            transport.writing_paused or
+            transport.get_write_buffer_size() > MAX_WRITE_BUFFER))
+
+    def close(self):
+        self.connection.connection.close()
+
 
 ##    Web Socket Chat handler
 class Chat(ws.WS):
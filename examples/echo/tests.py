@@ -1,19 +1,28 @@
 import pulsar
 from pulsar import multi_async
-from pulsar.utils.pep import range
+from pulsar.utils.pep import range, default_timer
+from pulsar.utils.internet import SO_REUSEPORT
 from pulsar.apps.test import unittest, dont_run_with_thread
 
 from .manage import server, Echo, EchoServerProtocol
 
 
+def pool_workers(arbiter, name):
+    monitor = arbiter.get_actor(name)
+    return ([a.aid for a in monitor.managed_actors.values()
+             if not a.stopping_start], len(monitor.restarting))
+
+
 class TestEchoServerThread(unittest.TestCase):
     concurrency = 'thread'
+    reuse_port = False
     server = None
 
     @classmethod
     def setUpClass(cls):
         s = server(name=cls.__name__.lower(), bind='127.0.0.1:0',
-                   backlog=1024, concurrency=cls.concurrency)
+                   backlog=1024, concurrency=cls.concurrency,
+                   reuse_port=cls.reuse_port)
         cls.server = yield pulsar.send('arbiter', 'run', s)
         cls.pool = Echo()
         cls.echo = cls.pool.client(cls.server.address)
@@ -65,3 +74,69 @@ class TestEchoServerThread(unittest.TestCase):
 @dont_run_with_thread
 class TestEchoServerProcess(TestEchoServerThread):
     concurrency = 'process'
+
+    def test_reload(self):
+        name = self.server.name
+        old, _ = yield pulsar.send('arbiter', 'run', pool_workers, name)
+        self.assertTrue(old)
+        num = yield pulsar.send('arbiter', 'reload', name)
+        self.assertEqual(num, len(old))
+        start = default_timer()
+        while True:
+            workers, num = yield pulsar.send('arbiter', 'run', pool_workers,
+                                             name)
+            # Capacity never drops below the number of workers
+            self.assertTrue(len(workers) >= len(old))
+            if not num and not set(old).intersection(workers):
+                break
+            self.assertTrue(default_timer() - start < 30)
+            yield pulsar.async_sleep(0.5)
+        self.assertEqual(len(workers), len(old))
+        self.assertFalse(set(old).intersection(workers))
+        # The listening socket was preserved
+        result = yield self.echo(b'ciao luca')
+        self.assertEqual(result, b'ciao luca')
+
+
+@dont_run_with_thread
+@unittest.skipUnless(SO_REUSEPORT, 'SO_REUSEPORT not available')
+class TestEchoServerReusePort(TestEchoServerProcess):
+    reuse_port = True
+
+
+@dont_run_with_thread
+class TestEchoServerMaxRequests(unittest.TestCase):
+    server = None
+
+    @classmethod
+    def setUpClass(cls):
+        s = server(name=cls.__name__.lower(), bind='127.0.0.1:0',
+                   concurrency='process', max_requests=2)
+        cls.server = yield pulsar.send('arbiter', 'run', s)
+        cls.pool = Echo()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.server:
+            yield pulsar.send('arbiter', 'kill_actor', cls.server.name)
+
+    def test_recycle(self):
+        name = self.server.name
+        address = self.server.address
+        old, _ = yield pulsar.send('arbiter', 'run', pool_workers, name)
+        self.assertEqual(len(old), 1)
+        # QUIT closes the connection so that each request is a new one
+        for _ in range(2):
+            result = yield self.pool.request(address, b'QUIT')
+            self.assertEqual(result, b'QUIT')
+        start = default_timer()
+        while True:
+            workers, num = yield pulsar.send('arbiter', 'run', pool_workers,
+                                             name)
+            self.assertTrue(workers)
+            if not num and old[0] not in workers:
+                break
+            self.assertTrue(default_timer() - start < 30)
+            yield pulsar.async_sleep(0.5)
+        result = yield self.pool.request(address, b'ciao')
+        self.assertEqual(result, b'ciao')
@@ -1,8 +1,10 @@
+import os
 import time
 import math
 from datetime import timedelta
 from random import random
 from functools import reduce
+from threading import current_thread
 
 from pulsar import get_request_loop, async_sleep
 from pulsar.apps import tasks
@@ -48,6 +50,25 @@ class NotOverLap(tasks.Job):
         yield time.time() - start
 
 
+class CpuBound(tasks.Job):
+    '''Runs on a subprocess of the task queue worker.'''
+    execution = 'process'
+    process_timeout = 2
+
+    def __call__(self, consumer, lag=0):
+        time.sleep(lag)
+        return os.getpid()
+
+
+class OnLoop(tasks.Job):
+    '''Runs on the event loop of the task queue worker.'''
+    execution = 'loop'
+
+    def __call__(self, consumer, lag=0.1):
+        yield async_sleep(lag)
+        yield current_thread().ident == consumer.worker.event_loop.tid
+
+
 class CheckWorker(tasks.Job):
 
     def __call__(self, consumer):
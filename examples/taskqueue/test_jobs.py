@@ -1,5 +1,17 @@
 '''Tests the "taskqueue" example.'''
-from pulsar.apps.tasks import TaskBackend
+import os
+import time
+import signal
+from datetime import datetime, timedelta
+from multiprocessing.connection import Listener
+
+from pulsar import Empty
+from pulsar.apps.tasks import (TaskBackend, Task, Job, JobRegistry,
+                               aged_priority)
+from pulsar.apps.tasks.backends import Schedule, SchedulerEntry
+from pulsar.apps.tasks.backends.local import PriorityQueue, LocalTaskBackend
+from pulsar.apps.tasks.process import (ProcessPool, ProcessError,
+                                       ProcessTimeout, can_fork, _accept)
 from pulsar.apps.test import unittest
 
 
@@ -11,5 +23,314 @@ class TestTaskClasses(unittest.TestCase):
         self.assertRaises(NotImplementedError, b.save_task, 1)
         self.assertRaises(NotImplementedError, b.delete_tasks, [])
         self.assertRaises(NotImplementedError, b.flush)
+        self.assertRaises(NotImplementedError, b.queue_depths)
         self.assertEqual(b.processed, 0)
         self.assertEqual(b.max_tasks, 0)
+        self.assertEqual(b.aging, 0)
+        self.assertEqual(b.queued, {})
+
+    def testAging(self):
+        b = TaskBackend('dummy', None, aging='30')
+        self.assertEqual(b.aging, 30)
+        self.assertEqual(aged_priority(2, 100, 160, 0), 2)
+        self.assertEqual(aged_priority(2, 100, 160, 30), 4)
+
+
+class RecordingBackend(TaskBackend):
+    '''A :class:`TaskBackend` recording fetched tasks and scheduled runs
+    rather than storing or queuing them.'''
+    def get_task(self, task_id=None, when_done=False):
+        self.local.fetched.append(task_id)
+        return Task(task_id, status='SUCCESS', result='fetched')
+
+    def run_job(self, jobname, targs=None, tkwargs=None, **meta_params):
+        self.local.runs.append(jobname)
+
+
+def recording_backend(**params):
+    b = RecordingBackend('dummy', None, **params)
+    b.local.fetched = []
+    b.local.runs = []
+    return b
+
+
+class TestTaskDone(unittest.TestCase):
+
+    def test_message(self):
+        b = recording_backend()
+        task = Task('a', name='x', status='STARTED', priority=2)
+        message = b._task_done_message(task, status='SUCCESS', result=[1, 2],
+                                       time_ended=datetime.now())
+        self.assertTrue(len(message) <= b.done_message_size)
+        when_done = b.get_callback('a')
+        b.task_done_callback(message)
+        self.assertEqual(b.local.fetched, [])
+        done = when_done.result
+        self.assertEqual(done.id, 'a')
+        self.assertEqual(done.status, 'SUCCESS')
+        self.assertEqual(done.result, [1, 2])
+        self.assertEqual(done.priority, 2)
+        self.assertTrue(isinstance(done.time_ended, datetime))
+        self.assertEqual(b.callbacks, {})
+
+    def test_result_types(self):
+        b = recording_backend()
+        task = Task('a', name='x', status='STARTED', args=(1, 2))
+        message = b._task_done_message(task, status='SUCCESS',
+                                       result={1: (2, 3)})
+        when_done = b.get_callback('a')
+        b.task_done_callback(message)
+        self.assertEqual(b.local.fetched, [])
+        done = when_done.result
+        self.assertEqual(done.args, (1, 2))
+        self.assertEqual(done.result, {1: (2, 3)})
+
+    def test_unpicklable_result(self):
+        b = recording_backend()
+        message = b._task_done_message(Task('a'), status='SUCCESS',
+                                       result=lambda: None)
+        when_done = b.get_callback('a')
+        b.task_done_callback(message)
+        self.assertEqual(b.local.fetched, ['a'])
+        self.assertEqual(when_done.result.result, 'fetched')
+
+    def test_no_callback(self):
+        b = recording_backend()
+        message = b._task_done_message(Task('a'), status='SUCCESS')
+        self.assertEqual(b.task_done_callback(message), None)
+        self.assertEqual(b.local.fetched, [])
+
+    def test_oversized_result(self):
+        b = recording_backend(done_message_size=100)
+        message = b._task_done_message(Task('a'), status='SUCCESS',
+                                       result='x'*100)
+        self.assertTrue(len(message) < 100)
+        when_done = b.get_callback('a')
+        b.task_done_callback(message)
+        self.assertEqual(b.local.fetched, ['a'])
+        self.assertEqual(when_done.result.result, 'fetched')
+
+
+class TestScheduler(unittest.TestCase):
+
+    def backend(self, now, **periods):
+        b = recording_backend(schedule_periodic=True)
+        b.local.entries = dict(((name, SchedulerEntry(
+            name, Schedule(timedelta(seconds=s)), last_run_at=now))
+            for name, s in periods.items()))
+        return b
+
+    def test_tick(self):
+        now = datetime.now()
+        b = self.backend(now, fast=1, slow=10)
+        b.tick(now)
+        self.assertEqual(b.local.runs, [])
+        self.assertEqual(b.next_run, now + timedelta(seconds=1))
+        b.tick(now + timedelta(seconds=1))
+        self.assertEqual(b.local.runs, ['fast'])
+        self.assertEqual(b.next_run, now + timedelta(seconds=2))
+        b.tick(now + timedelta(seconds=11))
+        self.assertEqual(sorted(b.local.runs), ['fast', 'fast', 'slow'])
+        self.assertEqual(b.next_run, now + timedelta(seconds=12))
+        self.assertEqual(b.entries['slow'].total_run_count, 1)
+        self.assertEqual(len(b.scheduled), 2)
+
+    def test_next_scheduled(self):
+        now = datetime.now()
+        b = self.backend(now, fast=5, slow=50)
+        name, seconds = b.next_scheduled()
+        self.assertEqual(name, 'fast')
+        self.assertTrue(0 < seconds <= 5)
+        name, seconds = b.next_scheduled(['slow', 'xxx'])
+        self.assertEqual(name, 'slow')
+        self.assertTrue(5 < seconds <= 50)
+        self.assertEqual(b.next_scheduled(['xxx']), (['xxx'], None))
+
+
+class TestPriorityQueue(unittest.TestCase):
+
+    def test_priority_order(self):
+        q = PriorityQueue()
+        for item in ((1, 'a'), (3, 'b'), (1, 'c'), (2, 'd'), (3, 'e')):
+            q.put_nowait(item)
+        self.assertEqual(q.qsize(), 5)
+        self.assertEqual(q.depths(), {1: 2, 2: 1, 3: 2})
+        ids = [q.get_nowait()[1] for _ in range(5)]
+        self.assertEqual(ids, ['b', 'e', 'd', 'a', 'c'])
+        self.assertEqual(q.qsize(), 0)
+        self.assertEqual(q.depths(), {})
+        self.assertRaises(Empty, q.get_nowait)
+
+    def test_aging(self):
+        q = PriorityQueue()
+        q.aging = 0.01
+        q.put_nowait((1, 'a'))
+        time.sleep(0.1)
+        q.put_nowait((3, 'b'))
+        # After 0.1 seconds, the first item has aged priority of about 11
+        self.assertEqual(q.get_nowait(), (1, 'a'))
+        self.assertEqual(q.get_nowait(), (3, 'b'))
+
+    def test_waiting_getter(self):
+        q = PriorityQueue()
+        d = q.get()
+        self.assertFalse(d.done())
+        q.put_nowait((2, 'a'))
+        self.assertEqual(d.result, (2, 'a'))
+        self.assertEqual(q.qsize(), 0)
+
+
+class TestLocalTaskBackend(unittest.TestCase):
+
+    def test_get_tasks_batch(self):
+        backend = LocalTaskBackend('test_get_tasks_batch')
+        for n, priority in enumerate((1, 2, 1, 2)):
+            backend.save_task('task%s' % n, priority=priority)
+            yield backend.put_task('task%s' % n)
+        tasks = yield backend.get_tasks_batch(3, 1)
+        self.assertEqual([t.id for t in tasks], ['task1', 'task3', 'task0'])
+        tasks = yield backend.get_tasks_batch(3, 1)
+        self.assertEqual([t.id for t in tasks], ['task2'])
+        tasks = yield backend.get_tasks_batch(3, 0.1)
+        self.assertEqual(tasks, [])
+
+    def test_put_tasks(self):
+        backend = LocalTaskBackend('test_put_tasks')
+        ids = backend.put_tasks([{'id': 'a', 'name': 'x', 'priority': 1},
+                                 {'id': 'b', 'name': 'x', 'priority': 2},
+                                 {'id': 'c', 'name': 'y', 'priority': 1}])
+        self.assertEqual(ids, ['a', 'b', 'c'])
+        self.assertEqual(backend.queue_depths(), {1: 2, 2: 1})
+        tasks = backend.get_tasks(status='QUEUED')
+        self.assertEqual(sorted((t.id for t in tasks)), ['a', 'b', 'c'])
+        tasks = yield backend.get_tasks_batch(3, 1)
+        self.assertEqual([t.id for t in tasks], ['b', 'a', 'c'])
+
+    def test_indexes(self):
+        backend = LocalTaskBackend('test_indexes')
+        backend.save_task('a', name='x', overlap_id='o1', status='PENDING')
+        backend.save_task('b', name='x', status='PENDING')
+        backend.save_task('c', name='y', status='SUCCESS')
+        tasks = backend.get_tasks(overlap_id='o1')
+        self.assertEqual([t.id for t in tasks], ['a'])
+        tasks = backend.get_tasks(name='x', status='PENDING')
+        self.assertEqual(sorted((t.id for t in tasks)), ['a', 'b'])
+        backend.save_task('a', status='SUCCESS')
+        tasks = backend.get_tasks(status=('SUCCESS', 'FAILURE'))
+        self.assertEqual(sorted((t.id for t in tasks)), ['a', 'c'])
+        self.assertEqual(backend.get_tasks(name='x', status='PENDING')[0].id,
+                         'b')
+        self.assertEqual(backend.delete_tasks(['b']), ['b'])
+        self.assertEqual(backend.get_tasks(name='x', status='PENDING'), [])
+        self.assertEqual(backend._indexes['status'], {'SUCCESS': set('ac')})
+
+    def test_max_results(self):
+        backend = LocalTaskBackend('test_max_results', max_results=2)
+        for id in 'abcd':
+            backend.save_task(id, name='x', status='SUCCESS')
+        backend.save_task('e', name='x', status='PENDING')
+        tasks = backend.get_tasks(name='x')
+        self.assertEqual(sorted((t.id for t in tasks)), ['c', 'd', 'e'])
+        info = backend.info()
+        self.assertEqual(info['evicted_max'], 2)
+        self.assertEqual(info['evicted_ttl'], 0)
+        self.assertEqual(info['ready'], 2)
+
+    def test_result_ttl(self):
+        backend = LocalTaskBackend('test_result_ttl', result_ttl=10)
+        backend.save_task('a', name='x', status='SUCCESS')
+        backend.save_task('b', name='x', status='STARTED')
+        backend.evict(time.time() + 5)
+        self.assertEqual(backend.info()['stored'], 2)
+        backend.evict(time.time() + 11)
+        self.assertEqual([t.id for t in backend.get_tasks(name='x')], ['b'])
+        self.assertEqual(backend.info()['evicted_ttl'], 1)
+
+
+class Square(Job):
+
+    def __call__(self, consumer, x, lag=0):
+        time.sleep(lag)
+        return os.getpid(), x*x
+
+
+@unittest.skipUnless(can_fork, 'Requires os.fork')
+class TestProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = JobRegistry()
+        self.registry.register(Square)
+
+    def test_apply(self):
+        pool = ProcessPool(self.registry, 1)
+        try:
+            pid, result = pool.apply('a', 'square', (3,))
+            self.assertEqual(result, 9)
+            self.assertNotEqual(pid, os.getpid())
+            self.assertRaises(ProcessError, pool.apply, 'b', 'square')
+            self.assertRaises(ProcessError, pool.apply, 'c', 'xxx', (3,))
+            pid2, result = pool.apply('d', 'square', (), {'x': 4})
+            self.assertEqual(result, 16)
+            self.assertEqual(pid, pid2)
+            info = pool.info()
+            self.assertEqual(info['executed'], 4)
+            self.assertEqual(info['running'], 0)
+        finally:
+            pool.close()
+
+    def test_timeout(self):
+        pool = ProcessPool(self.registry, 1)
+        try:
+            pid, _ = pool.apply('a', 'square', (2,))
+            self.assertRaises(ProcessTimeout, pool.apply, 'b', 'square',
+                              (2, 5), timeout=0.2)
+            pid2, result = pool.apply('c', 'square', (2,))
+            self.assertEqual(result, 4)
+            self.assertNotEqual(pid, pid2)
+            self.assertEqual(pool.info()['timeouts'], 1)
+        finally:
+            pool.close()
+
+    def test_fork_server(self):
+        pool = ProcessPool(self.registry, 2)
+        try:
+            pid, result = pool.apply('a', 'square', (3,))
+            self.assertEqual(result, 9)
+            # Job processes are children of the fork server
+            self.assertRaises(OSError, os.waitpid, pid, os.WNOHANG)
+            pool.close()
+            self.assertRaises(OSError, os.waitpid, pool._server.pid, 0)
+        finally:
+            pool.close()
+
+    def test_fork_server_exited(self):
+        pool = ProcessPool(self.registry, 1, max_jobs=1)
+        try:
+            os.kill(pool._server.pid, signal.SIGKILL)
+            os.waitpid(pool._server.pid, 0)
+            # The job result is returned even if the process is not replaced
+            pid, result = pool.apply('a', 'square', (3,))
+            self.assertEqual(result, 9)
+            self.assertRaises(ProcessError, pool.apply, 'b', 'square', (3,))
+            self.assertEqual(pool.info()['executed'], 1)
+        finally:
+            pool.close()
+        self.assertRaises(ProcessError, pool.apply, 'c', 'square', (3,))
+
+    def test_accept_timeout(self):
+        listener = Listener(family='AF_UNIX')
+        try:
+            self.assertRaises(ProcessError, _accept, listener, 0.1)
+        finally:
+            listener.close()
+
+    def test_max_jobs(self):
+        pool = ProcessPool(self.registry, 1, max_jobs=2)
+        try:
+            pids = [pool.apply(n, 'square', (n,))[0] for n in range(4)]
+            self.assertEqual(pids[0], pids[1])
+            self.assertNotEqual(pids[1], pids[2])
+            self.assertEqual(pids[2], pids[3])
+            self.assertEqual(pool.info()['recycled'], 2)
+        finally:
+            pool.close()
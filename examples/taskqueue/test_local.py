@@ -24,6 +24,7 @@ class TaskQueueBase(object):
     # long enough to allow to wait for tasks
     rpc_timeout = 500
     concurrent_tasks = 6
+    task_prefetch = 1
     apps = ()
 
     @classmethod
@@ -44,6 +45,8 @@ class TaskQueueBase(object):
         s = server(name=cls.name(),
                    rpc_bind='127.0.0.1:0',
                    concurrent_tasks=cls.concurrent_tasks,
+                   task_prefetch=cls.task_prefetch,
+                   task_processes=2,
                    concurrency=cls.concurrency,
                    rpc_concurrency=cls.concurrency,
                    rpc_keep_alive=cls.rpc_timeout,
@@ -174,6 +177,13 @@ class TestTaskQueueOnThread(TaskQueueBase, unittest.TestCase):
         self.assertEqual(r['status'], tasks.SUCCESS)
         self.assertEqual(r['result'], 90)
 
+    def test_run_new_task_loop(self):
+        app = yield get_application(self.name())
+        r = yield app.backend.run('onloop')
+        r = yield app.backend.wait_for_task(r)
+        self.assertEqual(r.status, tasks.SUCCESS)
+        self.assertEqual(r.result, True)
+
     def test_not_overlap(self):
         sec = 2 + random()
         app = yield get_application(self.name())
@@ -188,6 +198,62 @@ class TestTaskQueueOnThread(TaskQueueBase, unittest.TestCase):
         self.assertEqual(r1.status, tasks.SUCCESS)
         self.assertTrue(r1.result > sec)
 
+    def test_run_jobs(self):
+        app = yield get_application(self.name())
+        specs = [{'jobname': 'addition', 'kwargs': {'a': n, 'b': 1}}
+                 for n in range(10)]
+        specs.append({'jobname': 'addition', 'kwargs': {'a': 1, 'b': 1},
+                      'priority': 3})
+        ids = yield app.backend.run_jobs(specs)
+        self.assertEqual(len(ids), 11)
+        self.assertEqual(len(set(ids)), 11)
+        for n, id in enumerate(ids[:10]):
+            r = yield app.backend.wait_for_task(id)
+            self.assertEqual(r.status, tasks.SUCCESS)
+            self.assertEqual(r.result, n + 1)
+        r = yield app.backend.wait_for_task(ids[10])
+        self.assertEqual(r.priority, 3)
+
+    def test_run_jobs_not_overlap(self):
+        app = yield get_application(self.name())
+        sec = 1 + random()
+        specs = [{'jobname': 'notoverlap', 'args': (sec,)},
+                 {'jobname': 'notoverlap', 'args': (sec,)},
+                 {'jobname': 'addition', 'kwargs': {'a': 1, 'b': 2}}]
+        ids = yield app.backend.run_jobs(specs)
+        self.assertTrue(ids[0])
+        self.assertEqual(ids[1], None)
+        self.assertTrue(ids[2])
+        r = yield app.backend.wait_for_task(ids[0])
+        self.assertEqual(r.status, tasks.SUCCESS)
+
+    def test_run_jobs_error(self):
+        app = yield get_application(self.name())
+        self.assertRaises(tasks.TaskNotAvailable, app.backend.run_jobs,
+                          [{'jobname': 'addition'}, {'jobname': 'xxxx'}])
+
+    def test_run_new_tasks(self):
+        ids = yield self.proxy.run_new_tasks(tasks=[
+            {'jobname': 'addition', 'a': 40, 'b': 50},
+            {'jobname': 'addition', 'a': 4, 'b': 5, 'meta_data': {'x': 1}}])
+        self.assertEqual(len(ids), 2)
+        r = yield self.proxy.wait_for_task(ids[0])
+        self.assertEqual(r['status'], tasks.SUCCESS)
+        self.assertEqual(r['result'], 90)
+        r = yield self.proxy.wait_for_task(ids[1])
+        self.assertEqual(r['result'], 9)
+        self.assertEqual(r['params'], {'x': 1})
+
+    def test_run_new_tasks_error(self):
+        yield self.async.assertRaises(rpc.InvalidParams,
+                                      self.proxy.run_new_tasks)
+        yield self.async.assertRaises(rpc.InvalidParams,
+                                      self.proxy.run_new_tasks,
+                                      tasks=[{'a': 1}])
+        yield self.async.assertRaises(rpc.InvalidParams,
+                                      self.proxy.run_new_tasks,
+                                      tasks=[{'jobname': 'xxxx'}])
+
     def test_run_new_task_error(self):
         yield self.async.assertRaises(rpc.InvalidParams,
                                       self.proxy.run_new_task)
@@ -210,6 +276,28 @@ class TestTaskQueueOnThread(TaskQueueBase, unittest.TestCase):
         self.assertEqual(r['status'], tasks.FAILURE)
         self.assertTrue('kaputt' in r['result'])
 
+    def test_run_new_task_priority(self):
+        app = yield get_application(self.name())
+        backend = app.backend
+        self.assertEqual(backend.registry['addition'].priority, 1)
+        r = yield backend.run('addition', a=1, b=2)
+        r = yield backend.wait_for_task(r)
+        self.assertEqual(r.priority, 1)
+        r = yield backend.run_job('addition', (1, 2), priority=5)
+        r = yield backend.wait_for_task(r)
+        self.assertEqual(r.priority, 5)
+        self.assertEqual(r.result, 3)
+        depths = yield backend.queue_depths()
+        self.assertTrue(isinstance(depths, dict))
+
+    def test_worker_info(self):
+        info = yield send('arbiter', 'info')
+        workers = info['monitors'][self.name()]['workers']
+        self.assertTrue(workers)
+        info = yield send(workers[0]['actor']['actor_id'], 'info')
+        tasks = info['tasks']
+        self.assertTrue(isinstance(tasks['queued'], dict))
+
     def test_run_new_task_expiry(self):
         r = yield self.proxy.run_new_task(jobname='addition', a=40, b=50,
                                           meta_data={'expiry': time()})
@@ -317,6 +405,51 @@ class TestTaskQueueOnThread(TaskQueueBase, unittest.TestCase):
         self.assertNotEqual(oid5, oid8)
 
 
+class TestTaskQueuePrefetch(TaskQueueBase, unittest.TestCase):
+    schedule_periodic = False
+    concurrent_tasks = 4
+    task_prefetch = 4
+
+    def test_prefetch(self):
+        app = yield get_application(self.name())
+        backend = app.backend
+        self.assertEqual(backend.prefetch, self.task_prefetch)
+        ids = yield multi_async([backend.run('addition', a=n, b=1)
+                                 for n in range(20)])
+        done = yield multi_async([backend.wait_for_task(id) for id in ids])
+        self.assertEqual([t.status for t in done], [tasks.SUCCESS]*20)
+        self.assertEqual([t.result for t in done], list(range(1, 21)))
+
+
 @dont_run_with_thread
 class TestTaskQueueOnProcess(TestTaskQueueOnThread):
-    concurrency = 'process'
+    concurrency = 'process'
+
+    def worker_infos(self):
+        info = yield send('arbiter', 'info')
+        workers = info['monitors'][self.name()]['workers']
+        yield multi_async((send(w['actor']['actor_id'], 'info')
+                           for w in workers))
+
+    def test_run_new_task_process(self):
+        infos = yield self.worker_infos()
+        executed = sum((i['tasks']['process_pool']['executed']
+                        for i in infos))
+        app = yield get_application(self.name())
+        r = yield app.backend.run('cpubound')
+        r = yield app.backend.wait_for_task(r)
+        self.assertEqual(r.status, tasks.SUCCESS)
+        self.assertTrue(r.result)
+        infos = yield self.worker_infos()
+        # The job ran in a subprocess of a worker, not in the worker
+        pids = [i['actor']['process_id'] for i in infos]
+        self.assertFalse(r.result in pids)
+        self.assertTrue(sum((i['tasks']['process_pool']['executed']
+                             for i in infos)) > executed)
+
+    def test_run_new_task_process_timeout(self):
+        # Thread workers cannot fork, the job runs on a thread there
+        app = yield get_application(self.name())
+        r = yield app.backend.run('cpubound', lag=10)
+        r = yield app.backend.wait_for_task(r)
+        self.assertEqual(r.status, tasks.REVOKED)
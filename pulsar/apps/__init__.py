@@ -58,7 +58,7 @@ from inspect import getfile
 import pulsar
 from pulsar import get_actor, EventHandler
 from pulsar.utils.structures import OrderedDict
-from pulsar.utils.pep import pickle
+from pulsar.utils.pep import pickle, default_timer
 from pulsar.utils.internet import (parse_connection_string,
                                    get_connection_string)
 from pulsar.utils.log import LocalMixin, local_property
@@ -102,6 +102,11 @@ def monitor_start(self):
     yield self.app.monitor_start(self)
     if not self.cfg.workers:
         yield self.app.worker_start(self)
+    elif self.cfg.preload_app:
+        start = default_timer()
+        yield self.app.preload(self)
+        self.logger.info('%s preloaded in %.3f seconds', app,
+                         default_timer() - start)
     self.app.fire_event('start')
     yield self  # yield self as last. Part of the start event chain
 
@@ -448,6 +453,14 @@ class Application(Configurator, pulsar.Pulsar):
         pass
 
     # MONITOR CALLBACKS
+    def preload(self, monitor):
+        '''Callback by the monitor, before spawning workers, when the
+        :ref:`preload_app <setting-preload_app>` setting is ``True``.
+
+        Load here application code and data which workers can share.
+        '''
+        pass
+
     def actorparams(self, monitor, params=None):
         '''Hook to add additional entries when the monitor spawn new actors.
         '''
@@ -76,6 +76,46 @@ we use the ``pubsub`` handle to publish the message::
 And the rest is taken care of by the callables ``PubSubClient`` which write
 the message to all listening websocket clients.
 
+Broadcasting
+~~~~~~~~~~~~~~~~~~~~~~
+
+Messages received by a :class:`PubSubBackend` in the same iteration of the
+event loop are queued by :meth:`PubSubBackend.broadcast` and delivered to
+all clients in a single :meth:`PubSubBackend.dispatch` pass. Each message is
+decoded once, whatever the number of clients.
+
+A :class:`Client` can also receive messages already encoded by its
+:attr:`Client.encoder`. The encoder is called once per message for all the
+clients sharing it, for example to build a websocket frame once for all
+the websockets of a chat::
+
+    def encode_frame(message):
+        return FrameParser().encode(message)
+
+    class PubSubClient(pubsub.Client):
+        encoder = staticmethod(encode_frame)
+
+Slow clients
+~~~~~~~~~~~~~~~~~~~~~~
+
+A client which cannot keep up with the messages, for example a websocket
+with a backed up transport, returns ``False`` from :meth:`Client.ready`.
+The backend then keeps its messages in a delivery queue, bounded by
+:attr:`Client.max_queue`, and delivers them once the client is ready again.
+Queued messages are retried after :attr:`PubSubBackend.retry_interval`
+seconds, an interval doubled, up to :attr:`PubSubBackend.max_retry_interval`,
+each time none of the slow clients became ready.
+When the queue is full, the :attr:`Client.overflow` policy applies:
+
+* ``drop_oldest`` drops the oldest queued messages (the default);
+* ``drop_newest`` drops the messages which did not fit in the queue;
+* ``disconnect`` removes the client from the backend and calls its
+  :meth:`Client.close` method.
+
+The number of delivered and dropped messages, together with the number of
+queued messages and disconnected clients, is added to the ``pubsub`` entry
+of the :ref:`actor info <actor_info_command>`.
+
 
 PubSub handler
 ========================
@@ -101,13 +141,20 @@ PubSub backend
    :member-order: bysource
 
 
+Local backend
+========================
+
+.. automodule:: pulsar.apps.pubsub.local
+
+
 .. _wikipedia: http://en.wikipedia.org/wiki/Publish%E2%80%93subscribe_pattern
 '''
 import logging
+from collections import deque
 
 import pulsar
 from pulsar import get_actor
-from pulsar.utils.pep import to_string
+from pulsar.utils.pep import to_string, get_event_loop, iteritems
 from pulsar.utils.log import local_property
 
 
@@ -123,10 +170,46 @@ class Client(object):
 
     * ``channel`` the channel which originated the message
     * ``message`` the message
+
+    .. attribute:: encoder
+
+        Optional callable which receives a decoded message and returns the
+        message passed to this client. The :class:`PubSubBackend` calls it
+        once per message for all clients with the same encoder.
+
+        Default: ``None``, clients receive the decoded message.
+
+    .. attribute:: max_queue
+
+        Maximum number of messages queued for this client while it is not
+        :meth:`ready`. ``0`` for no limit.
+
+        Default: ``100``.
+
+    .. attribute:: overflow
+
+        What to do when more than :attr:`max_queue` messages are queued,
+        one of ``drop_oldest``, ``drop_newest`` and ``disconnect``.
+
+        Default: ``drop_oldest``.
     '''
+    encoder = None
+    max_queue = 100
+    overflow = 'drop_oldest'
+
     def __call__(self, channel, message):
         raise NotImplementedError
 
+    def ready(self):
+        '''``True`` when this client can receive a message without
+        accumulating data. By default a client is always ready.'''
+        return True
+
+    def close(self):
+        '''Called when this client is disconnected because of the
+        ``disconnect`` :attr:`overflow` policy.'''
+        pass
+
 
 class PubSub(object):
     '''Publish/Subscribe paradigm handler.
@@ -195,12 +278,42 @@ via the :attr:`encoder` callable (if available).'''
 
 class PubSubBackend(pulsar.Backend):
     '''Publish/Subscribe :class:`pulsar.apps.Backend` interface.
+
+    .. attribute:: retry_interval
+
+        Seconds before the first attempt to deliver the messages queued for
+        clients which are not :meth:`Client.ready`. The interval is doubled
+        after each attempt which did not deliver any queued message.
+
+        Default: ``0.1``.
+
+    .. attribute:: max_retry_interval
+
+        The maximum number of seconds between two attempts to deliver queued
+        messages.
+
+        Default: ``5``.
     '''
+    retry_interval = 0.1
+    max_retry_interval = 5
+
     @local_property
     def clients(self):
         '''The set of clients for this :class:`PubSub` handler.'''
         return set()
 
+    @local_property
+    def queues(self):
+        '''Dictionary of delivery queues of :attr:`clients` which were not
+        ready to receive messages.'''
+        return {}
+
+    @local_property
+    def counters(self):
+        '''Dictionary of delivered and dropped messages and of
+        disconnected clients.'''
+        return {'delivered': 0, 'dropped': 0, 'disconnected': 0}
+
     @classmethod
     def path_from_scheme(cls, scheme):
         return 'pulsar.apps.pubsub.%s' % scheme
@@ -215,6 +328,7 @@ from the publisher, the :meth:`broadcast` method will notify all
     def remove_client(self, client):
         '''Remove *client* from the set of all :attr:`clients`.'''
         self.clients.discard(client)
+        self.queues.pop(client, None)
 
     def publish(self, channel, message):
         '''Publish a ``message`` into ``channel``.
@@ -239,19 +353,104 @@ Must be implemented by subclasses.'''
         raise NotImplementedError
 
     def broadcast(self, channel, message):
-        '''Broadcast ``message`` to all :attr:`clients`.'''
+        '''Broadcast ``message`` to all :attr:`clients`.
+
+Messages broadcast in the same iteration of the event loop are delivered
+together by :meth:`dispatch`, which is scheduled by the first of them. When
+no event loop is available, the message is dispatched immediately.'''
+        pending = self.local.pending_messages
+        if pending is None:
+            self.local.pending_messages = pending = []
+            event_loop = get_event_loop()
+            if event_loop:
+                event_loop.call_soon(self.dispatch)
+            else:
+                pending.append((channel, message))
+                return self.dispatch()
+        pending.append((channel, message))
+
+    def dispatch(self):
+        '''Deliver the messages queued by :meth:`broadcast`, together with
+the messages queued for clients which were not ready, to all :attr:`clients`
+and return the number of new messages.
+
+Messages are decoded once and encoded once for each distinct
+:attr:`Client.encoder`. Messages for a client which is not
+:meth:`Client.ready` are kept in its delivery queue, bounded by
+:attr:`Client.max_queue`. A client raising an exception is removed.'''
+        pending = self.local.pending_messages
+        self.local.pending_messages = None
+        queues = self.queues
+        if not (pending or queues):
+            return 0
+        decode = self.decode
+        messages = [(to_string(c), decode(m)) for c, m in pending or ()]
+        counters = self.counters
+        encoded = {}
         remove = set()
-        channel = to_string(channel)
-        message = self.decode(message)
-        clients = tuple(self.clients)
-        for client in clients:
+        disconnect = []
+        drained = False
+        # Without new messages only clients with a delivery queue are served
+        for client in tuple(self.clients if messages else queues):
+            encoder = getattr(client, 'encoder', None)
+            ready = getattr(client, 'ready', None)
             try:
-                client(channel, message)
+                if encoder is None or not messages:
+                    data = messages
+                else:
+                    data = encoded.get(encoder)
+                    if data is None:
+                        data = [(c, encoder(m)) for c, m in messages]
+                        encoded[encoder] = data
+                queue = queues.get(client)
+                if queue is None:
+                    delivered = 0
+                    for channel, message in data:
+                        if ready and not ready():
+                            queue = deque(data[delivered:])
+                            queues[client] = queue
+                            break
+                        client(channel, message)
+                        delivered += 1
+                else:
+                    queue.extend(data)
+                    delivered = 0
+                    while queue and ready():
+                        channel, message = queue.popleft()
+                        client(channel, message)
+                        delivered += 1
+                    drained = drained or delivered > 0
+                    if not queue:
+                        queues.pop(client)
+                counters['delivered'] += delivered
+                if queue and self._overflow(client, queue):
+                    disconnect.append(client)
             except Exception:
                 LOGGER.exception('Exception while processing pub/sub client. '
                                  'Removing it.')
                 remove.add(client)
-        self.clients.difference_update(remove)
+        for client in remove:
+            self._drop(client)
+        for client in disconnect:
+            self._drop(client)
+            counters['disconnected'] += 1
+            try:
+                client.close()
+            except Exception:
+                LOGGER.exception('Exception while closing pub/sub client.')
+        if not queues:
+            self.local.retry_delay = None
+        elif not self.local.retrying:
+            self._retry_later(drained)
+        return len(messages)
+
+    def info(self):
+        '''Dictionary of information about the delivery of messages to
+:attr:`clients`.'''
+        info = dict(self.counters)
+        info['clients'] = len(self.clients)
+        info['queued'] = sum((len(q) for q in self.queues.values()))
+        return info
 
     def close(self):
         '''Close this :class:`PubSubBackend`.'''
@@ -270,8 +469,55 @@ Must be implemented by subclasses.'''
             raise RuntimeError('Cannot initialise pubsub when no actor.')
         if 'pubsub' not in actor.params:
             actor.params.pubsub = {}
+            actor.bind_event('on_info', pubsub_info)
         be = actor.params.pubsub.get(id)
         if not be and backend:
             be = backend
             actor.params.pubsub[id] = be
         return be
+
+    def _overflow(self, client, queue):
+        # Apply the overflow policy of client, return True when the client
+        # must be disconnected
+        max_queue = getattr(client, 'max_queue', 0)
+        dropped = len(queue) - max_queue
+        if max_queue and dropped > 0:
+            overflow = getattr(client, 'overflow', None)
+            if overflow == 'disconnect':
+                return True
+            pop = queue.pop if overflow == 'drop_newest' else queue.popleft
+            for _ in range(dropped):
+                pop()
+            self.counters['dropped'] += dropped
+        return False
+
+    def _drop(self, client):
+        queue = self.queues.get(client)
+        if queue:
+            self.counters['dropped'] += len(queue)
+        self.remove_client(client)
+
+    def _retry_later(self, drained):
+        # Back off exponentially while no queued message is delivered
+        event_loop = get_event_loop()
+        if event_loop:
+            delay = self.local.retry_delay
+            if drained or not delay:
+                delay = self.retry_interval
+            else:
+                delay = min(2*delay, self.max_retry_interval)
+            self.local.retry_delay = delay
+            self.local.retrying = True
+            event_loop.call_later(delay, self._retry)
+
+    def _retry(self):
+        self.local.retrying = False
+        self.dispatch()
+
+
+def pubsub_info(actor, info=None):
+    '''Add the ``pubsub`` entry to the ``info`` dictionary of ``actor``.'''
+    backends = actor.params.get('pubsub')
+    if backends and info is not None:
+        info['pubsub'] = dict(((id, be.info()) for id, be in
+                               iteritems(backends)))
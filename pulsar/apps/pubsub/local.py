@@ -1,13 +1,35 @@
+'''
+The local pubsub backend keeps subscriptions in the
+:class:`pulsar.Monitor` (or :class:`pulsar.Arbiter`) named by the backend and
+broadcasts published messages to the subscribing actors via their mailbox.
+
+Subscriptions are indexed by :class:`Subscriptions`:
+
+* literal channels in a dictionary, so that a publish looks them up directly;
+* patterns, channels containing ``*``, ``?`` or ``[``, in a trie of their
+  dot-separated literal prefix. A publish only matches the glob of the
+  patterns found along the path of the published channel.
+
+Each subscribing actor receives one mailbox message per publish, however
+many of its subscriptions match the channel.
+
+.. autoclass:: Subscriptions
+   :members:
+   :member-order: bysource
+'''
 import re
 import logging
+from fnmatch import translate
 
 from pulsar.apps import pubsub
 from pulsar import send, command
-from pulsar.utils.pep import itervalues, iteritems
+from pulsar.utils.pep import iteritems
 
 
 LOGGER = logging.getLogger('pulsar.pubsub')
 
+glob_chars = re.compile('[*?[]')
+
 
 class PubSubBackend(pubsub.PubSubBackend):
     '''Implements :class:`PubSub` in pulsar.
@@ -27,46 +49,154 @@ class PubSubBackend(pubsub.PubSubBackend):
         return send(self.name, 'pubsub_unsubscribe', self.id, *channels)
 
 
+class TrieNode(object):
+    __slots__ = ('children', 'patterns')
+
+    def __init__(self):
+        self.children = {}
+        # pattern -> compiled glob of the pattern after this node prefix
+        self.patterns = {}
+
+
+class Subscriptions(object):
+    '''Channel and pattern subscriptions of the actors using a pubsub
+    backend.
+
+    Subscribers are identified by their actor id. The cost of :meth:`match`
+    depends on the number of segments of the channel and on the patterns
+    sharing a literal prefix with it, not on the total number of
+    subscriptions.
+    '''
+    def __init__(self):
+        self.channels = {}
+        self.patterns = {}
+        self.clients = {}
+        self.trie = TrieNode()
+
+    def subscribe(self, client, channel):
+        '''Subscribe ``client`` to ``channel``.'''
+        if glob_chars.search(channel):
+            groups = self.patterns
+            if channel not in groups:
+                self._add_pattern(channel)
+        else:
+            groups = self.channels
+        group = groups.get(channel)
+        if group is None:
+            groups[channel] = group = set()
+        group.add(client)
+        self.clients.setdefault(client, set()).add(channel)
+
+    def unsubscribe(self, client, channels=None):
+        '''Unsubscribe ``client`` from ``channels``, from all channels if
+        not provided.'''
+        subscribed = self.clients.get(client)
+        if subscribed:
+            for channel in list(channels or subscribed):
+                if channel in subscribed:
+                    subscribed.discard(channel)
+                    pattern = channel in self.patterns
+                    groups = self.patterns if pattern else self.channels
+                    group = groups[channel]
+                    group.discard(client)
+                    if not group:
+                        groups.pop(channel)
+                        if pattern:
+                            self._remove_pattern(channel)
+            if not subscribed:
+                self.clients.pop(client)
+
+    def count(self, client):
+        '''Number of channels ``client`` is subscribed to.'''
+        return len(self.clients.get(client, ()))
+
+    def match(self, channel):
+        '''Generator of ``(channel, clients)`` pairs for the subscriptions
+        matching ``channel``. When ``channel`` is ``*`` or empty, all
+        subscriptions match.'''
+        if not channel or channel == '*':
+            for group in (self.channels, self.patterns):
+                for pair in iteritems(group):
+                    yield pair
+            return
+        group = self.channels.get(channel)
+        if group:
+            yield channel, group
+        node = self.trie
+        start = 0
+        while node:
+            if node.patterns:
+                rest = channel[start:]
+                for pattern, glob in iteritems(node.patterns):
+                    if glob.match(rest):
+                        yield channel, self.patterns[pattern]
+            # patterns below this node match after a dot only
+            end = channel.find('.', start)
+            if end < 0:
+                break
+            node = node.children.get(channel[start:end])
+            start = end + 1
+
+    def _add_pattern(self, pattern):
+        node = self.trie
+        segments = pattern.split('.')
+        for n, segment in enumerate(segments):
+            if glob_chars.search(segment):
+                rest = '.'.join(segments[n:])
+                node.patterns[pattern] = re.compile(translate(rest))
+                return
+            child = node.children.get(segment)
+            if child is None:
+                node.children[segment] = child = TrieNode()
+            node = child
+
+    def _remove_pattern(self, pattern):
+        node = self.trie
+        path = []
+        for segment in pattern.split('.'):
+            if segment not in node.children or glob_chars.search(segment):
+                break
+            path.append((node, segment))
+            node = node.children[segment]
+        node.patterns.pop(pattern, None)
+        # prune empty nodes
+        while path and not (node.patterns or node.children):
+            node, segment = path.pop()
+            node.children.pop(segment)
+
+
 @command()
 def pubsub_publish(request, id, channel, message):
     monitor = request.actor
-    if not channel or channel == '*':
-        matched = ((c, reg[1]) for c, reg in
-                   iteritems(_get_pubsub_channels(monitor)))
-    else:
-        matched = _channel_groups(monitor, channel)
-    clients = set()
-    # loop over matched channels
-    for channel, group in matched:
-        for aid, pid in group:
-            # if the id is matched we have a client
-            if pid == id:
-                clients.add(aid)
-                monitor.send(aid, 'pubsub_broadcast', id, channel, message)
-    return len(clients)
+    actors = {}
+    for channel, group in _get_subscriptions(monitor, id).match(channel):
+        for aid in group:
+            channels = actors.get(aid)
+            if channels is None:
+                actors[aid] = channels = []
+            if channel not in channels:
+                channels.append(channel)
+    # one message for each subscribing actor
+    for aid, channels in iteritems(actors):
+        monitor.send(aid, 'pubsub_broadcast', id, channels, message)
+    return len(actors)
 
 
 @command()
 def pubsub_subscribe(request, id, *channels):
-    client = (request.caller.aid, id)
+    subscriptions = _get_subscriptions(request.actor, id)
+    aid = request.caller.aid
     for channel in channels:
-        _, group = _get_channel(request.actor, channel)
-        group.add(client)
-    return _channels_for_client(request.actor, client)
+        subscriptions.subscribe(aid, channel)
+    return subscriptions.count(aid)
 
 
 @command()
 def pubsub_unsubscribe(request, id, *channels):
-    client = (request.caller.aid, id)
-    pubsub_channels = _get_pubsub_channels(request.actor)
-    channels = channels or list(pubsub_channels)
-    for channel in channels:
-        if channel in pubsub_channels:
-            _, group = pubsub_channels[channel]
-            group.discard(client)
-            if not group:
-                pubsub_channels.pop(channel)
-    return _channels_for_client(request.actor, client)
+    subscriptions = _get_subscriptions(request.actor, id)
+    aid = request.caller.aid
+    subscriptions.unsubscribe(aid, channels)
+    return subscriptions.count(aid)
 
 
 @command(ack=False)
@@ -74,41 +204,17 @@ def pubsub_broadcast(request, id, channels, message):
     '''In the actor domain'''
     pubsub = PubSubBackend.get(id, actor=request.actor)
     if pubsub:
-        pubsub.broadcast(channels, message)
+        for channel in channels:
+            pubsub.broadcast(channel, message)
     else:
         LOGGER.warning('Pubsub backend not available in %s', request.actor)
 
 
-def _get_channel(monitor, channel):
-    pubsub = _get_pubsub_channels(monitor)
-    if channel not in pubsub:
-        if '*' in channel:
-            channel_re = re.compile(channel)
-        else:
-            channel_re = channel
-        pubsub[channel] = (channel_re, set())
-    return pubsub[channel]
-
-
-def _get_pubsub_channels(actor):
-    if 'pubsub_channels' not in actor.params:
-        actor.params.pubsub_channels = {}
-    return actor.params.pubsub_channels
-
-
-def _channel_groups(actor, channel):
-    for channel_re, group in itervalues(_get_pubsub_channels(actor)):
-        if hasattr(channel_re, 'match'):
-            g = channel_re.match(channel)
-            if g:
-                yield g.group(), group
-        elif channel_re == channel:
-            yield channel, group
-
-
-def _channels_for_client(monitor, client):
-    c = 0
-    for _, group in _get_pubsub_channels(monitor).values():
-        if client in group:
-            c += 1
-    return c
+def _get_subscriptions(actor, id):
+    if 'pubsub_subscriptions' not in actor.params:
+        actor.params.pubsub_subscriptions = {}
+    subscriptions = actor.params.pubsub_subscriptions.get(id)
+    if subscriptions is None:
+        subscriptions = Subscriptions()
+        actor.params.pubsub_subscriptions[id] = subscriptions
+    return subscriptions
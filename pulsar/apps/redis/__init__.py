@@ -17,6 +17,57 @@ To create a new redis client::
     >>> client = pool.redis(('localhost', 6379), db=7)
     >>> d = client.echo('Hello')
 
+Auto pipelining
+~~~~~~~~~~~~~~~~~~
+
+By default each command is a request which waits for its reply before
+releasing the connection back to the pool. When many commands are issued
+concurrently, pass ``auto_pipeline=True`` to the :class:`RedisPool`::
+
+    pool = RedisPool(auto_pipeline=True)
+
+Commands issued during the same event loop iteration for the same server
+and database are written with a single write on one connection and the
+replies are dispatched, in order, to the :class:`pulsar.Deferred` of each
+command. Pipelines, pub/sub and clients with ``full_response`` are not
+affected.
+
+Multiplexed connections
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Pass a positive ``multiplex`` to the :class:`RedisPool` to execute commands
+on a small number of long lived connections per server and database::
+
+    pool = RedisPool(multiplex=2)
+
+Each command is written as soon as it is executed, without checking out a
+connection from the pool, and replies are matched to commands in FIFO
+order. A new connection is opened, up to ``multiplex`` connections, only
+when all the existing ones have commands waiting for a reply. When a
+connection is lost, commands waiting for its replies fail with a
+``ConnectionError``. It can be combined with ``auto_pipeline``.
+
+Client side cache
+~~~~~~~~~~~~~~~~~~~~~
+
+Keys read many times and rarely written can be cached in process by passing
+a :class:`.ClientCache` to the :meth:`RedisPool.redis` method::
+
+    from pulsar.apps.redis import ClientCache
+
+    cache = ClientCache(patterns=['config:*', 'session:*'], ttl=30)
+    client = pool.redis(('localhost', 6379), cache=cache)
+
+Replies to read commands, such as ``GET`` and ``HGETALL``, on keys matching
+the patterns are returned from the cache until they expire or the same
+client writes to the key. Other processes can publish the names of modified
+keys on an invalidation channel which the cache listens to via a
+:class:`.PubSub`::
+
+    cache = ClientCache(channel='invalidate', ttl=30)
+    client = pool.redis(('localhost', 6379), cache=cache)
+    cache.listen(client)
+
 API
 ======
 
@@ -37,17 +88,23 @@ Clients
 from collections import namedtuple
 from functools import partial
 from itertools import chain
+from threading import current_thread
 
 import pulsar
 from pulsar.utils.internet import parse_connection_string
 
 try:
-    from .client import Redis, RedisProtocol, CRedisParser, Request
+    from .client import (Redis, RedisProtocol, CRedisParser, Request,
+                         PipelinedRequest, MultiplexedConnection,
+                         ClientCache)
 except ImportError:
     RedisProtocol = None
     RedisParser = None
     Redis = None
+    ClientCache = None
     Request = None
+    PipelinedRequest = None
+    MultiplexedConnection = None
 
 
 connection_info = namedtuple('connection_info', 'address db password timeout')
@@ -59,17 +116,27 @@ class RedisPool(pulsar.Client):
     :param encoding: default charset encoding for this pool of clients. If
         not provided ``utf-8`` is used.
     :param parser: optional parser factory for this redis pool.
+    :param auto_pipeline: if ``True``, commands issued in the same event
+        loop iteration for the same server and database are sent with a
+        single write on one connection (default ``False``).
+    :param multiplex: if positive, the maximum number of long lived
+        connections per server and database which execute commands
+        concurrently (default ``0``, one connection per request).
 
     A :class:`RedisPool`
     '''
     consumer_factory = RedisProtocol
 
     def __init__(self, encoding=None, parser=None, encoding_errors='strict',
-                 **kwargs):
+                 auto_pipeline=False, multiplex=0, **kwargs):
         super(RedisPool, self).__init__(**kwargs)
         self.parser = parser or CRedisParser
         self.encoding = encoding or 'utf-8'
         self.encoding_errors = encoding_errors or 'strict'
+        self.auto_pipeline = auto_pipeline
+        self._pipelines = {}
+        self.multiplex = multiplex
+        self._multiplexed = {}
         self.bind_event('pre_request', self._authenticate)
 
     def redis(self, address, db=0, password=None, timeout=None, **kw):
@@ -79,6 +146,7 @@ class RedisPool(pulsar.Client):
         :param db: optional server database number.
         :param password: optional server password.
         :param timeout: optional timeout for idle connections.
+        :param cache: optional :class:`.ClientCache` for the client.
         :return: a redis-py_ client.
         '''
         assert Redis, 'To use pulsar-redis you need redis-py installed'
@@ -96,6 +164,10 @@ class RedisPool(pulsar.Client):
 
     def request(self, client, command_name, args, options=None, response=None,
                 new_connection=False, **inp_params):
+        if ((self.auto_pipeline or self.multiplex) and command_name and
+                response is None and not new_connection and not inp_params and
+                not client.full_response and not self.force_sync):
+            return self._pipeline_command(client, command_name, args, options)
         request = Request(client, command_name, args, options, **inp_params)
         resp = self.response(request, response, new_connection)
         if resp is not response and not client.full_response:
@@ -126,6 +198,74 @@ class RedisPool(pulsar.Client):
         consumer.new_request(next_request)
 
     #    INTERNALS
+    def _pipeline_command(self, client, command_name, args, options):
+        d = pulsar.Deferred()
+        command = (command_name.upper(), args, options, d)
+        loop = self.get_event_loop()
+        # Wake up the event loop only when called from another thread
+        if loop.tid == current_thread().ident:
+            call_soon = loop.call_soon
+        else:
+            call_soon = loop.call_soon_threadsafe
+        if self.auto_pipeline:
+            call_soon(self._add_to_pipeline, loop, client, command)
+        else:
+            call_soon(self._send_multiplexed, client, [command])
+        return d
+
+    def _add_to_pipeline(self, loop, client, command):
+        # Add a command to the auto pipeline of the client connection_info.
+        # Invoked in the event loop thread, the pipeline is sent once all
+        # commands issued in the same event loop iteration are added.
+        key = client.connection_info
+        commands = self._pipelines.get(key)
+        if commands is None:
+            commands = self._pipelines[key] = []
+            loop.call_soon(self._send_pipeline, client)
+        commands.append(command)
+
+    def _send_pipeline(self, client):
+        commands = self._pipelines.pop(client.connection_info)
+        if self.multiplex:
+            return self._send_multiplexed(client, commands)
+        request = PipelinedRequest(client, commands)
+        response = self.response(request)
+        response.on_finished.add_errback(request.abort)
+
+    def _send_multiplexed(self, client, commands):
+        # Send commands on the multiplexed connection with fewer commands
+        # waiting for a reply. A new connection is opened if they are all
+        # busy and the multiplex limit is not reached.
+        key = client.connection_info
+        connections = [c for c in self._multiplexed.get(key, ())
+                       if not c.closed]
+        connection = None
+        if connections:
+            connection = min(connections, key=lambda c: len(c.pending))
+        if (connection is None or
+                (connection.pending and len(connections) < self.multiplex)):
+            connection = MultiplexedConnection(client)
+            connections.append(connection)
+            self.get_event_loop().call_soon(self._connect_multiplexed,
+                                            connection)
+        self._multiplexed[key] = connections
+        connection.execute(commands)
+
+    def _connect_multiplexed(self, connection):
+        # Obtain a connection via a ping request, which performs
+        # authentication and database selection, and keep it
+        client = Redis(self, connection.client.connection_info,
+                       full_response=True)
+        try:
+            response = yield self.request(client, 'ping', (),
+                                          release_connection=False).on_finished
+            conn = response.connection
+            conn.set_consumer(None)
+            conn.set_consumer(connection)
+        except Exception:
+            connection.abort()
+            raise
+
     def _authenticate(self, response):
         # Perform redis authentication as a pre_request event
         if response._connection.processed <= 1:
@@ -12,18 +12,28 @@ Pub/Sub
 .. autoclass:: PubSub
    :members:
    :member-order: bysource
+
+Client cache
+~~~~~~~~~~~~~~~
+
+.. autoclass:: ClientCache
+   :members:
+   :member-order: bysource
 '''
 import sys
-from collections import deque
+from collections import deque, OrderedDict
+from copy import copy
+from fnmatch import fnmatchcase
+from threading import Lock
 
 import redis
-from redis.exceptions import NoScriptError, InvalidResponse
+from redis.exceptions import NoScriptError, InvalidResponse, ConnectionError
 from redis.client import BasePipeline as _BasePipeline
 from redis.connection import PythonParser as _p
 
 import pulsar
-from pulsar import Deferred, ProtocolError
-from pulsar.utils.pep import zip
+from pulsar import Deferred, ProtocolError, is_failure
+from pulsar.utils.pep import zip, force_native_str, default_timer
 
 from .parser import Parser
 
@@ -53,6 +63,22 @@ except ImportError:     # pragma    nocover
 NOT_DONE = object()
 
 
+def dispatch_replies(parser, client, commands):
+    '''Dispatch the replies available in ``parser`` to ``commands``.
+
+    ``commands`` is a deque of ``(command_name, args, options, deferred)``
+    tuples waiting for a reply, in the order they were sent.
+    '''
+    parse = client.parse_response
+    response = parser.get()
+    while response is not False:
+        command_name, _, options, d = commands.popleft()
+        if not isinstance(response, Exception):
+            response = parse(response, command_name, **(options or {}))
+        d.callback(response)
+        response = parser.get()
+
+
 class Request(pulsar.Request):
     '''Asynchronous Request for redis.'''
     def __init__(self, client, command_name, args, options=None,
@@ -141,6 +167,105 @@ class Request(pulsar.Request):
                 return NOT_DONE
 
 
+class PipelinedRequest(Request):
+    '''Commands issued in the same event loop iteration with the same
+connection information, sent to the server with a single write.
+
+Replies are dispatched to the Deferred of each command in order.
+Used by :class:`RedisPool` when ``auto_pipeline`` is ``True``.'''
+    def __init__(self, client, commands):
+        pool = client.connection_pool
+        self.client = client
+        self.parser = pool.parser()
+        self.command_name = 'AUTOPIPELINE'
+        self.raise_on_error = True
+        self.release_connection = True
+        self.args = ()
+        self.inp_params = {}
+        self.commands = deque(commands)
+        pack = self.parser.pack_command
+        self.command = b''.join(pack(command_name, *args) for
+                                command_name, args, _, _ in commands)
+
+    def __repr__(self):
+        return 'AUTOPIPELINE(%s)' % len(self.commands)
+    __str__ = __repr__
+
+    def feed(self, data):
+        self.parser.feed(data)
+        dispatch_replies(self.parser, self.client, self.commands)
+        return NOT_DONE if self.commands else None
+
+    def abort(self, failure):
+        '''Call back the remaining commands with ``failure``.'''
+        commands, self.commands = self.commands, ()
+        for _, _, _, d in commands:
+            d.callback(failure)
+
+
+class MultiplexedConnection(pulsar.ProtocolConsumer):
+    '''A long lived redis connection accepting commands concurrently.
+
+    Commands are written as soon as they are executed and replies are
+    matched to commands in FIFO order. If the connection is lost, all
+    commands waiting for a reply fail with a ``ConnectionError``.
+    Used by :class:`RedisPool` when ``multiplex`` is positive.
+    '''
+    def __init__(self, client):
+        super(MultiplexedConnection, self).__init__()
+        self.client = client
+        self.parser = client.connection_pool.parser()
+        self.pending = deque()
+        self._buffer = []
+        self._closed = False
+
+    @property
+    def closed(self):
+        '''``True`` when this connection can no longer execute commands.'''
+        return self._closed
+
+    def execute(self, commands):
+        '''Write ``commands`` into the transport.
+
+        Commands executed before the connection is available are buffered.
+        '''
+        if self._closed:
+            return self._abort(commands, 'Connection closed')
+        pack = self.parser.pack_command
+        data = b''.join(pack(command_name, *args) for
+                        command_name, args, _, _ in commands)
+        self.pending.extend(commands)
+        if self.transport:
+            self.transport.write(data)
+        else:
+            self._buffer.append(data)
+
+    def connection_made(self, connection):
+        if self._buffer:
+            data, self._buffer = b''.join(self._buffer), []
+            self.transport.write(data)
+
+    def data_received(self, data):
+        self.parser.feed(data)
+        dispatch_replies(self.parser, self.client, self.pending)
+
+    def connection_lost(self, exc):
+        self.abort(exc)
+        return super(MultiplexedConnection, self).connection_lost(exc)
+
+    def abort(self, exc=None):
+        '''Close this connection and fail all commands waiting for a reply.
+        '''
+        if not self._closed:
+            self._closed = True
+            pending, self.pending = self.pending, deque()
+            self._abort(pending, 'Connection lost')
+
+    def _abort(self, commands, msg):
+        for _, _, _, d in commands:
+            d.callback(ConnectionError(msg))
+
+
 class RedisProtocol(pulsar.ProtocolConsumer):
     '''An asynchronous pulsar protocol for redis.'''
     result = NOT_DONE
@@ -154,12 +279,230 @@ class RedisProtocol(pulsar.ProtocolConsumer):
         self.transport.write(self._request.command)
 
 
+class ClientCache(object):
+    '''An in-process read-through cache for a :class:`Redis` client.
+
+    Replies of ``commands`` on keys matching ``patterns`` are stored for
+    ``ttl`` seconds and returned without a round trip to the server. Any
+    other command executed by the same client invalidates the keys in its
+    arguments. The keys of a command are found via :attr:`KEY_POSITIONS`,
+    the first argument being the only key of commands not listed there.
+    Commands whose keys cannot be found, such as scripts or ``SORT`` with
+    a malformed argument list, clear the whole cache.
+
+    :param commands: the read commands to cache.
+    :param patterns: optional list of glob-style patterns, as in the redis
+        ``KEYS`` command, of keys to cache. If not given all keys are cached.
+    :param ttl: number of seconds a reply is kept.
+    :param max_entries: maximum number of replies kept, the least recently
+        used are evicted first.
+    :param channel: optional pubsub channel where the names of invalidated
+        keys are published. Used by the :meth:`listen` method.
+    '''
+    READ_COMMANDS = frozenset(('GET', 'MGET', 'EXISTS', 'STRLEN', 'HGET',
+                               'HMGET', 'HGETALL', 'HKEYS', 'HVALS', 'HLEN',
+                               'HEXISTS', 'LRANGE', 'LLEN', 'SMEMBERS',
+                               'SCARD', 'SISMEMBER'))
+    '''The commands cached by default.'''
+    KEY_POSITIONS = {'MGET': slice(None), 'DEL': slice(None),
+                     'MSET': slice(None, None, 2),
+                     'MSETNX': slice(None, None, 2),
+                     'RENAME': slice(2), 'RENAMENX': slice(2),
+                     'RPOPLPUSH': slice(2), 'BRPOPLPUSH': slice(2),
+                     'SMOVE': slice(2),
+                     'BLPOP': slice(-1), 'BRPOP': slice(-1),
+                     'SUNION': slice(None), 'SINTER': slice(None),
+                     'SDIFF': slice(None), 'SUNIONSTORE': slice(None),
+                     'SINTERSTORE': slice(None), 'SDIFFSTORE': slice(None),
+                     'BITOP': slice(1, None)}
+    '''The slice of the arguments containing the keys of commands with
+    more than one key or a key which is not the first argument.'''
+    NUMKEYS_COMMANDS = frozenset(('ZUNIONSTORE', 'ZINTERSTORE', 'EVAL',
+                                  'EVALSHA'))
+    CLEAR_COMMANDS = frozenset(('FLUSHDB', 'FLUSHALL', 'SELECT'))
+
+    def __init__(self, commands=None, patterns=None, ttl=60,
+                 max_entries=1000, channel=None):
+        self.commands = frozenset(c.upper() for c in
+                                  (commands or self.READ_COMMANDS))
+        self.patterns = tuple(patterns or ())
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.channel = channel
+        self.pubsub = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+        self._entries = OrderedDict()
+        self._keys = {}
+        # keys with replies on their way: key -> [readers, version]
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def execute(self, client, command, args, options):
+        '''Execute ``command`` on ``client`` via the cache.'''
+        command = command.upper()
+        if command not in self.commands:
+            self._invalidate_command(command, args)
+            return client.connection_pool.request(client, command, args,
+                                                  options)
+        keys = self._command_keys(command, args)
+        if not self._cacheable(keys):
+            return client.connection_pool.request(client, command, args,
+                                                  options)
+        entry = (command, args)
+        now = default_timer()
+        with self.lock:
+            value = self._entries.pop(entry, None)
+            if value is not None:
+                if value[0] > now:
+                    self._entries[entry] = value
+                    self.hits += 1
+                    d = Deferred()
+                    d.callback(copy(value[1]))
+                    return d
+                self._discard(entry)
+            self.misses += 1
+            versions = []
+            for key in keys:
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = [0, 0]
+                pending[0] += 1
+                versions.append(pending[1])
+        result = client.connection_pool.request(client, command, args,
+                                                options)
+        return result.add_both(
+            lambda r: self._store(entry, keys, versions, r))
+
+    def invalidate(self, *keys):
+        '''Remove the replies on ``keys`` from the cache.'''
+        with self.lock:
+            for key in keys:
+                key = force_native_str(key)
+                pending = self._pending.get(key)
+                if pending is not None:
+                    pending[1] += 1
+                for entry in self._keys.pop(key, ()):
+                    self._entries.pop(entry, None)
+
+    def clear(self):
+        '''Remove all the replies from the cache.'''
+        with self.lock:
+            for pending in self._pending.values():
+                pending[1] += 1
+            self._entries.clear()
+            self._keys.clear()
+
+    def listen(self, client):
+        '''Honour invalidations published on :attr:`channel`.
+
+        Subscribe to :attr:`channel` with a :class:`PubSub` obtained from
+        ``client``. Each message published on the channel is the name of a
+        key to invalidate.
+
+        :return: the :class:`pulsar.Deferred` returned by
+            :meth:`PubSub.subscribe`.
+        '''
+        assert self.channel, 'No invalidation channel for the cache'
+        if self.pubsub is None:
+            self.pubsub = client.pubsub()
+            self.pubsub.bind_event('on_message', self._on_message)
+        return self.pubsub.subscribe(self.channel)
+
+    #    INTERNALS
+    def _command_keys(self, command, args):
+        # The keys of command or None when they cannot be found
+        if command in self.NUMKEYS_COMMANDS:
+            # destination or script, number of keys, keys, ...
+            try:
+                keys = args[2:2+int(args[1])]
+            except (IndexError, ValueError):
+                return None
+            if command.startswith('Z'):
+                keys = args[:1] + keys
+        elif command == 'SORT':
+            # SORT key ... [STORE destination]
+            keys = args[:1]
+            options = [force_native_str(a).upper() for a in args[1:]]
+            if 'STORE' in options:
+                n = options.index('STORE') + 2
+                if n >= len(args):
+                    return None
+                keys += args[n:n+1]
+        else:
+            keys = args[self.KEY_POSITIONS.get(command, slice(1))]
+        return tuple(force_native_str(a) for a in keys)
+
+    def _cacheable(self, keys):
+        if not keys:
+            return False
+        elif self.patterns:
+            return all(any(fnmatchcase(k, p) for p in self.patterns)
+                       for k in keys)
+        return True
+
+    def _invalidate_command(self, command, args):
+        if command in self.CLEAR_COMMANDS:
+            self.clear()
+        elif args and (self._keys or self._pending):
+            keys = self._command_keys(command, args)
+            if keys is None:
+                self.clear()
+            else:
+                self.invalidate(*keys)
+
+    def _store(self, entry, keys, versions, result):
+        with self.lock:
+            valid = not is_failure(result)
+            for key, version in zip(keys, versions):
+                pending = self._pending[key]
+                # the key was invalidated while waiting for the reply
+                valid = valid and pending[1] == version
+                pending[0] -= 1
+                if not pending[0]:
+                    self._pending.pop(key)
+            if not valid:
+                return result
+            self._entries.pop(entry, None)
+            self._entries[entry] = (default_timer() + self.ttl, result)
+            for key in keys:
+                self._keys.setdefault(key, set()).add(entry)
+            while len(self._entries) > self.max_entries:
+                entry, _ = self._entries.popitem(last=False)
+                self._discard(entry)
+        return copy(result)
+
+    def _discard(self, entry):
+        command, args = entry
+        for key in self._command_keys(command, args) or ():
+            entries = self._keys.get(key)
+            if entries:
+                entries.discard(entry)
+                if not entries:
+                    self._keys.pop(key)
+
+    def _on_message(self, channel_message):
+        channel, message = channel_message
+        if force_native_str(channel) == self.channel:
+            self.invalidate(message)
+
+
 class Redis(redis.StrictRedis):
-    '''Override redis-py client handler'''
-    def __init__(self, poll, connection_info, full_response=False, **kw):
+    '''Override redis-py client handler
+
+    .. attribute:: cache
+
+        Optional :class:`ClientCache` for this client.
+    '''
+    def __init__(self, poll, connection_info, full_response=False,
+                 cache=None, **kw):
         self.connection_pool = poll
         self.connection_info = connection_info
         self.full_response = full_response
+        self.cache = cache
         self.extra = kw
         self.response_callbacks = self.__class__.RESPONSE_CALLBACKS.copy()
 
@@ -170,6 +513,8 @@ class Redis(redis.StrictRedis):
     def execute_command(self, command, *args, **options):
         "Execute a ``command`` and return a parsed response"
         try:
+            if self.cache is not None and not self.full_response:
+                return self.cache.execute(self, command, args, options)
             return self.connection_pool.request(self, command, args, options)
         except NoScriptError:
             self.connection_pool.clear_scripts()
@@ -229,6 +574,10 @@ class BasePipeline(_BasePipeline):
         return self.client.full_response
 
     def execute(self, raise_on_error=True):
+        cache = self.client.cache
+        if cache is not None:
+            for args, _ in self.command_stack:
+                cache._invalidate_command(args[0].upper(), args[1:])
         return self.connection_pool.request_pipeline(
             self, raise_on_error=raise_on_error)
 
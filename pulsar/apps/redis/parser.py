@@ -1,11 +1,13 @@
 import sys
-from itertools import starmap
 
 ispy3k = sys.version_info >= (3, 0)
 if ispy3k:
     long = int
-else:
-    from itertools import imap as map
+    string_type = str
+    int_to_bytes = lambda value: str(value).encode('utf-8')
+else:   # pragma    nocover
+    string_type = unicode
+    int_to_bytes = str
 
 
 REPLAY_TYPE = frozenset((b'$',   # REDIS_REPLY_STRING,
@@ -14,66 +16,29 @@ REPLAY_TYPE = frozenset((b'$',   # REDIS_REPLY_STRING,
                          b'+',   # REDIS_REPLY_STATUS,
                          b'-'))  # REDIS_REPLY_ERROR
 
-
-class String(object):
-    __slots__ = ('_length', 'next')
-
-    def __init__(self, length, next):
-        self._length = length
-        self.next = next
-
-    def decode(self, parser, result):
-        parser._current = None
-        length = self._length
-        if length >= 0:
-            b = parser._inbuffer
-            if len(b) >= length+2:
-                parser._inbuffer, chunk = b[length+2:], bytes(b[:length])
-                if parser.encoding:
-                    return chunk.decode(parser.encoding)
-                else:
-                    return chunk
-            else:
-                parser._current = self
-                return False
-
-
-class ArrayTask(object):
-    __slots__ = ('_length', '_response', 'next')
-
-    def __init__(self, length, next):
-        self._length = length
-        self._response = []
-        self.next = next
-
-    def decode(self, parser, result):
-        length = self._length
-        if length >= 0:
-            response = self._response
-            if result is not False:
-                response.append(result)
-            while len(response) < length:
-                result = parser._get(self)
-                if result is False:
-                    break
-                response.append(result)
-            if len(response) == length:
-                parser._current = None
-                return response
-            elif not parser._current:
-                parser._current = self
-            return False
+# Encoded headers of arrays and bulk strings with small lengths
+ARRAY_HEADERS = tuple(('*%s\r\n' % n).encode('utf-8') for n in range(64))
+BULK_HEADERS = tuple(('$%s\r\n' % n).encode('utf-8') for n in range(1024))
+# Maximum number of encoded command names cached by the Parser
+MAX_COMMANDS = 512
 
 
 class Parser(object):
-    '''A python parser for redis.'''
+    '''A python parser for redis.
+
+    The parser keeps a read offset into its buffer rather than slicing the
+    buffer for every parsed element. The consumed part of the buffer is
+    discarded when new data is fed. Multi-bulk replies are decoded
+    iteratively, partially parsed arrays are kept in the ``_current`` stack.
+    '''
     encoding = None
 
     def __init__(self, protocolError, responseError):
         self.protocolError = protocolError
         self.responseError = responseError
-        self._current = None
+        self._current = []
         self._inbuffer = bytearray()
+        self._pos = 0
 
     def on_connect(self, connection):
         if connection.decode_responses:
@@ -84,23 +49,81 @@ class Parser(object):
 
     def feed(self, buffer):
         '''Feed new data into the buffer'''
+        if self._pos:
+            del self._inbuffer[:self._pos]
+            self._pos = 0
         self._inbuffer.extend(buffer)
 
     def get(self):
-        '''Called by the protocol consumer'''
-        if self._current:
-            return self._resume(self._current, False)
-        else:
-            return self._get(None)
+        '''Called by the protocol consumer.
+
+        Return the next reply or ``False`` if the buffer does not contain a
+        complete reply.'''
+        b = self._inbuffer
+        stack = self._current
+        while True:
+            pos = self._pos
+            idx = b.find(b'\r\n', pos)
+            if idx < 0:
+                return False
+            rtype = b[pos:pos+1]
+            response = bytes(b[pos+1:idx])
+            pos = idx + 2
+            if rtype == b'$':
+                length = long(response)
+                if length >= 0:
+                    end = pos + length
+                    if len(b) < end + 2:
+                        return False
+                    response = bytes(b[pos:end])
+                    if self.encoding:
+                        response = response.decode(self.encoding)
+                    pos = end + 2
+                else:
+                    response = None
+            elif rtype == b':':
+                response = long(response)
+            elif rtype == b'+':
+                pass
+            elif rtype == b'*':
+                length = long(response)
+                if length > 0:
+                    stack.append((length, []))
+                    self._pos = pos
+                    continue
+                response = [] if length == 0 else None
+            elif rtype == b'-':
+                response = self.responseError(response.decode('utf-8'))
+            else:
+                # Clear the buffer and raise
+                self._inbuffer = bytearray()
+                self._current = []
+                self._pos = 0
+                raise self.protocolError('Protocol Error')
+            self._pos = pos
+            while stack:
+                length, array = stack[-1]
+                array.append(response)
+                if len(array) < length:
+                    break
+                stack.pop()
+                response = array
+            else:
+                return response
 
     def pack_command(self, *args):
         "Pack a series of arguments into a value Redis command"
-        return b''.join(self.__pack_gen(args))
+        buffer = bytearray()
+        self._pack(buffer, args)
+        return bytes(buffer)
 
     def pack_pipeline(self, commands):
         '''Packs pipeline commands into bytes.'''
-        pack = lambda *args: b''.join(self.__pack_gen(args))
-        return b''.join(starmap(pack, (args for args, _ in commands)))
+        buffer = bytearray()
+        pack = self._pack
+        for args, _ in commands:
+            pack(buffer, args)
+        return bytes(buffer)
 
     #    INTERNALS
 
@@ -123,47 +146,41 @@ class Parser(object):
             else:
                 return str(value)
 
-    def __pack_gen(self, args):
-        e = self.encode
-        crlf = b'\r\n'
-        yield e('*%s\r\n' % len(args))
-        for value in map(e, args):
-            yield e('$%s\r\n' % len(value))
-            yield value
-            yield crlf
-
-    def _get(self, next):
-        b = self._inbuffer
-        length = b.find(b'\r\n')
-        if length >= 0:
-            self._inbuffer, response = b[length+2:], bytes(b[:length])
-            rtype, response = response[:1], response[1:]
-            if rtype == b'-':
-                return self.responseError(response.decode('utf-8'))
-            elif rtype == b':':
-                return long(response)
-            elif rtype == b'+':
-                return response
-            elif rtype == b'$':
-                task = String(long(response), next)
-                return task.decode(self, False)
-            elif rtype == b'*':
-                task = ArrayTask(long(response), next)
-                return task.decode(self, False)
-            else:
-                # Clear the buffer and raise
-                self._inbuffer = bytearray()
-                raise self.protocolError('Protocol Error')
-        else:
-            return False
+    # Encoded command names, shared by all parsers
+    _commands = {}
+
+    def _pack(self, buffer, args):
+        # Pack a command into the buffer. The encoded command name is cached
+        # and bytes, strings and integers do not go through encode.
+        n = len(args)
+        buffer.extend(ARRAY_HEADERS[n] if n < 64 else
+                      ('*%s\r\n' % n).encode('utf-8'))
+        name = args[0]
+        command = self._commands.get(name)
+        if command is None:
+            value = self.encode(name)
+            command = (('$%s\r\n' % len(value)).encode('utf-8') + value +
+                       b'\r\n')
+            if len(self._commands) < MAX_COMMANDS:
+                self._commands[name] = command
+        buffer.extend(command)
+        encode = self.encode
+        for i in range(1, n):
+            value = args[i]
+            vtype = type(value)
+            if vtype is not bytes:
+                if vtype is string_type:
+                    value = value.encode('utf-8')
+                elif vtype is int:
+                    value = int_to_bytes(value)
+                else:
+                    value = encode(value)
+            size = len(value)
+            buffer.extend(BULK_HEADERS[size] if size < 1024 else
+                          ('$%s\r\n' % size).encode('utf-8'))
+            buffer.extend(value)
+            buffer.extend(b'\r\n')
 
     def buffer(self):
         '''Current buffer'''
-        return bytes(self._inbuffer)
-
-    def _resume(self, task, result):
-        result = task.decode(self, result)
-        if result is not False and task.next:
-            return self._resume(task.next, result)
-        else:
-            return result
+        return bytes(self._inbuffer[self._pos:])
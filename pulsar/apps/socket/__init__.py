@@ -55,6 +55,27 @@ last read from the remote client, one can use the
 
 will close client connections which have been idle for 10 seconds.
 
+reuse_port
+---------------
+By default all workers share the listening socket created by the arbiter and
+they all wake up when a new connection arrives. On Linux 3.9 or above the
+:ref:`reuse-port <setting-reuse_port>` setting let each worker bind its own
+listening socket to the same address, so that the kernel distributes new
+connections across workers::
+
+    python script.py --reuse-port
+
+graceful_timeout
+---------------------
+Sending the ``HUP`` signal to the arbiter, or the ``reload``
+:ref:`command <actor_commands>` to it, restarts the workers one at a time.
+Each new worker is spawned before an old one is stopped and the listening
+sockets are not closed. A stopping worker stops accepting connections and
+closes idle ones, while connections serving a request are given up to
+:ref:`graceful_timeout <setting-graceful_timeout>` seconds to finish::
+
+    python script.py --graceful-timeout 30
+
 .. _socket-server-ssl:
 
 TLS/SSL support
@@ -97,10 +118,13 @@ for:
 Check the :meth:`SocketServer.monitor_start` method for implementation details.
 '''
 import os
+from functools import partial
 
 import pulsar
-from pulsar import TcpServer, multi_async
-from pulsar.utils.internet import parse_address, SSLContext, WrapSocket
+from pulsar import TcpServer, multi_async, async_while
+from pulsar.async.stream import create_server_sockets, server_socket
+from pulsar.utils.internet import (parse_address, SSLContext, WrapSocket,
+                                   SO_REUSEPORT)
 from pulsar.utils.config import pass_through
 
 
@@ -134,6 +158,21 @@ class KeepAlive(SocketSetting):
         open."""
 
 
+class GracefulTimeout(SocketSetting):
+    name = "graceful_timeout"
+    flags = ["--graceful-timeout"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Seconds a stopping worker waits for connections serving a request.
+
+        When a worker stops it does not accept new connections and it closes
+        idle ones. Connections still serving a request are closed once
+        finished or after this timeout.
+        """
+
+
 class Backlog(SocketSetting):
     name = "backlog"
     flags = ["--backlog"]
@@ -151,6 +190,21 @@ class Backlog(SocketSetting):
         """
 
 
+class ReusePort(SocketSetting):
+    name = "reuse_port"
+    flags = ["--reuse-port"]
+    validator = pulsar.validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Each worker listens on its own socket bound with ``SO_REUSEPORT``.
+
+        The kernel distributes new connections across the workers rather
+        than waking all of them for each new connection on a shared socket.
+        Available on Linux 3.9 or above only, ignored elsewhere.
+        """
+
+
 class KeyFile(SocketSetting):
     name = "key_file"
     flags = ["--key-file"]
@@ -215,43 +269,96 @@ class SocketServer(pulsar.Application):
                 raise ValueError('key_file "%s" does not exist' % cfg.key_file)
             ssl = SSLContext(keyfile=cfg.key_file, certfile=cfg.cert_file)
         address = parse_address(self.cfg.address)
-        # First create the sockets
-        sockets = yield loop.start_serving(lambda: None, *address)
-        addresses = []
-        for sock in sockets:
-            assert loop.remove_reader(sock.fileno()), (
-                "Could not remove reader")
-            addresses.append(sock.getsockname())
-        monitor.params.sockets = [WrapSocket(s) for s in sockets]
+        if cfg.reuse_port and cfg.workers and SO_REUSEPORT is not None:
+            # Bind the address without listening. The sockets reserve the
+            # address while workers listen on their own SO_REUSEPORT sockets
+            sockets = yield create_server_sockets(loop, *address,
+                                                  reuse_port=True)
+            monitor.params.sockets = None
+            monitor.params.bind = [(s.family, s.getsockname())
+                                   for s in sockets]
+            monitor.reserved_sockets = sockets
+        else:
+            # First create the sockets
+            sockets = yield loop.start_serving(lambda: None, *address)
+            for sock in sockets:
+                assert loop.remove_reader(sock.fileno()), (
+                    "Could not remove reader")
+            monitor.params.sockets = [WrapSocket(s) for s in sockets]
         monitor.params.ssl = ssl
+        addresses = [sock.getsockname() for sock in sockets]
         self.addresses = addresses
         self.address = addresses[0]
 
     def worker_start(self, worker):
-        '''Start the worker by invoking the :meth:`create_server` method.'''
+        '''Start the worker by invoking the :meth:`create_server` method.
+
+        When the :ref:`reuse_port <setting-reuse_port>` setting is on, the
+        worker binds its own listening sockets.'''
         worker.servers[self.name] = servers = []
-        for sock in worker.params.sockets:
-            server = self.create_server(worker, sock.sock)
+        if worker.params.bind:
+            sockets = [server_socket(family, address, reuse_port=True)
+                       for family, address in worker.params.bind]
+        else:
+            sockets = [sock.sock for sock in worker.params.sockets]
+        for sock in sockets:
+            server = self.create_server(worker, sock)
             servers.append(server)
 
+    def monitor_stop(self, monitor):
+        for sock in getattr(monitor, 'reserved_sockets', None) or ():
+            sock.close()
+
     def worker_stopping(self, worker):
-        all = []
-        for server in worker.servers[self.name]:
-            all.append(server.close_connections())
-        return multi_async(all)
-
-    def on_info(self, worker, info=None):
-        server = worker.socket_server
-        info['socket'] = {'listen_on': server.address,
-                          'read_timeout': server.timeout,
-                          'active_connections': server.active_connections,
-                          'received_connections': server.received}
+        '''Stop the servers of ``worker`` and drain their connections.'''
+        return multi_async((self._drain(server)
+                            for server in worker.servers[self.name]))
+
+    def worker_info(self, worker, info=None):
+        '''Add the ``socket`` entry to the worker ``info`` dictionary.
+
+        The total number of concurrent connections is also added to the
+        ``actor`` entry as ``concurrent_requests``, the load indicator used
+        by the monitor :class:`pulsar.AutoScaler`.
+        '''
+        servers = worker.servers.get(self.name)
+        if servers:
+            sockets = []
+            concurrent = 0
+            for server in servers:
+                concurrent += server.concurrent_connections
+                sockets.append({
+                    'listen_on': server.address,
+                    'read_timeout': server.timeout,
+                    'concurrent_connections': server.concurrent_connections,
+                    'received_connections': server.received})
+            info['socket'] = sockets
+            actor = info['actor']
+            actor['concurrent_requests'] = (
+                actor.get('concurrent_requests', 0) + concurrent)
 
     #   INTERNALS
+    def _drain(self, server):
+        server.close()
+        if self.cfg.graceful_timeout:
+            yield async_while(self.cfg.graceful_timeout,
+                              server.close_idle_connections)
+        yield server.close_connections()
+
+    def _recycle(self, worker, server):
+        # A server which received max_requests connections has stopped
+        # serving. Ask the monitor to replace the worker.
+        if server.received >= server.max_connections and worker.is_running():
+            worker.logger.info('%s received %s connections. Restarting.',
+                               server, server.received)
+            worker.send('monitor', 'recycle')
 
     def create_server(self, worker, sock, ssl=None):
         '''Create the Server Protocol which will listen for requests. It
-uses the :meth:`protocol_consumer` method as the protocol consumer factory.'''
+uses the :meth:`protocol_consumer` method as the protocol consumer factory.
+
+:param ssl: optional SSL context, if not provided the ``ssl`` parameter of
+    ``worker`` is used.'''
         cfg = self.cfg
         server = TcpServer(worker.event_loop,
                            sock=sock,
@@ -264,5 +371,7 @@ uses the :meth:`protocol_consumer` method as the protocol consumer factory.'''
             callback = getattr(cfg, event)
             if callback != pass_through:
                 server.bind_event(event, callback)
-        server.start_serving(cfg.backlog, sslcontext=worker.params.ssl)
+        if cfg.max_requests and not worker.is_monitor():
+            server.bind_event('stop', partial(self._recycle, worker))
+        server.start_serving(cfg.backlog, sslcontext=ssl or worker.params.ssl)
         return server
@@ -74,6 +74,15 @@ standard :ref:`application settings <settings>`:
 
   Default: ``5``.
 
+* The :ref:`task_prefetch <setting-task_prefetch>` parameter control
+  the maximum number of tasks a worker retrieves from the task backend in
+  one request.
+
+  It can be specified in the command line via the
+  ``--task-prefetch ...`` option.
+
+  Default: ``1``.
+
 .. _app-taskqueue-app:
 
 Task queue application
@@ -86,7 +95,6 @@ Task queue application
 
 .. _celery: http://celeryproject.org/
 '''
-from datetime import datetime
 
 import pulsar
 from pulsar import command
@@ -126,6 +134,52 @@ class ConcurrentTasks(TaskSetting):
         """
 
 
+class TaskPrefetch(TaskSetting):
+    name = "task_prefetch"
+    flags = ["--task-prefetch"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 1
+    desc = """\
+        The maximum number of tasks a worker retrieves in one request.
+
+        Retrieving several tasks at once reduces the number of requests to
+        the task backend when tasks are short. Tasks retrieved but not yet
+        executed are never more than the concurrent_tasks setting, and
+        they are put back into the task queue when the worker stops.
+        """
+
+
+class TaskProcesses(TaskSetting):
+    name = "task_processes"
+    flags = ["--task-processes"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Number of subprocesses running jobs in ``process`` execution mode.
+
+        Each worker owns a pool of subprocesses for executing the tasks of
+        jobs with ``execution`` set to ``process``. If 0, the number of
+        CPUs is used. The pool is not created when no such job is
+        registered.
+        """
+
+
+class TaskProcessMaxJobs(TaskSetting):
+    name = "task_process_max_jobs"
+    flags = ["--task-process-max-jobs"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Number of jobs a task subprocess executes before being replaced.
+
+        Useful to limit the damage of jobs leaking memory. If 0, task
+        subprocesses are never replaced.
+        """
+
+
 class TaskBackendConnection(TaskSetting):
     name = "task_backend"
     flags = ["--task-backend"]
@@ -196,22 +250,21 @@ task.Tasks and managing scheduling of tasks via a
             task_paths=self.cfg.task_paths,
             schedule_periodic=self.cfg.schedule_periodic,
             max_tasks=self.cfg.max_requests,
-            backlog=self.cfg.concurrent_tasks)
+            backlog=self.cfg.concurrent_tasks,
+            prefetch=self.cfg.task_prefetch,
+            processes=self.cfg.task_processes,
+            process_max_jobs=self.cfg.task_process_max_jobs)
+        self.backend.schedule(monitor.event_loop)
 
-    def monitor_task(self, monitor):
-        '''Override the :meth:`pulsar.apps.Application.monitor_task` callback.
-
-        Check if the :attr:`scheduler` needs to perform a new run.
-        '''
-        if self.backend and monitor.is_running():
-            if self.backend.next_run <= datetime.now():
-                self.backend.tick()
+    def monitor_stopping(self, monitor):
+        if self.backend:
+            self.backend.unschedule()
 
     def worker_start(self, worker):
         self.backend.start(worker)
 
     def worker_stopping(self, worker):
-        self.backend.close(worker)
+        return self.backend.close(worker)
 
     def actorparams(self, monitor, params):
         params['app'].cfg.set('schedule_periodic', False)
@@ -219,9 +272,22 @@ task.Tasks and managing scheduling of tasks via a
     def worker_info(self, worker, info=None):
         be = self.backend
         tasks = {'concurrent': list(be.concurrent_tasks),
-                 'processed': be.processed}
+                 'processed': be.processed,
+                 'prefetched': len(be.prefetched),
+                 'queued': dict(be.queued)}
+        if be.process_pool:
+            tasks['process_pool'] = be.process_pool.info()
+        if worker.is_monitor():
+            store = be.store_info(worker)
+            if store:
+                tasks['store'] = store
         info['tasks'] = tasks
 
+    def monitor_info(self, monitor, info=None):
+        store = self.backend.store_info(monitor) if self.backend else None
+        if store:
+            info['tasks'] = {'store': store}
+
 
 @command()
 def next_scheduled(request, jobnames=None):
@@ -32,6 +32,17 @@ be implemented:
   a bunch of :class:`Task`.
 * The :meth:`TaskBackend.flush` method, invoked flushing a backend (remove
   all tasks and clear the task queue).
+* The :meth:`TaskBackend.queue_depths` method, invoked when retrieving the
+  number of queued tasks for each :ref:`priority <job-priority>`.
+
+Backends which can store and queue several tasks in a single request to
+their server should also override :meth:`TaskBackend.put_tasks`, used by
+:meth:`TaskBackend.run_jobs` to submit tasks in bulk.
+
+Queued tasks are retrieved by :attr:`Task.priority`, higher priority first,
+and in FIFO order within the same priority. When the :attr:`TaskBackend.aging`
+parameter is set, the priority of a queued task increases with the time it
+spends in the queue (check the :func:`aged_priority` function).
 
 .. _task-state:
 
@@ -74,6 +85,16 @@ The pubsub handler is constructed using the same
 :attr:`pulsar.apps.Backend.connection_string` and
 :attr:`pulsar.apps.Backend.name` as the the :class:`TaskBackend`.
 
+The ``task_done`` message is a JSON object with the ``id`` and final
+``status`` of the task. When the encoded message does not exceed
+:attr:`TaskBackend.done_message_size` bytes, the message also contains the
+whole task, including its result, pickled and base64 encoded under the
+``task`` key, so that waiting processes receive the same types as when
+retrieving the task from the backend server. Processes waiting for the task via
+:meth:`TaskBackend.wait_for_task` fire their callback without a further
+request to the backend server, unless the task is not in the message.
+Processes which are not waiting for the task ignore the message.
+
 API
 =========
 
@@ -101,6 +122,11 @@ TaskConsumer
    :members:
    :member-order: bysource
 
+Aged priority
+~~~~~~~~~~~~~~~~~~~
+
+.. autofunction:: aged_priority
+
 Scheduler Entry
 ~~~~~~~~~~~~~~~~~~~
 
@@ -123,20 +149,28 @@ Redis Backend
 .. _redis: http://redis.io/
 '''
 import sys
+import time
+import json
 import logging
+from base64 import b64encode, b64decode
+from collections import deque
+from heapq import heapify, heappop, heapreplace
 from datetime import datetime, timedelta
 from threading import Lock
 
-from pulsar import (maybe_async, EMPTY_TUPLE, EMPTY_DICT, Failure,
-                    PulsarException, Backend, Deferred, coroutine_return)
-from pulsar.utils.pep import itervalues
+from pulsar import (maybe_async, multi_async, EMPTY_TUPLE, EMPTY_DICT,
+                    Failure, PulsarException, Backend, Deferred,
+                    coroutine_return)
+from pulsar.utils.pep import itervalues, pickle, native_str
 from pulsar.apps.tasks.models import JobRegistry
 from pulsar.apps.tasks import states, create_task_id
+from pulsar.apps.tasks.process import (ProcessPool, ProcessTimeout,
+                                       can_fork)
 from pulsar.apps import pubsub
 from pulsar.utils.log import local_property
 
 __all__ = ['Task', 'Backend', 'TaskBackend', 'TaskNotAvailable',
-           'nice_task_message', 'LOGGER']
+           'nice_task_message', 'aged_priority', 'LOGGER']
 
 LOGGER = logging.getLogger('pulsar.tasks')
 
@@ -159,6 +193,17 @@ def get_datetime(expiry, start):
         return datetime.fromtimestamp(expiry)
 
 
+def aged_priority(priority, queued, now, aging):
+    '''The priority of a task with ``priority`` queued at ``queued`` time.
+
+    When ``aging`` is a positive number, the priority is increased by one
+    level for every ``aging`` seconds the task has waited in the queue.
+    '''
+    if aging:
+        return priority + (now - queued)/aging
+    return priority
+
+
 def format_time(dt):
     return dt.isoformat() if dt else '?'
 
@@ -256,12 +301,17 @@ class Task(object):
     Optional :attr:`Task.id` for the :class:`Task` which queued
     this :class:`Task`. This is a usuful for monitoring the creation
     of tasks within other tasks.
+
+.. attribute:: priority
+
+    The priority of this :class:`Task`. By default it is given by the
+    :attr:`pulsar.apps.tasks.models.Job.priority` attribute.
 '''
     stack_trace = None
 
     def __init__(self, id, overlap_id='', name=None, time_executed=None,
                  expiry=None, args=None, kwargs=None, status=None,
-                 from_task=None, result=None, **params):
+                 from_task=None, result=None, priority=None, **params):
         self.id = id
         self.overlap_id = overlap_id
         self.name = name
@@ -274,6 +324,7 @@ class Task(object):
         self.kwargs = kwargs
         self.status = status
         self.result = result
+        self.priority = 1 if priority is None else int(priority)
         self.params = params
 
     def __repr__(self):
@@ -309,6 +360,14 @@ Lower number higher precedence.'''
         '''Convert the task instance into a JSON-serializable dictionary.'''
         return self.__dict__.copy()
 
+    @classmethod
+    def fromjson(cls, data):
+        '''Create a :class:`Task` from a dictionary obtained via
+:meth:`tojson`.'''
+        task = cls(data['id'])
+        task.__dict__.update(data)
+        return task
+
 
 class PubSubClient(pubsub.Client):
 
@@ -364,6 +423,54 @@ It also schedules the run of periodic tasks if enabled to do so.
 
     Default: ``2``.
 
+.. attribute:: prefetch
+
+    The maximum number of tasks a worker retrieves from the task queue in one
+    request via the :meth:`get_tasks_batch` method. Tasks which cannot
+    be executed straight away, because :attr:`backlog` tasks are already
+    running, are kept in the :attr:`prefetched` buffer.
+    Passed by the task-queue application
+    :ref:`task prefetch setting <setting-task_prefetch>`.
+
+    Default: ``1``.
+
+.. attribute:: processes
+
+    Number of subprocesses in the :attr:`process_pool`. Passed by the
+    task-queue application
+    :ref:`task processes setting <setting-task_processes>`.
+
+    Default: ``0``, the number of CPUs.
+
+.. attribute:: process_max_jobs
+
+    Number of jobs a subprocess of the :attr:`process_pool` executes before
+    being replaced. Passed by the task-queue application
+    :ref:`task process max jobs setting <setting-task_process_max_jobs>`.
+
+    Default: ``0``, never replaced.
+
+.. attribute:: aging
+
+    Number of seconds after which a queued task gains one priority level.
+    It avoids starvation of tasks with low priority and it can be
+    specified via the backend connection string::
+
+        local://?aging=30
+
+    Default: ``0``, no aging, tasks are retrieved strictly by priority.
+
+.. attribute:: done_message_size
+
+    Maximum size in bytes of a ``task_done`` message carrying the whole
+    task, check :ref:`task status broadcasting <tasks-pubsub>`. Larger
+    tasks are retrieved from the backend server by processes waiting for
+    them. It can be specified via the backend connection string::
+
+        local://?done_message_size=1024
+
+    Default: ``4096``. ``0`` for messages carrying the task status only.
+
 .. attribute:: processed
 
     The number of tasks processed (so far) by the worker running this backend.
@@ -371,11 +478,20 @@ It also schedules the run of periodic tasks if enabled to do so.
 
 '''
     def setup(self, task_paths=None, schedule_periodic=False, backlog=1,
-              max_tasks=0, poll_timeout=None, **params):
+              max_tasks=0, poll_timeout=None, aging=None, prefetch=1,
+              processes=0, process_max_jobs=0, done_message_size=None,
+              **params):
         self.task_paths = task_paths
         self.backlog = backlog
+        self.prefetch = max(int(prefetch or 1), 1)
+        self.processes = max(int(processes or 0), 0)
+        self.process_max_jobs = max(int(process_max_jobs or 0), 0)
         self.max_tasks = max_tasks
         self.poll_timeout = max(poll_timeout or 0, 2)
+        self.aging = max(float(aging or 0), 0)
+        if done_message_size is None:
+            done_message_size = 4096
+        self.done_message_size = max(int(done_message_size), 0)
         self.processed = 0
         self.local.schedule_periodic = schedule_periodic
         self.next_run = datetime.now()
@@ -402,8 +518,11 @@ and listen tasks execution status. There are three channels:
 * ``<name>_task_start`` published when the task queue starts executing a task.
 * ``<name>_task_done`` published when a task is done.
 
-All three messages are composed by the task id only. Here ``<name>`` is
-replaced by the :attr:`pulsar.Backend.name` attribute of this task backend.
+All three messages are composed by the task id only, with the exception of
+tasks created in bulk via :meth:`run_jobs` for which one ``task_created``
+message only is published, with the comma separated ids of all tasks created.
+Here ``<name>`` is replaced by the :attr:`pulsar.Backend.name` attribute of
+this task backend.
 
 Check the :ref:`task broadcasting documentation <tasks-pubsub>` for more
 information.
@@ -427,10 +546,46 @@ information.
         '''The number of :attr:`concurrent_tasks`.'''
         return len(self.concurrent_tasks)
 
+    @local_property
+    def prefetched(self):
+        '''A ``deque`` of :class:`Task` retrieved from the task queue but
+        not yet executed by the worker running this :class:`TaskBackend`.
+
+        Its size is never larger than :attr:`backlog`.'''
+        return deque()
+
+    @property
+    def process_pool(self):
+        '''The :class:`pulsar.apps.tasks.process.ProcessPool` executing
+        jobs in ``process`` :ref:`execution mode <job-execution>`.
+
+        Available in task queue workers only when such jobs are registered.'''
+        return self.local.process_pool
+
+    @local_property
+    def queued(self):
+        '''Dictionary of the number of queued tasks for each priority.
+
+        Updated by the worker running this :class:`TaskBackend` while polling
+        for new tasks.'''
+        return {}
+
     @local_property
     def entries(self):
         return self._setup_schedule()
 
+    @local_property
+    def scheduled(self):
+        '''A min-heap of ``(next_run_at, name)`` pairs for the
+        :class:`SchedulerEntry` in :attr:`entries`.
+
+        The top pair is replaced every time its entry runs, so that
+        a :meth:`tick` costs ``O(log n)`` for each job run.'''
+        heap = [(entry.next_run_at, entry.name) for entry in
+                itervalues(self.entries)] if self.entries else []
+        heapify(heap)
+        return heap
+
     @local_property
     def registry(self):
         '''The :class:`pulsar.apps.tasks.models.JobRegistry` for this
@@ -459,27 +614,100 @@ a ``TaskNotAvailable`` exception occurs.
 :parameter tkwargs: optional dictionary used for the key-valued arguments
     in the task callable.
 :parameter meta_params: Additional parameters to be passed to the :class:`Task`
-    constructor (not its callable function).
+    constructor (not its callable function). For example, the ``priority``
+    parameter overrides the :attr:`pulsar.apps.tasks.models.Job.priority`
+    of the :class:`Task` created.
 :return: a :class:`pulsar.Deferred` resulting in a :attr:`Task.id`
     on success.'''
         c = self.create_task(jobname, targs, tkwargs, **meta_params)
         return maybe_async(c, get_result=False).add_callback(self.put_task)
 
+    def run_jobs(self, job_specs):
+        '''Create and queue several :ref:`tasks <apps-taskqueue-task>` with
+one request to the backend server. Tasks are stored and queued via
+:meth:`put_tasks` and a single ``task_created`` message is published for
+all of them.
+
+:parameter job_specs: an iterable over dictionaries with the ``jobname``
+    key and the optional ``args`` and ``kwargs`` keys, the positional and
+    key-valued arguments of the task callable. Any other key is a
+    :class:`Task` meta parameter as in :meth:`run_job`.
+:return: a :class:`pulsar.Deferred` resulting in the list of
+    :attr:`Task.id`, in the same order as ``job_specs``. The id is ``None``
+    for tasks which were not created because of an overlapping task.
+
+All ``jobname`` are validated before any task is created. If one of them
+is not a valid :attr:`pulsar.apps.tasks.models.Job.name`, a
+``TaskNotAvailable`` exception occurs and no task is created.'''
+        registry = self.registry
+        specs = []
+        for spec in job_specs:
+            params = dict(spec)
+            jobname = params.pop('jobname', None)
+            if jobname not in registry:
+                raise TaskNotAvailable(jobname)
+            job = registry[jobname]
+            targs = tuple(params.pop('args', None) or EMPTY_TUPLE)
+            tkwargs = params.pop('kwargs', None) or EMPTY_DICT
+            task_id, overlap_id = job.generate_task_ids(targs, tkwargs)
+            specs.append((job, task_id, overlap_id, targs, tkwargs, params))
+        return maybe_async(self._run_jobs(specs), get_result=False)
+
+    def _run_jobs(self, specs):
+        pubsub = self.pubsub
+        overlap_ids = set((s[2] for s in specs if s[2]))
+        running = set()
+        if overlap_ids:
+            tasks = yield self.get_tasks(overlap_id=list(overlap_ids))
+            done = []
+            for task in tasks:
+                if task.done():
+                    done.append(self.save_task(task.id, overlap_id=''))
+                else:
+                    running.add(task.overlap_id)
+            if done:
+                yield multi_async(done)
+        ids = []
+        tasks = []
+        time_executed = datetime.now()
+        for job, task_id, overlap_id, targs, tkwargs, params in specs:
+            if overlap_id:
+                if overlap_id in running:
+                    LOGGER.debug('Task %s (%s) cannot run.', job.name,
+                                 overlap_id)
+                    ids.append(None)
+                    continue
+                running.add(overlap_id)
+            params = self._task_params(job, overlap_id, targs, tkwargs,
+                                       time_executed, status=states.QUEUED,
+                                       **params)
+            params['id'] = task_id
+            tasks.append(params)
+            ids.append(task_id)
+        if tasks:
+            LOGGER.debug('Queue %s new tasks.', len(tasks))
+            yield self.put_tasks(tasks)
+            pubsub.publish(self.channel('task_created'),
+                           ','.join((t['id'] for t in tasks)))
+        yield ids
+
     def wait_for_task(self, task_id, timeout=None):
         '''Asynchronously wait for a task with ``task_id`` to have finished
 its execution. It returns a :class:`pulsar.Deferred`.'''
         # make sure we are subscribed to the task_done channel
         def _():
             self.pubsub
+            # register the callback before retrieving the task so that
+            # a task_done message arriving meanwhile is not missed
+            when_done = self.get_callback(task_id)
             task = yield self.get_task(task_id)
-            if task:
-                if task.done():  # task done, simply return it
-                    when_done = self.pop_callback(task.id)
-                    if when_done:
-                        when_done.callback(task)
-                    yield task
-                else:
-                    yield self.get_callback(task_id)
+            if not task or task.done():  # task done, simply return it
+                when_done = self.pop_callback(task_id)
+                if when_done and task:
+                    when_done.callback(task)
+                yield task
+            else:
+                yield when_done
         return maybe_async(_(), timeout=timeout, get_result=False)
 
     ########################################################################
@@ -490,7 +718,24 @@ its execution. It returns a :class:`pulsar.Deferred`.'''
 
         Here, the ``worker`` creates its thread pool via
         :meth:`pulsar.Actor.create_thread_pool` and register the
-        :meth:`may_pool_task` callback in its event loop.'''
+        :meth:`may_pool_task` callback in its event loop. If jobs in
+        ``process`` :ref:`execution mode <job-execution>` are registered,
+        the :attr:`process_pool` is created first, before any thread is
+        started. Workers which are not processes, with ``thread``
+        concurrency, run these jobs on threads since they cannot fork
+        safely.'''
+        jobs = [name for name, job in self.registry.items()
+                if job.execution == 'process']
+        if jobs:
+            if can_fork and worker.is_process():
+                self.local.process_pool = ProcessPool(self.registry,
+                                                      self.processes,
+                                                      self.process_max_jobs)
+                worker.logger.debug('started %s task processes',
+                                    self.local.process_pool.processes)
+            else:
+                worker.logger.warning('Cannot fork processes, %s jobs run '
+                                      'on threads', ', '.join(jobs))
         worker.create_thread_pool()
         self.local.task_poller = worker.event_loop.call_soon(
             self.may_pool_task, worker)
@@ -502,6 +747,29 @@ its execution. It returns a :class:`pulsar.Deferred`.'''
         if self.local.task_poller:
             self.local.task_poller.cancel()
             worker.logger.debug('stopped polling tasks')
+        if self.local.process_pool:
+            self.local.process_pool.close()
+            self.local.process_pool = None
+            worker.logger.debug('stopped task processes')
+        return self._requeue_prefetched(worker)
+
+    def schedule(self, event_loop):
+        '''Start scheduling periodic tasks in ``event_loop``.
+
+        Invoked by the task queue monitor when :attr:`schedule_periodic`
+        is ``True``. One timer only is armed in ``event_loop``, it runs
+        a :meth:`tick` when the earliest :class:`SchedulerEntry` is due.'''
+        if self.schedule_periodic:
+            self.local.scheduler_loop = event_loop
+            self._arm_scheduler()
+
+    def unschedule(self):
+        '''Stop scheduling periodic tasks.'''
+        timer = self.local.scheduler_timer
+        self.local.scheduler_loop = None
+        self.local.scheduler_timer = None
+        if timer:
+            timer.cancel()
 
     ########################################################################
     ##    ABSTRACT METHODS
@@ -516,8 +784,43 @@ its execution. It returns a :class:`pulsar.Deferred`.'''
 **Must be implemented by subclasses.**'''
         raise NotImplementedError
 
+    def put_tasks(self, tasks):
+        '''Store and queue several new tasks.
+
+:parameter tasks: a list of dictionaries of :class:`Task` parameters, each
+    one containing the ``id`` of the task.
+:return: an :ref:`asynchronous component <tutorial-coroutine>` which results
+    in the list of task ids added.
+
+By default it invokes :meth:`save_task` and :meth:`put_task` for each task.
+Subclasses should override it to store and queue all tasks in a single
+request.'''
+        ids = []
+        for params in tasks:
+            params = dict(params)
+            task_id = yield self.save_task(params.pop('id'), **params)
+            task_id = yield self.put_task(task_id)
+            ids.append(task_id)
+        yield ids
+
     def num_tasks(self):
         '''Retrieve the number of tasks in the task queue.'''
+        depths = yield self.queue_depths()
+        yield sum(itervalues(depths))
+
+    def store_info(self, monitor):
+        '''Dictionary of information about the tasks stored in the
+:class:`pulsar.Monitor` of the task queue application, for backends which
+store tasks there. By default it returns ``None``.'''
+        return None
+
+    def queue_depths(self):
+        '''Retrieve the number of queued tasks for each priority.
+
+:return: an :ref:`asynchronous component <tutorial-coroutine>` which results
+    in a dictionary mapping priorities to the number of tasks queued.
+
+**Must be implemented by subclasses.**'''
         raise NotImplementedError
 
     def get_task(self, task_id=None, when_done=False):
@@ -532,6 +835,20 @@ by subclasses.
 '''
         raise NotImplementedError
 
+    def get_tasks_batch(self, size):
+        '''Retrieve up to ``size`` queued :class:`Task` from the task queue.
+
+It waits for the first task up to :attr:`poll_timeout` seconds and
+returns the other tasks only if immediately available.
+
+:return: an :ref:`asynchronous component <tutorial-coroutine>` which results
+    in a list of :class:`Task`.
+
+By default it retrieves one task at most via :meth:`get_task`. Subclasses
+should override it to retrieve several tasks in a single request.'''
+        task = yield self.get_task()
+        yield [task] if task else []
+
     def get_tasks(self, **filters):
         '''Retrieve a group of :class:`Task` from the backend.
 
@@ -565,27 +882,29 @@ parameters ``params``.
 method only works when :attr:`schedule_periodic` is ``True`` and
 the arbiter context.
 
-Executes all due tasks and calculate the time in seconds to wait before
-running a new :meth:`tick`. For testing purposes a :class:`datetime.datetime`
-value ``now`` can be passed.'''
+Executes all due tasks, popping them from the :attr:`scheduled` heap, and
+sets :attr:`next_run` to the time of the earliest entry still scheduled.
+For testing purposes a :class:`datetime.datetime` value ``now`` can be
+passed.'''
         if not self.schedule_periodic:
             return
-        remaining_times = []
+        now = now or datetime.now()
+        entries = self.entries
         try:
-            for entry in itervalues(self.entries):
-                is_due, next_time_to_run = entry.is_due(now=now)
-                if is_due:
-                    self.run_job(entry.name)
-                if next_time_to_run:
-                    remaining_times.append(next_time_to_run)
+            while True:
+                top = self._scheduled_top()
+                if not top or top[0] > now:
+                    break
+                entry = entries[top[1]]
+                entry.next(now)
+                heapreplace(self.scheduled, (entry.next_run_at, entry.name))
+                self.run_job(entry.name)
         except Exception:
             LOGGER.exception('Unhandled error in task backend')
-        self.next_run = now or datetime.now()
-        if remaining_times:
-            self.next_run += timedelta(seconds=min(remaining_times))
+        self._arm_scheduler()
 
     def create_task(self, jobname, targs=None, tkwargs=None, expiry=None,
-                    **params):
+                    priority=None, **params):
         '''Create a new :class:`Task` from ``jobname``, positional arguments
 ``targs``, key-valued arguments ``tkwargs`` and :class:`Task` meta parameters
 ``params``. This method can be called by any process domain.
@@ -593,6 +912,8 @@ value ``now`` can be passed.'''
 :param jobname: the name of the :class:`Job` which create the task.
 :param targs: task positional arguments (a ``tuple`` or ``None``).
 :param tkwargs: task key-valued arguments (a ``dict`` or ``None``).
+:param priority: optional task priority, if not provided the
+    :attr:`Job.priority` is used.
 :return: a :ref:`coroutine <coroutine>` resulting in a :attr:`Task.id`
     or ``None`` if no task was created.
 '''
@@ -616,24 +937,30 @@ value ``now`` can be passed.'''
                 LOGGER.debug('Task %s cannot run.', task)
                 yield None
             else:
-                if self.entries and job.name in self.entries:
-                    self.entries[job.name].next()
-                time_executed = datetime.now()
-                if expiry is not None:
-                    expiry = get_datetime(expiry, time_executed)
-                elif job.timeout:
-                    expiry = get_datetime(job.timeout, time_executed)
+                params = self._task_params(job, overlap_id, targs, tkwargs,
+                                           datetime.now(), expiry, priority,
+                                           **params)
                 LOGGER.debug('Queue new task %s (%s).', job.name, task_id)
-                yield self.save_task(task_id, overlap_id=overlap_id,
-                                     name=job.name,
-                                     time_executed=time_executed,
-                                     expiry=expiry, args=targs,
-                                     kwargs=tkwargs,
-                                     status=states.PENDING, **params)
+                yield self.save_task(task_id, **params)
                 pubsub.publish(self.channel('task_created'), task_id)
         else:
             raise TaskNotAvailable(jobname)
 
+    def _task_params(self, job, overlap_id, targs, tkwargs, time_executed,
+                     expiry=None, priority=None, status=states.PENDING,
+                     **params):
+        # The parameters of a new task
+        if expiry is not None:
+            expiry = get_datetime(expiry, time_executed)
+        elif job.timeout:
+            expiry = get_datetime(job.timeout, time_executed)
+        if priority is None:
+            priority = job.priority
+        params.update(overlap_id=overlap_id, name=job.name,
+                      time_executed=time_executed, expiry=expiry, args=targs,
+                      kwargs=tkwargs, priority=int(priority), status=status)
+        return params
+
     def job_list(self, jobnames=None):
         registry = self.registry
         jobnames = jobnames or registry
@@ -664,32 +991,21 @@ value ``now`` can be passed.'''
             return
         if jobnames:
             entries = (self.entries.get(name, None) for name in jobnames)
+            runs = [(e.next_run_at, e.name) for e in entries if e]
+            top = min(runs) if runs else None
         else:
-            entries = itervalues(self.entries)
-        next_entry = None
-        next_time = None
-        for entry in entries:
-            if entry is None:
-                continue
-            is_due, next_time_to_run = entry.is_due()
-            if is_due:
-                next_time = 0
-                next_entry = entry
-                break
-            elif next_time_to_run is not None:
-                if next_time is None or next_time_to_run < next_time:
-                    next_time = next_time_to_run
-                    next_entry = entry
-        if next_entry:
-            return (next_entry.name, max(next_time, 0))
+            top = self._scheduled_top()
+        if top:
+            return (top[1], timedelta_seconds(top[0] - datetime.now()))
         else:
             return (jobnames, None)
 
     def may_pool_task(self, worker):
         '''Called in the ``worker`` event loop.
 
-        It pools a new task if possible, and add it to the queue of
-        tasks consumed by the ``worker`` CPU-bound thread.'''
+        It pools new tasks if possible, up to :attr:`prefetch` at once, and
+        add them to the queue of tasks consumed by the ``worker`` CPU-bound
+        thread.'''
         next_time = 0
         if worker.is_running():
             thread_pool = worker.thread_pool
@@ -699,30 +1015,74 @@ value ``now`` can be passed.'''
                 if self.max_tasks and self.processed >= self.max_tasks:
                     if not self.num_concurrent_tasks:
                         worker.logger.warning(
-                            'Processed %s tasks. Restarting.')
-                        worker.stop()
+                            'Processed %s tasks. Restarting.', self.processed)
+                        if worker.is_monitor():
+                            worker.stop()
+                        else:
+                            # the replacement is spawned before stopping
+                            worker.send('monitor', 'recycle')
                         coroutine_return()
                 else:
-                    task = yield self.get_task()
-                    if task:    # Got a new task
+                    prefetched = self.prefetched
+                    if not prefetched:
+                        self._update_queued()
+                        size = min(self.prefetch, self.backlog)
+                        if self.max_tasks:
+                            size = min(size, self.max_tasks - self.processed)
+                        tasks = yield self.get_tasks_batch(size)
+                        prefetched.extend(tasks)
+                        if not worker.is_running():
+                            yield self._requeue_prefetched(worker)
+                            coroutine_return()
+                    while (prefetched and
+                           self.num_concurrent_tasks < self.backlog):
+                        task = prefetched.popleft()
                         self.processed += 1
                         self.concurrent_tasks.add(task.id)
-                        thread_pool.apply(self._execute_task, worker, task)
+                        job = self.registry.get(task.name)
+                        if job and job.execution == 'loop':
+                            maybe_async(self._execute_task(worker, task),
+                                        event_loop=worker.event_loop)
+                        else:
+                            thread_pool.apply(self._execute_task, worker,
+                                              task)
             else:
                 worker.logger.info('%s concurrent requests. Cannot poll.',
                                    self.num_concurrent_tasks)
                 next_time = 1
         worker.event_loop.call_later(next_time, self.may_pool_task, worker)
 
+    def _requeue_prefetched(self, worker):
+        # Put prefetched tasks which were not executed back into the queue
+        prefetched = self.local.prefetched
+        if prefetched:
+            worker.logger.info('Put %s prefetched tasks back into the queue',
+                               len(prefetched))
+            tasks = [self.put_task(task.id) for task in prefetched]
+            prefetched.clear()
+            return multi_async(tasks)
+
+    def _update_queued(self):
+        # Refresh the queue depths at most once a second
+        now = time.time()
+        if now - (self.local.queued_time or 0) >= 1:
+            self.local.queued_time = now
+            depths = maybe_async(self.queue_depths(), get_result=False)
+            depths.add_callback(self._set_queued)
+
+    def _set_queued(self, depths):
+        self.local.queued = depths
+
     def _execute_task(self, worker, task):
         #Asynchronous execution of a Task. This method is called
-        #on a separate thread of execution from the worker event loop thread.
+        #on a separate thread of execution from the worker event loop thread,
+        #unless the job execution mode is loop.
         pubsub = self.pubsub
         task_id = task.id
         result = None
         status = None
         consumer = None
-        time_ended = datetime.now()
+        time_started = time_ended = datetime.now()
         try:
             job = self.registry.get(task.name)
             consumer = TaskConsumer(self, worker, task_id, job)
@@ -735,13 +1095,20 @@ value ``now`` can be passed.'''
                 else:
                     worker.logger.info('starting task %s', task)
                     yield self.save_task(task_id, status=states.STARTED,
-                                         time_started=time_ended)
+                                         time_started=time_started)
                     pubsub.publish(self.channel('task_start'), task_id)
-                    result = yield job(consumer, *task.args, **task.kwargs)
+                    process_pool = self.process_pool
+                    if process_pool and job.execution == 'process':
+                        result = process_pool.apply(task_id, job.name,
+                                                    task.args, task.kwargs,
+                                                    job.process_timeout)
+                    else:
+                        result = yield job(consumer, *task.args,
+                                           **task.kwargs)
                     time_ended = datetime.now()
             else:
                 consumer = None
-        except TaskTimeout:
+        except (TaskTimeout, ProcessTimeout):
             worker.logger.info('Task %s timed-out', task)
             status = states.REVOKED
         except Exception:
@@ -757,10 +1124,40 @@ value ``now`` can be passed.'''
                                  status=status, result=result)
             worker.logger.info('Finished task %s', task)
             # PUBLISH task_done
-            pubsub.publish(self.channel('task_done'), task.id)
+            pubsub.publish(self.channel('task_done'),
+                           self._task_done_message(
+                               task, status=status, result=result,
+                               time_started=time_started,
+                               time_ended=time_ended))
         self.concurrent_tasks.discard(task.id)
         yield task_id
 
+    def _scheduled_top(self):
+        # The earliest valid pair in the scheduled heap
+        heap = self.scheduled
+        entries = self.entries
+        while heap:
+            next_run_at, name = heap[0]
+            if entries[name].next_run_at == next_run_at:
+                return heap[0]
+            heappop(heap)
+
+    def _arm_scheduler(self):
+        # Arm the timer for the earliest scheduled entry
+        top = self._scheduled_top()
+        self.next_run = top[0] if top else None
+        loop = self.local.scheduler_loop
+        if loop:
+            timer = self.local.scheduler_timer
+            if timer:
+                timer.cancel()
+            if top:
+                when = loop.timer() + timedelta_seconds(top[0] -
+                                                        datetime.now())
+                self.local.scheduler_timer = loop.call_at(when, self.tick)
+            else:
+                self.local.scheduler_timer = None
+
     def _setup_schedule(self):
         if not self.local.schedule_periodic:
             return ()
@@ -779,20 +1176,48 @@ value ``now`` can be passed.'''
             raise ValueError('Schedule %s is not a timedelta' % s)
         return Schedule(s, anchor)
 
-    def task_done_callback(self, task_id):
-        '''Got a task_id from the ``<name>_task_done`` channel.
+    def task_done_callback(self, message):
+        '''Got a ``message`` from the ``<name>_task_done`` channel.
 
 Check if a ``callback`` is available in the :attr:`callbacks` dictionary. If
-so fire the callback with the ``task`` instance corresponsding to the input
-``task_id``.
+so fire the callback with the ``task`` instance carried by the message or,
+when the message carries the task status only, retrieved from the backend.
+
+If a callback is not available, the message is ignored.'''
+        data = json.loads(message)
+        with self.lock:
+            if data['id'] not in self.callbacks:
+                return
+        if 'task' in data:
+            task = pickle.loads(b64decode(data['task']))
+            self._fire_callback(Task.fromjson(task))
+        else:
+            task = maybe_async(self.get_task(data['id']), get_result=False)
+            return task.add_callback(self._fire_callback)
 
-If a callback is not available, it must have been fired already.'''
-        task = yield self.get_task(task_id)
+    def _fire_callback(self, task):
         if task:
             when_done = self.pop_callback(task.id)
             if when_done:
                 when_done.callback(task)
 
+    def _task_done_message(self, task, **params):
+        # The JSON message published in the task_done channel. The task is
+        # pickled so that its result keeps its types
+        data = task.tojson()
+        data.update(params)
+        message = {'id': task.id, 'status': data['status']}
+        if self.done_message_size:
+            try:
+                pickled = native_str(b64encode(pickle.dumps(data, 2)))
+            except Exception:
+                pickled = None
+            if pickled:
+                encoded = json.dumps(dict(message, task=pickled))
+                if len(encoded) <= self.done_message_size:
+                    return encoded
+        return json.dumps(message)
+
     def pop_callback(self, task_id):
         with self.lock:
             return self.callbacks.pop(task_id, None)
@@ -884,12 +1309,16 @@ class SchedulerEntry(object):
     def anchor(self):
         return self.schedule.anchor
 
+    @property
+    def next_run_at(self):
+        '''The date-time when this entry is due to run next.'''
+        return self.scheduled_last_run_at + self.run_every
+
     def next(self, now=None):
         """Returns a new instance of the same class, but with
         its date and count fields updated. Function called by
         :class:`Backend` when the ``this`` is due to run.
         """
-        now = now or datetime.now()
         self.last_run_at = now or datetime.now()
         self.total_run_count += 1
         return self
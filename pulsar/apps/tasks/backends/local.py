@@ -1,21 +1,58 @@
 '''
 The local task backend store tasks in pulsar process domain and therefore
 is accessed only from one running task queue.
+
+Queued task ids are stored in a :class:`PriorityQueue`.
+
+Tasks are indexed by ``overlap_id``, ``status`` and ``name`` so that
+:meth:`pulsar.apps.tasks.backends.TaskBackend.get_tasks` filtering on these
+fields does not scan all tasks. Tasks in a
+:ref:`ready state <task-state>` can be evicted, together with their result,
+via two parameters of the connection string::
+
+    local://?result_ttl=3600&max_results=100000
+
+* ``result_ttl`` number of seconds a ready task is kept. Default ``0``,
+  no time limit.
+* ``max_results`` maximum number of ready tasks kept, the oldest are
+  evicted first. Default ``0``, no limit.
+
+The number of evicted tasks is available in the task queue monitor info.
 '''
+import time
+from collections import deque
+
 from pulsar import send, command, Queue, Empty, coroutine_return
-from pulsar.utils.pep import itervalues
+from pulsar.utils.structures import OrderedDict
 from pulsar.apps.tasks import backends, states
 from pulsar.apps.pubsub import PubSub
 
 
 class TaskBackend(backends.TaskBackend):
 
+    def setup(self, result_ttl=None, max_results=None, **params):
+        self.result_ttl = max(float(result_ttl or 0), 0)
+        self.max_results = max(int(max_results or 0), 0)
+        return super(TaskBackend, self).setup(**params)
+
+    def store_info(self, monitor):
+        if monitor.name == self.name:
+            return _get_tasks(monitor).info()
+
     def put_task(self, task_id):
         if task_id:
             return send(self.name, 'put_task', task_id)
 
+    def put_tasks(self, tasks):
+        return send(self.name, 'put_tasks', tasks)
+
     def get_task(self, task_id=None):
-        return send(self.name, 'get_task', task_id, self.poll_timeout)
+        return send(self.name, 'get_task', task_id, self.poll_timeout,
+                    self.aging)
+
+    def get_tasks_batch(self, size):
+        return send(self.name, 'get_tasks_batch', size, self.poll_timeout,
+                    self.aging)
 
     def get_tasks(self, **filters):
         return send(self.name, 'get_tasks', **filters)
@@ -29,37 +66,134 @@ class TaskBackend(backends.TaskBackend):
     def flush(self):
         return send(self.name, 'delete_tasks', None)
 
+    def queue_depths(self):
+        return send(self.name, 'queue_depths')
+
 
 #########################################################    INTERNALS
+class PriorityQueue(Queue):
+    '''A :class:`pulsar.Queue` of ``(priority, task_id)`` items.
+
+    Items are retrieved by priority, higher priority first, and in FIFO
+    order within the same priority. When :attr:`aging` is positive, the
+    priority of queued items is given by
+    :func:`pulsar.apps.tasks.backends.aged_priority`.
+    '''
+    aging = 0
+
+    def _init(self):
+        self._queues = {}
+        self._size = 0
+
+    def qsize(self):
+        return self._size
+
+    def depths(self):
+        '''Dictionary of the number of items queued for each priority.'''
+        return dict(((p, len(q)) for p, q in self._queues.items()))
+
+    def _put(self, item):
+        queue = self._queues.get(item[0])
+        if queue is None:
+            self._queues[item[0]] = queue = deque()
+        queue.append((time.time(), item))
+        self._size += 1
+
+    def _get(self):
+        now = time.time()
+        aging = self.aging
+        best, queue = None, None
+        # Only the first item of each priority queue is a candidate
+        for priority, q in self._queues.items():
+            queued = q[0][0]
+            key = (backends.aged_priority(priority, queued, now, aging),
+                   -queued)
+            if best is None or key > best:
+                best, queue = key, q
+        _, item = queue.popleft()
+        if not queue:
+            self._queues.pop(item[0])
+        self._size -= 1
+        return item
+
+
 class LocalTaskBackend(object):
+    '''Store tasks in the monitor of the task queue application.
 
-    def __init__(self, name):
+    Tasks are indexed by the fields in :attr:`indexes` and tasks in
+    a ready state are evicted once older than ``result_ttl`` seconds or
+    when more than ``max_results`` of them are stored.
+    '''
+    indexes = ('overlap_id', 'status', 'name')
+
+    def __init__(self, name, result_ttl=0, max_results=0):
         self.pubsub = PubSub(name=name)
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.evicted_ttl = 0
+        self.evicted_max = 0
         self._init()
 
     def put_task(self, task_id):
         if task_id in self._tasks:
+            self.save_task(task_id, status=states.QUEUED)
             task = self._tasks[task_id]
-            task.status = states.QUEUED
-            yield self.queue.put(task.id)
+            yield self.queue.put((task.priority, task.id))
             yield task.id
 
-    def get_task(self, task_id, timeout):
+    def put_tasks(self, tasks):
+        ids = []
+        for params in tasks:
+            params = dict(params)
+            task_id = params.pop('id')
+            params['status'] = states.QUEUED
+            self.save_task(task_id, **params)
+            task = self._tasks[task_id]
+            self.queue.put_nowait((task.priority, task_id))
+            ids.append(task_id)
+        return ids
+
+    def get_task(self, task_id, timeout, aging=0):
         if not task_id:
+            self.queue.aging = aging
             try:
-                task_id = yield self.queue.get(timeout)
+                _, task_id = yield self.queue.get(timeout)
             except Empty:
                 coroutine_return()
         yield self._tasks.get(task_id)
 
+    def get_tasks_batch(self, size, timeout, aging=0):
+        self.queue.aging = aging
+        try:
+            _, task_id = yield self.queue.get(timeout)
+        except Empty:
+            coroutine_return([])
+        ids = [task_id]
+        while len(ids) < size:
+            try:
+                ids.append(self.queue.get_nowait()[1])
+            except Empty:
+                break
+        tasks = self._tasks
+        yield [tasks[id] for id in ids if id in tasks]
+
+    def queue_depths(self):
+        return self.queue.depths()
+
     def save_task(self, task_id, **params):
         task = self._tasks.get(task_id)
         if task:
+            self._unindex(task)
             for field, value in params.items():
                 setattr(task, field, value)
         else:   # create a new task
             task = backends.Task(task_id, **params)
             self._tasks[task.id] = task
+        self._index(task)
+        self._ready.pop(task.id, None)
+        if task.done():
+            self._ready[task.id] = time.time()
+        self.evict()
         return task.id
 
     def delete_tasks(self, ids):
@@ -69,21 +203,32 @@ class LocalTaskBackend(object):
         else:
             deleted = []
             for id in ids:
-                task = self._tasks.pop(id, None)
-                if task:
+                if self._remove(id):
                     deleted.append(id)
         return deleted
 
     def get_tasks(self, **filters):
         tasks = []
         if filters:
+            self.evict()
             fs = []
+            candidates = None
             for name, value in filters.items():
                 if not isinstance(value, (list, tuple, set, frozenset)):
                     value = (value,)
+                if name in self._indexes:
+                    index = self._indexes[name]
+                    ids = set()
+                    for v in value:
+                        ids.update(index.get(v, ()))
+                    if candidates is None or len(ids) < len(candidates):
+                        candidates = ids
                 fs.append((name, value))
-            # Loop over tasks
-            for task in itervalues(self._tasks):
+            if candidates is None:
+                candidates = self._tasks
+            # Loop over candidate tasks
+            for id in candidates:
+                task = self._tasks[id]
                 select = True
                 for name, values in fs:
                     value = getattr(task, name, None)
@@ -94,9 +239,61 @@ class LocalTaskBackend(object):
                     tasks.append(task)
         return tasks
 
+    def evict(self, now=None):
+        '''Evict tasks in a ready state which exceed the ``result_ttl``
+        or ``max_results`` limits.'''
+        ready = self._ready
+        if ready and (self.result_ttl or self.max_results):
+            if self.max_results:
+                while len(ready) > self.max_results:
+                    self._remove(next(iter(ready)))
+                    self.evicted_max += 1
+            if self.result_ttl:
+                expiry = (now or time.time()) - self.result_ttl
+                while ready:
+                    id = next(iter(ready))
+                    if ready[id] > expiry:
+                        break
+                    self._remove(id)
+                    self.evicted_ttl += 1
+
+    def info(self):
+        self.evict()
+        return {'stored': len(self._tasks),
+                'ready': len(self._ready),
+                'evicted_ttl': self.evicted_ttl,
+                'evicted_max': self.evicted_max}
+
+    def _remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task:
+            self._unindex(task)
+            self._ready.pop(task_id, None)
+        return task
+
+    def _index(self, task):
+        for name, index in self._indexes.items():
+            value = getattr(task, name, None)
+            ids = index.get(value)
+            if ids is None:
+                index[value] = ids = set()
+            ids.add(task.id)
+
+    def _unindex(self, task):
+        for name, index in self._indexes.items():
+            value = getattr(task, name, None)
+            ids = index.get(value)
+            if ids:
+                ids.discard(task.id)
+                if not ids:
+                    index.pop(value)
+
     def _init(self):
         self._tasks = {}
-        self.queue = Queue()
+        self._indexes = dict(((name, {}) for name in self.indexes))
+        # Ids of tasks in a ready state ordered by the time they got ready
+        self._ready = OrderedDict()
+        self.queue = PriorityQueue()
 
 
 #################################################    TASKQUEUE COMMANDS
@@ -111,8 +308,13 @@ def delete_tasks(request, ids):
 
 
 @command()
-def get_task(request, task_id=None, timeout=1):
-    return _get_tasks(request.actor).get_task(task_id, timeout)
+def get_task(request, task_id=None, timeout=1, aging=0):
+    return _get_tasks(request.actor).get_task(task_id, timeout, aging)
+
+
+@command()
+def get_tasks_batch(request, size=1, timeout=1, aging=0):
+    return _get_tasks(request.actor).get_tasks_batch(size, timeout, aging)
 
 
 @command()
@@ -125,8 +327,22 @@ def put_task(request, task_id):
     return _get_tasks(request.actor).put_task(task_id)
 
 
+@command()
+def put_tasks(request, tasks):
+    return _get_tasks(request.actor).put_tasks(tasks)
+
+
+@command()
+def queue_depths(request):
+    return _get_tasks(request.actor).queue_depths()
+
+
 def _get_tasks(actor):
     tasks = getattr(actor, '_TASKQUEUE_TASKS', None)
     if tasks is None:
-        actor._TASKQUEUE_TASKS = tasks = LocalTaskBackend(name=actor.name)
+        backend = getattr(getattr(actor, 'app', None), 'backend', None)
+        actor._TASKQUEUE_TASKS = tasks = LocalTaskBackend(
+            name=actor.name,
+            result_ttl=getattr(backend, 'result_ttl', 0),
+            max_results=getattr(backend, 'max_results', 0))
     return tasks
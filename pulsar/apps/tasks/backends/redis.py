@@ -3,17 +3,55 @@ A :class:`pulsar.apps.tasks.backends.TaskBackend` implementation
 based on redis_ as data server.
 Requires python-stdnet_ for mapping tasks into redis hashes.
 
+Queued task ids are stored in one redis list for each priority, the set of
+priorities in use is stored in a redis set. Without
+:attr:`pulsar.apps.tasks.backends.TaskBackend.aging`, tasks are retrieved
+with a single ``BLPOP`` over the lists sorted by decreasing priority.
+With aging, the head of each list is compared and popped by a lua script,
+so that no other worker can pop it in between.
+The ``BLPOP`` also waits on a wake-up list, which receives an item when a
+task is queued with a new priority.
+Tasks submitted in bulk via
+:meth:`pulsar.apps.tasks.backends.TaskBackend.run_jobs` are saved in one
+transaction and their ids are queued in one pipeline.
+
 .. _redis: http://redis.io/
 .. _python-stdnet: https://pypi.python.org/pypi/python-stdnet
 '''
+import time
+
 from stdnet import odm
 
-from pulsar import async
+from pulsar import async, multi_async
+from pulsar.utils.pep import to_string
 from pulsar.apps.tasks import backends, states
 from pulsar.utils.log import local_method
 from pulsar.utils.internet import get_connection_string
 
 
+# Pop the head with the highest aged priority.
+# KEYS: the queue lists, ARGV: their priorities, the current time and aging
+POP_AGED = '''
+local now = tonumber(ARGV[#KEYS + 1])
+local aging = tonumber(ARGV[#KEYS + 2])
+local best, best_key, best_queued
+for i, key in ipairs(KEYS) do
+    local head = redis.call('lindex', key, 0)
+    if head then
+        local queued = tonumber(string.match(head, '^[^:]+'))
+        local aged = tonumber(ARGV[i]) + (now - queued)/aging
+        if not best or aged > best or
+                (aged == best and queued < best_queued) then
+            best, best_key, best_queued = aged, key, queued
+        end
+    end
+end
+if best_key then
+    return redis.call('lpop', best_key)
+end
+'''
+
+
 class TaskData(odm.StdModel):
     id = odm.SymbolField(primary_key=True)
     overlap_id = odm.SymbolField(required=False)
@@ -27,10 +65,9 @@ class TaskData(odm.StdModel):
     time_started = odm.DateTimeField(required=False, index=False)
     time_ended = odm.DateTimeField(required=False, index=False)
     expiry = odm.DateTimeField(required=False, index=False)
+    priority = odm.IntegerField(default=1, index=False)
     meta = odm.JSONField()
     #
-    # List where all TaskData ids are queued
-    queue = odm.ListField(class_field=True)
     # Set where TaskData ids under execution are stored
     executing = odm.SetField(class_field=True)
 
@@ -57,10 +94,12 @@ class TaskBackend(backends.TaskBackend):
             params['namespace'] = '%s.' % name
         return get_connection_string(scheme, address, params)
 
-    def num_tasks(self):
-        '''Retrieve the number of tasks in the task queue.'''
-        task_manager = self.task_manager()
-        return task_manager.queue.size()
+    def queue_depths(self):
+        client = self.client()
+        priorities = yield self._priorities()
+        sizes = yield multi_async([client.llen(self.queue_key(p))
+                                   for p in priorities])
+        yield dict(zip(priorities, sizes))
 
     @async()
     def put_task(self, task_id):
@@ -69,9 +108,45 @@ class TaskBackend(backends.TaskBackend):
             if task_data:
                 task_data.status = states.QUEUED
                 task_data = yield task_data.save()
-                yield self.task_manager().queue.push_back(task_data.id)
+                client = self.client()
+                priority = task_data.priority
+                added = yield client.sadd(self.queue_key(), priority)
+                yield client.rpush(self.queue_key(priority),
+                                   '%s:%s' % (time.time(), task_data.id))
+                if added:
+                    yield self._wake_up()
                 yield task_data.id
 
+    @async()
+    def put_tasks(self, tasks):
+        # Save all tasks in one stdnet transaction and queue their ids in
+        # one redis pipeline
+        session = self.models().session()
+        dfields = TaskData._meta.dfields
+        with session.begin() as t:
+            for params in tasks:
+                fields = {'meta': {}}
+                for field, value in params.items():
+                    if field in dfields:
+                        fields[field] = value
+                    else:
+                        fields['meta'][field] = value
+                fields['status'] = states.QUEUED
+                t.add(TaskData(**fields))
+        yield t.on_result
+        now = time.time()
+        pipe = self.client().pipeline()
+        priorities = set((params['priority'] for params in tasks))
+        for priority in priorities:
+            pipe.sadd(self.queue_key(), priority)
+        for params in tasks:
+            pipe.rpush(self.queue_key(params['priority']),
+                       '%s:%s' % (now, params['id']))
+        result = yield pipe.execute()
+        if any(result[:len(priorities)]):
+            yield self._wake_up()
+        yield [params['id'] for params in tasks]
+
     @async()
     def save_task(self, task_id, **params):
         # Called by self when the task need to be saved
@@ -90,15 +165,27 @@ class TaskBackend(backends.TaskBackend):
         yield task_id
 
     def get_task(self, task_id=None, timeout=1):
-        task_manager = self.task_manager()
-        #
         if not task_id:
-            task_id = yield task_manager.queue.block_pop_front(timeout=timeout)
+            task_id = yield self._pop_task(timeout)
         if task_id:
             task_data = yield self._get_task(task_id)
             if task_data:
                 yield task_data.as_task()
 
+    def get_tasks_batch(self, size):
+        ids = []
+        task_id = yield self._pop_task(self.poll_timeout)
+        while task_id:
+            ids.append(task_id)
+            if len(ids) >= size:
+                break
+            task_id = yield self._pop_task()
+        tasks = []
+        if ids:
+            tasks = yield self.task_manager().filter(id=ids).all()
+        tasks = dict(((t.id, t.as_task()) for t in tasks))
+        yield [tasks[id] for id in ids if id in tasks]
+
     def get_tasks(self, **filters):
         task_manager = self.task_manager()
         tasks = yield task_manager.filter(**filters).all()
@@ -128,6 +215,60 @@ class TaskBackend(backends.TaskBackend):
     def task_manager(self):
         return self.models().taskdata
 
+    def client(self):
+        return self.task_manager().backend.client
+
+    def queue_key(self, priority=None):
+        '''The redis key of the list of task ids queued with ``priority``.
+
+        If ``priority`` is ``None`` it returns the key of the set of
+        priorities, the key of the wake-up list for ``wake``.'''
+        task_manager = self.task_manager()
+        return task_manager.backend.basekey(task_manager._meta, 'queue',
+                                            priority)
+
+    def _priorities(self):
+        priorities = yield self.client().smembers(self.queue_key())
+        yield sorted((int(p) for p in priorities), reverse=True)
+
+    def _pop_task(self, timeout=None):
+        # Pop a task id from the queue. If timeout is not provided it does
+        # not block.
+        client = self.client()
+        priorities = yield self._priorities()
+        keys = [self.queue_key(p) for p in priorities]
+        value = task_id = None
+        if self.aging and len(keys) > 1:
+            # Pop from the priority with the highest aged priority
+            args = keys + priorities + [time.time(), self.aging]
+            value = yield client.eval(POP_AGED, len(keys), *args)
+        if not value and timeout:
+            # Block on the default priority when no task was ever queued
+            keys = keys or [self.queue_key(1)]
+            wake = self.queue_key('wake')
+            popped = yield client.blpop(keys + [wake], timeout=timeout)
+            if popped and to_string(popped[0]) == wake:
+                # A task was queued with a new priority
+                task_id = yield self._pop_task()
+            elif popped:
+                value = popped[1]
+        elif not value:
+            for key in keys:
+                value = yield client.lpop(key)
+                if value:
+                    break
+        if value:
+            task_id = to_string(value).split(':', 1)[1]
+        yield task_id
+
+    def _wake_up(self):
+        # Wake up a worker blocked on the lists of the known priorities,
+        # the wake-up list has one item at most
+        client = self.client()
+        wake = self.queue_key('wake')
+        yield client.lpush(wake, 1)
+        yield client.ltrim(wake, 0, 0)
+
     def _get_task(self, task_id):
         tasks = yield self.task_manager().filter(id=task_id).all()
         if tasks:
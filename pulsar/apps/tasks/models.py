@@ -57,6 +57,60 @@ a new task cannot be started unless a previous task of the same job
 is done.
 
 
+.. _job-priority:
+
+Task priorities
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Tasks are consumed by priority, higher :attr:`Job.priority` first, and in
+FIFO order within the same priority::
+
+    class Urgent(tasks.Job):
+        priority = 10
+
+        def __call__(self, consumer):
+            ...
+
+The priority of a single task can be set when running it::
+
+    backend.run_job('addition', (1, 2), priority=5)
+
+To prevent tasks with low priority from waiting forever when the queue is
+busy, the task backend can age queued tasks via the ``aging`` parameter in
+its connection string::
+
+    local://?aging=30
+
+With the above, a queued task gains one priority level for every 30 seconds
+it spends waiting in the queue.
+
+
+.. _job-execution:
+
+Execution modes
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+The :attr:`Job.execution` attribute controls where the tasks of a job run:
+
+* ``thread`` (default) on the thread pool of the task queue worker.
+* ``process`` on a pool of subprocesses owned by the worker (check
+  :mod:`pulsar.apps.tasks.process`). CPU-bound jobs should use this mode
+  so that they do not contend for the GIL with each other and with the
+  worker event loop::
+
+    class Thumbnail(tasks.Job):
+        execution = 'process'
+        process_timeout = 60
+
+        def __call__(self, consumer, path):
+            ...
+
+  The job callable must be synchronous, its arguments and result picklable.
+  The ``consumer`` passed to it has no ``backend`` and ``worker``.
+* ``loop`` on the event loop of the worker. Suitable for
+  :ref:`asynchronous jobs <job-callable>` which mainly wait for IO.
+
+
 Job class
 ~~~~~~~~~~~~~~~~~~~~~~
 
@@ -84,12 +138,16 @@ from hashlib import sha1
 import logging
 
 from pulsar.utils.pep import iteritems
+from pulsar.utils.exceptions import ImproperlyConfigured
 from pulsar.utils.importer import import_modules
 from pulsar.utils.security import gen_unique_id
 
 
 __all__ = ['JobMetaClass', 'Job', 'PeriodicJob',
-           'anchorDate', 'JobRegistry', 'create_task_id']
+           'anchorDate', 'JobRegistry', 'create_task_id',
+           'EXECUTION_MODES']
+
+EXECUTION_MODES = frozenset(('thread', 'process', 'loop'))
 
 
 def create_task_id():
@@ -136,6 +194,11 @@ class JobMetaClass(type):
 
     def __new__(cls, name, bases, attrs):
         attrs['can_register'] = not attrs.pop('abstract', False)
+        execution = attrs.get('execution')
+        if execution and execution not in EXECUTION_MODES:
+            modes = ', '.join(sorted(EXECUTION_MODES))
+            raise ImproperlyConfigured('Job %s execution mode "%s" is not '
+                                       'one of %s' % (name, execution, modes))
         job_name = attrs.get("name", name).lower()
         log_prefix = attrs.get("log_prefix") or "pulsar"
         attrs["name"] = job_name
@@ -178,6 +241,31 @@ class Job(JobMetaClass('JobBase', (object,), {'abstract': True})):
 
     Default: ``True``.
 
+.. attribute:: priority
+
+    Integer indicating the priority of tasks created by this job. Tasks with
+    higher priority are consumed first, tasks with the same priority are
+    consumed in the order they were queued. It can be overridden for a
+    single task by passing the ``priority`` meta parameter to
+    :meth:`pulsar.apps.tasks.backends.TaskBackend.run_job`.
+
+    Default: ``1``.
+
+.. attribute:: execution
+
+    The :ref:`execution mode <job-execution>` of tasks created by this job,
+    one of ``thread``, ``process`` and ``loop``.
+
+    Default: ``thread``.
+
+.. attribute:: process_timeout
+
+    Number of seconds after which a task running in ``process``
+    :attr:`execution` mode is revoked and its process killed. ``None`` for
+    no limit.
+
+    Default: ``None``.
+
 .. attribute:: doc_syntax
 
     The doc string syntax.
@@ -193,6 +281,9 @@ class Job(JobMetaClass('JobBase', (object,), {'abstract': True})):
     expires = None
     doc_syntax = 'markdown'
     can_overlap = True
+    priority = 1
+    execution = 'thread'
+    process_timeout = None
 
     def __call__(self, consumer, *args, **kwargs):
         '''The Jobs' task executed by the consumer. This function needs to be
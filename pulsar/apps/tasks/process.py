@@ -0,0 +1,421 @@
+'''
+A pool of subprocesses executing :ref:`jobs <apps-taskqueue-job>` with
+:attr:`pulsar.apps.tasks.models.Job.execution` set to ``process``.
+
+The :class:`ProcessPool` is owned by a task queue worker. When it is
+created, before the worker starts any thread, it forks a single fork server
+process. The fork server does not run jobs, it forks the job processes on
+request of the pool, the initial ones and their replacements. Job processes
+therefore never inherit the threads and locks of the worker, while
+inherited file descriptors, such as the worker listening sockets and
+mailbox, are closed by the fork server.
+
+Each job process connects back to the pool via an authenticated unix
+socket. A task is sent, together with its positional and key-valued
+arguments, to an idle process which executes the job and sends back the
+result. Arguments and results must therefore be picklable.
+
+* When a job takes longer than its
+  :attr:`pulsar.apps.tasks.models.Job.process_timeout`, the process running
+  it is killed and replaced by a new one.
+* When ``max_jobs`` is positive, a process is replaced after executing
+  ``max_jobs`` jobs.
+* When a process cannot be replaced, for example because the fork server
+  has exited, the failure is logged and the pool shrinks. Once no process is
+  left, jobs fail immediately with a :class:`ProcessError`.
+
+Processes are forked via ``os.fork``, therefore the pool is only available
+on posix platforms. Elsewhere jobs in ``process`` mode run on threads.
+
+.. autoclass:: ProcessPool
+   :members:
+   :member-order: bysource
+'''
+import os
+import signal
+import logging
+import traceback
+from inspect import isgenerator
+from select import select
+from multiprocessing import Pipe, cpu_count, AuthenticationError
+from multiprocessing.connection import Listener, Client
+from threading import Lock
+
+from pulsar import PulsarException, ThreadQueue, Empty
+
+
+__all__ = ['ProcessPool', 'ProcessError', 'ProcessTimeout', 'can_fork']
+
+
+can_fork = hasattr(os, 'fork')
+LOGGER = logging.getLogger('pulsar.tasks')
+
+
+class ProcessError(PulsarException):
+    '''Raised when a job fails in a subprocess. The message contains the
+    traceback of the subprocess.'''
+
+
+class ProcessTimeout(PulsarException):
+    '''Raised when a job exceeds its timeout in a subprocess.'''
+
+
+class ForkServer(object):
+    '''A subprocess forking job processes which connect to ``address``.'''
+
+    def __init__(self, registry, address, authkey):
+        conn, child = Pipe()
+        self.pid = os.fork()
+        if not self.pid:     # pragma    nocover
+            conn.close()
+            try:
+                _fork_server(child, registry, address, authkey)
+            finally:
+                os._exit(0)
+        child.close()
+        self.conn = conn
+
+    def fork(self, timeout=None):
+        '''Fork a new job process and return its pid.'''
+        try:
+            self.conn.send(True)
+            if not self.conn.poll(timeout):
+                raise ProcessError('Fork server %s did not fork after %s '
+                                   'seconds' % (self.pid, timeout))
+            pid = self.conn.recv()
+        except (EOFError, IOError, OSError):
+            raise ProcessError('Fork server %s exited' % self.pid)
+        if isinstance(pid, str):
+            raise ProcessError(pid)
+        return pid
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+        self.conn.close()
+        try:
+            os.waitpid(self.pid, 0)
+        except OSError:
+            pass
+
+
+class JobProcess(object):
+    '''A subprocess executing jobs one at a time.'''
+
+    def __init__(self, pid, conn):
+        self.pid = pid
+        self.conn = conn
+        self.jobs = 0
+        self.dead = False
+
+    def run(self, task_id, name, args, kwargs, timeout=None):
+        try:
+            self.conn.send((task_id, name, args, kwargs))
+            if not self.conn.poll(timeout):
+                raise ProcessTimeout('Task %s timed out after %s seconds' %
+                                     (task_id, timeout))
+            success, result = self.conn.recv()
+        except (EOFError, IOError, OSError):
+            self.dead = True
+            raise ProcessError('Process %s exited while running task %s' %
+                               (self.pid, task_id))
+        self.jobs += 1
+        if success:
+            return result
+        else:
+            raise ProcessError(result)
+
+    def stop(self):
+        '''Ask the process to exit once its current job has finished.'''
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+        self.conn.close()
+
+    def kill(self):
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.conn.close()
+
+
+class ProcessPool(object):
+    '''A pool of subprocesses executing jobs from a
+    :class:`pulsar.apps.tasks.models.JobRegistry`.
+
+    :parameter registry: the job registry. It is inherited by processes when
+        they are forked.
+    :parameter processes: number of processes, if not supplied the number of
+        CPUs is used.
+    :parameter max_jobs: number of jobs a process executes before being
+        replaced. ``0`` for no limit.
+
+    .. attribute:: fork_timeout
+
+        Seconds to wait for a new process to be forked and to connect to the
+        pool.
+
+        Default: ``10``.
+    '''
+    fork_timeout = 10
+
+    def __init__(self, registry, processes=None, max_jobs=0):
+        self.processes = processes or cpu_count()
+        self.max_jobs = max_jobs
+        self.executed = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.closed = False
+        self._idle = ThreadQueue()
+        self._lock = Lock()
+        self._fork_lock = Lock()
+        self._running = set()
+        self._size = self.processes
+        authkey = os.urandom(20)
+        self._listener = Listener(family='AF_UNIX', authkey=authkey)
+        self._server = ForkServer(registry, self._listener.address, authkey)
+        try:
+            for _ in range(self.processes):
+                self._idle.put(self._fork())
+        except Exception:
+            self.close()
+            raise
+
+    def apply(self, task_id, name, args=None, kwargs=None, timeout=None):
+        '''Execute job ``name`` in an idle process and return its result.
+
+        This method blocks until the job has finished, therefore it is
+        called by a thread of the worker
+        :class:`pulsar.ThreadPool` rather than by its event loop.
+        '''
+        process = self._get_idle()
+        with self._lock:
+            self._running.add(process)
+        replace = False
+        error = None
+        try:
+            result = process.run(task_id, name, args or (), kwargs or {},
+                                 timeout)
+        except ProcessTimeout as e:
+            process.kill()
+            replace = True
+            with self._lock:
+                self.timeouts += 1
+            error = e
+        except ProcessError as e:
+            if process.dead:
+                process.kill()
+                replace = True
+            error = e
+        except Exception as e:
+            # The process is in an unknown state
+            process.kill()
+            replace = True
+            error = e
+        if self._release(process, replace):
+            self._replace()
+        if error is not None:
+            raise error
+        return result
+
+    def info(self):
+        '''Dictionary of information about this pool.'''
+        with self._lock:
+            return {'processes': self.processes,
+                    'running': len(self._running),
+                    'executed': self.executed,
+                    'timeouts': self.timeouts,
+                    'recycled': self.recycled}
+
+    def close(self):
+        '''Stop idle processes, kill the ones running a job and stop the
+        fork server.'''
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            running = list(self._running)
+        for process in running:
+            process.kill()
+        while True:
+            try:
+                process = self._idle.get_nowait()
+            except Empty:
+                break
+            process.stop()
+        with self._fork_lock:
+            self._server.stop()
+            self._listener.close()
+
+    def _get_idle(self):
+        # Wait for an idle process, fail when the pool has none left
+        while True:
+            with self._lock:
+                if self.closed:
+                    raise ProcessError('Process pool is closed')
+                if not self._size:
+                    raise ProcessError('No process left in the pool')
+            try:
+                return self._idle.get(timeout=1)
+            except Empty:
+                pass
+
+    def _release(self, process, replace):
+        # Release process after a job, return True when it must be replaced
+        with self._lock:
+            self.executed += 1
+            self._running.discard(process)
+            closed = self.closed
+            if not (closed or replace) and self.max_jobs and \
+                    process.jobs >= self.max_jobs:
+                self.recycled += 1
+                process.stop()
+                replace = True
+        if closed:
+            process.kill()
+        elif replace:
+            return True
+        else:
+            self._put_idle(process)
+        return False
+
+    def _replace(self):
+        # Fork a process replacing one which exited, shrink the pool when
+        # this is not possible
+        try:
+            process = self._fork()
+        except ProcessError:
+            LOGGER.exception('Could not replace a process of the pool')
+            with self._lock:
+                self._size -= 1
+        else:
+            self._put_idle(process)
+
+    def _fork(self):
+        # Ask the fork server for a new process and accept its connection.
+        # Forks are serialised so that the accepted connection is the one
+        # of the forked process.
+        with self._fork_lock:
+            if self.closed:
+                return
+            timeout = self.fork_timeout
+            pid = self._server.fork(timeout)
+            try:
+                return JobProcess(pid, _accept(self._listener, timeout))
+            except ProcessError:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                raise
+
+    def _put_idle(self, process):
+        if process:
+            with self._lock:
+                if not self.closed:
+                    self._idle.put(process)
+                    return
+            process.kill()
+
+
+def _accept(listener, timeout):
+    # Listener.accept has no timeout, wait for the connection first
+    sock = listener._listener._socket
+    if not select([sock], [], [], timeout)[0]:
+        raise ProcessError('Process did not connect after %s seconds' %
+                           timeout)
+    try:
+        return listener.accept()
+    except (EOFError, IOError, OSError, AuthenticationError):
+        raise ProcessError('Process failed to connect')
+
+
+def _fork_server(conn, registry, address, authkey):     # pragma    nocover
+    # The loop of the fork server
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _close_fds(conn.fileno())
+    while True:
+        try:
+            # Reap exited job processes while waiting for requests
+            while not conn.poll(1):
+                _reap()
+            request = conn.recv()
+        except (EOFError, IOError):
+            break
+        if request is None:
+            break
+        try:
+            pid = os.fork()
+        except OSError:
+            conn.send(traceback.format_exc())
+            continue
+        if not pid:
+            conn.close()
+            try:
+                _run_jobs(Client(address, authkey=authkey), registry)
+            finally:
+                os._exit(0)
+        conn.send(pid)
+        _reap()
+
+
+def _close_fds(keep):     # pragma    nocover
+    # Point the file descriptors inherited from the worker to /dev/null.
+    # They are not closed since objects of the worker may still close them
+    # when garbage collected.
+    try:
+        fds = [int(fd) for fd in os.listdir('/proc/self/fd')]
+    except OSError:
+        fds = range(3, min(os.sysconf('SC_OPEN_MAX'), 65536))
+    null = os.open(os.devnull, os.O_RDWR)
+    for fd in fds:
+        if fd > 2 and fd not in (keep, null):
+            try:
+                os.dup2(null, fd)
+            except OSError:
+                pass
+    os.close(null)
+
+
+def _reap():     # pragma    nocover
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except OSError:
+        pass
+
+
+def _run_jobs(conn, registry):     # pragma    nocover
+    # The loop of a subprocess
+    from pulsar.apps.tasks.backends import TaskConsumer
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, IOError):
+            break
+        if request is None:
+            break
+        task_id, name, args, kwargs = request
+        try:
+            job = registry[name]
+            consumer = TaskConsumer(None, None, task_id, job)
+            result = job(consumer, *args, **kwargs)
+            if isgenerator(result):
+                raise TypeError('Job "%s" is asynchronous and cannot run in '
+                                'a process' % name)
+            response = (True, result)
+        except Exception:
+            response = (False, traceback.format_exc())
+        try:
+            conn.send(response)
+        except (EOFError, IOError):
+            break
+        except Exception:
+            conn.send((False, traceback.format_exc()))
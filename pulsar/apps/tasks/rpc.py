@@ -78,6 +78,14 @@ available tasks call the "job_list" function. It returns the task id.'''
         result = yield self.run_new_task(request, jobname, **kw)
         yield task_to_json(result)
 
+    def rpc_run_new_tasks(self, request, tasks=None):
+        '''Run several new tasks in the task queue with one request to the
+task queue backend. ``tasks`` is a list of objects with the same parameters
+as the "run_new_task" function. It returns the list of task ids, ``null``
+for tasks which could not run because of an overlapping task.'''
+        result = yield self.run_new_tasks(request, tasks)
+        yield task_to_json(result)
+
     def rpc_get_task(self, request, id=None):
         '''Retrieve a task from its id'''
         if id:
@@ -126,6 +134,29 @@ available tasks call the "job_list" function. It returns the task id.'''
         task_backend = yield self.task_backend()
         yield task_backend.run_job(jobname, args, kw, **meta_data)
 
+    def run_new_tasks(self, request, tasks):
+        if not isinstance(tasks, list):
+            raise rpc.InvalidParams('"tasks" must be a list!')
+        params = self.task_request_parameters(request)
+        specs = []
+        for kw in tasks:
+            if not isinstance(kw, dict) or not kw.get('jobname'):
+                raise rpc.InvalidParams('"jobname" is not specified!')
+            kw = dict(kw)
+            spec = dict(kw.pop('meta_data', None) or {})
+            spec.update(params)
+            spec.update(jobname=kw.pop('jobname'),
+                        args=kw.pop('args', None) or (),
+                        kwargs=kw)
+            specs.append(spec)
+        task_backend = yield self.task_backend()
+        try:
+            run = task_backend.run_jobs(specs)
+        except TaskNotAvailable as e:
+            raise rpc.InvalidParams('Job "%s" is not available.'
+                                    % e.task_name)
+        yield run
+
     def task_request_parameters(self, request):
         '''**Internal function** which returns a dictionary of parameters
 to be passed to the :class:`Task` class constructor.
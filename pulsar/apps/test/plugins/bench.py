@@ -1,5 +1,14 @@
 '''
 A test plugin for benchmarking test cases.
+
+Test cases flagged with the ``__benchmark__`` attribute are repeated
+``__number__`` times, or ``--repeat`` times when not specified, and the
+average time of a test function is reported.
+
+When a test case sets the ``bench_items`` attribute to the number of items
+processed by a single run of a test function, the rate in items per second
+is reported too. The ``bench_unit`` attribute names the items, ``items``
+by default.
 '''
 import sys
 import time
@@ -20,6 +29,7 @@ from pulsar.apps import test
 
 BENCHMARK_TEMPLATE = '\nRepeated {0[number]} times.\
  Average {0[mean]} secs, Stdev {0[std]}.'
+RATE_TEMPLATE = ' {0[rate]} {0[unit]} per second.'
 
 
 class BenchTest(test.WrapTest):
@@ -37,6 +47,12 @@ class BenchTest(test.WrapTest):
                      'mean': '%.5f' % mean,
                      'std': '{0} %'.format(std)})
 
+    def updateRate(self, info, number, total_time, items):
+        rate = number*items/total_time
+        info.update({'rate': round(rate, 2) if isinstance(items, float)
+                     else int(rate),
+                     'unit': getattr(self.test, 'bench_unit', 'items')})
+
     def _call(self):
         simple = lambda info, *args: info
         testMethod = self.testMethod
@@ -57,6 +73,9 @@ class BenchTest(test.WrapTest):
             t += dt
             t2 += dt*dt
         self.updateSummary(info, self.number, t, t2)
+        items = getattr(self.test, 'bench_items', None)
+        if items:
+            self.updateRate(info, self.number, t, items)
         self.set_test_attribute('bench_info',
                                 testGetSummary(info, self.number, t, t2))
 
@@ -94,8 +113,11 @@ class BenchMark(test.TestPlugin):
             result = getattr(test, 'bench_info', None)
             if result and self.stream.showAll:
                 stream = self.stream.handler('benchmark')
-                template = getattr(test, 'benchmark_template',
-                                   BENCHMARK_TEMPLATE)
+                template = getattr(test, 'benchmark_template', None)
+                if not template:
+                    template = BENCHMARK_TEMPLATE
+                    if 'rate' in result:
+                        template += RATE_TEMPLATE
                 stream.writeln(template.format(result))
                 stream.flush()
                 return True
@@ -57,8 +57,26 @@ WebSocket protocol
    :members:
    :member-order: bysource
 
+
+Broadcast
+~~~~~~~~~~~~~~~~~~~~
+
+.. autofunction:: broadcast
+
+
+Compression
+~~~~~~~~~~~~~~~~~~~~
+
+The ``permessage-deflate`` extension is negotiated during the handshake when
+offered by the client.
+
+.. autoclass:: PerMessageDeflate
+   :members:
+   :member-order: bysource
+
 '''
-from .websocket import WebSocket, WebSocketProtocol
+from .websocket import WebSocket, WebSocketProtocol, broadcast
+from .extensions import PerMessageDeflate
 
 
 class WS(object):
@@ -1,5 +1,6 @@
 import zlib
 
+from pulsar import ProtocolError
 from pulsar.utils import websocket
 
 ############################################################################
@@ -13,7 +14,7 @@ class deflate_frame(websocket.Extension):
     def __init__(self, window_bits=None):
         self.window_bits = window_bits or zlib.MAX_WBITS
 
-    def receive(self, frame, application_data):
+    def receive(self, frame, application_data, max_size=None):
         if frame.rsv1 == 1:
             application_data += b'\x00\x00\xff\xff'
             return zlib.decompress(application_data)
@@ -26,3 +27,126 @@ class deflate_frame(websocket.Extension):
 
 
 #websocket.WS_EXTENSIONS['x-webkit-deflate-frame'] = deflate_frame
+
+
+############################################################################
+##  permessage-deflate     Extension
+#
+# http://tools.ietf.org/html/rfc7692
+DEFLATE_TAIL = b'\x00\x00\xff\xff'
+WINDOW_BITS = ('server_max_window_bits', 'client_max_window_bits')
+NO_CONTEXT_TAKEOVER = ('server_no_context_takeover',
+                       'client_no_context_takeover')
+
+
+class PerMessageDeflate(websocket.Extension):
+    '''The ``permessage-deflate`` extension.
+
+    Compression and decompression states are kept for the lifetime of the
+    connection unless the ``no_context_takeover`` parameter for the sending
+    endpoint is negotiated, in which case the compressor is reset after
+    each message. Messages smaller than :attr:`threshold` bytes are not
+    compressed.
+
+    .. attribute:: threshold
+
+        Minimum size in bytes of messages to compress.
+
+    .. attribute:: compress_level
+
+        The zlib compression level.
+
+    .. attribute:: server_no_context_takeover
+
+        If ``True`` a server resets its compressor after each message even
+        if the client did not ask for it. Frames sent by the server can then
+        be shared between connections, as in
+        :func:`pulsar.apps.ws.broadcast`.
+    '''
+    name = 'permessage-deflate'
+    threshold = 128
+    compress_level = zlib.Z_DEFAULT_COMPRESSION
+    server_no_context_takeover = False
+
+    def __init__(self, params=None, kind=0):
+        self.params = params or {}
+        self.kind = kind
+        # parameters of the sending endpoint
+        if kind == 1:
+            no_context, bits = 'client_no_context_takeover', WINDOW_BITS[1]
+        else:
+            no_context, bits = 'server_no_context_takeover', WINDOW_BITS[0]
+        self.stateless = bool(self.params.get(no_context))
+        bits = self.params.get(bits)
+        self.window_bits = bits if bits not in (None, True) else zlib.MAX_WBITS
+        self._compress = None
+        self._decompress = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    @classmethod
+    def negotiate(cls, params, kind):
+        accepted = {}
+        for name, value in params.items():
+            if name in NO_CONTEXT_TAKEOVER:
+                if value is not True:
+                    return
+                accepted[name] = True
+            elif name in WINDOW_BITS:
+                if value is not True:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        return
+                    # zlib does not support a window of 256 bytes
+                    if not 9 <= value <= 15:
+                        return
+                    accepted[name] = value
+                elif name == WINDOW_BITS[0] or kind == 1:
+                    # a value is required
+                    return
+            else:
+                return
+        if kind == 0 and cls.server_no_context_takeover:
+            accepted['server_no_context_takeover'] = True
+        return cls(accepted, kind)
+
+    def response(self):
+        params = [self.name]
+        for name in NO_CONTEXT_TAKEOVER + WINDOW_BITS:
+            value = self.params.get(name)
+            if value is True:
+                params.append(name)
+            elif value:
+                params.append('%s=%s' % (name, value))
+        return '; '.join(params)
+
+    def receive(self, frame, data, max_size=None):
+        if frame.rsv1:
+            data += DEFLATE_TAIL
+            if max_size:
+                # Stop inflating as soon as the message is too large
+                data = self._decompress.decompress(data, max_size + 1)
+                if (len(data) > max_size or
+                        self._decompress.unconsumed_tail):
+                    raise ProtocolError('WEBSOCKET message too large')
+            else:
+                data = self._decompress.decompress(data)
+        return data
+
+    def send(self, params, data):
+        if len(data) < self.threshold:
+            return data
+        if self._compress is None:
+            self._compress = zlib.compressobj(self.compress_level,
+                                              zlib.DEFLATED,
+                                              -self.window_bits)
+        data = (self._compress.compress(data) +
+                self._compress.flush(zlib.Z_SYNC_FLUSH))
+        if data.endswith(DEFLATE_TAIL):
+            data = data[:-4]
+        if self.stateless:
+            self._compress = None
+        params['rsv1'] = 1
+        return data
+
+
+websocket.WS_EXTENSIONS[PerMessageDeflate.name] = PerMessageDeflate
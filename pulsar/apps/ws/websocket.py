@@ -20,6 +20,48 @@ def register_transport(klass):
     return klass
 
 
+def broadcast(websockets, message, opcode=None, max_buffer_size=None):
+    '''Write ``message`` to all ``websockets``.
+
+    The frame is built once for each distinct parser configuration (version
+    and extensions) and the same bytes are written to all transports.
+    Websockets with a closing transport, a transport with writing paused or
+    with more than ``max_buffer_size`` bytes waiting to be sent are skipped.
+    Masked frames, sent by clients, and frames compressed with a per
+    connection state (see :class:`.PerMessageDeflate`) are built for each
+    websocket.
+
+    :param websockets: iterable over :class:`WebSocketProtocol`.
+    :param message: a string, bytes or a :class:`.Frame`.
+    :param opcode: optional frame opcode.
+    :param max_buffer_size: optional write buffer limit in bytes.
+    :return: the number of websockets ``message`` was written to.
+    '''
+    frames = {}
+    sent = 0
+    for websocket in websockets:
+        transport = websocket.transport
+        if (transport is None or transport.closing or
+                transport.writing_paused or
+                (max_buffer_size and
+                 transport.get_write_buffer_size() > max_buffer_size)):
+            continue
+        parser = websocket.parser
+        if isinstance(message, Frame):
+            data = message.msg
+        elif parser.masked or not parser.stateless:
+            data = parser.encode(message, opcode=opcode).msg
+        else:
+            key = (parser.version, parser.extensions)
+            data = frames.get(key)
+            if data is None:
+                data = parser.encode(message, opcode=opcode).msg
+                frames[key] = data
+        transport.write(data)
+        sent += 1
+    return sent
+
+
 @register_transport
 class WebSocket(wsgi.Router):
     """A :ref:`Router <wsgi-router>` for a websocket handshake.
@@ -35,15 +77,24 @@ class WebSocket(wsgi.Router):
     .. attribute:: parser_factory
 
         A factory of websocket frame parsers
+
+    .. attribute:: max_message_size
+
+        Optional maximum size in bytes of messages received. The connection
+        is failed when a client sends a larger message.
     """
     parser_factory = FrameParser
+    max_message_size = None
     _name = 'websocket'
 
-    def __init__(self, route, handle, parser_factory=None, **kwargs):
+    def __init__(self, route, handle, parser_factory=None,
+                 max_message_size=None, **kwargs):
         super(WebSocket, self).__init__(route, **kwargs)
         self.handle = handle
         if parser_factory:
             self.parser_factory = parser_factory
+        if max_message_size:
+            self.max_message_size = max_message_size
 
     @property
     def name(self):
@@ -100,9 +151,10 @@ class WebSocket(wsgi.Router):
         # Build the frame parser
         version = environ.get('HTTP_SEC_WEBSOCKET_VERSION')
         try:
-            parser = self.parser_factory(version=version,
-                                         protocols=ws_protocols,
-                                         extensions=ws_extensions)
+            parser = self.parser_factory(
+                version=version, protocols=ws_protocols,
+                extensions=ws_extensions,
+                max_message_size=self.max_message_size)
         except ProtocolError as e:
             raise HttpException(str(e), status=400)
         headers = [('Sec-WebSocket-Accept', self.challenge_response(key))]
@@ -75,3 +75,9 @@ class WSGIServer(SocketServer):
         initialisation.'''
         c = self.cfg
         return partial(HttpServerResponse, self.callable, c, c.server_software)
+
+    def preload(self, monitor):
+        '''Build the handler of a :class:`LazyWsgi` callable in the arbiter
+        so that forked workers share it.'''
+        if isinstance(self.callable, LazyWsgi):
+            self.callable.handler
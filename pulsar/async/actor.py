@@ -164,6 +164,12 @@ class Actor(EventHandler, Pulsar, ActorIdentity, Coverage):
         The :class:`TimedCall` for the next
         :ref:`actor periodic task <actor-periodic-task>`.
 
+    .. attribute:: event_loop_lag
+
+        Number of seconds the last
+        :ref:`actor periodic task <actor-periodic-task>` was run after its
+        deadline. A large value indicates a busy :attr:`event_loop`.
+
     .. attribute:: stream
 
         A ``stream`` handler to write information messages without using
@@ -175,6 +181,7 @@ class Actor(EventHandler, Pulsar, ActorIdentity, Coverage):
     mailbox = None
     signal_queue = None
     next_periodic_task = None
+    event_loop_lag = 0
 
     def __init__(self, impl):
         super(Actor, self).__init__()
@@ -363,6 +370,8 @@ status and performance. The dictionary contains the following entries:
   actor.
 * ``extra`` the :attr:`extra` attribute (which you can use to add stuff).
 * ``system`` system info.
+* ``thread_pool`` the :meth:`ThreadPool.info` of the :attr:`thread_pool`,
+  if available.
 
 This method is invoked when you run the
 :ref:`info command <actor_info_command>` from another actor.
@@ -379,12 +388,15 @@ This method is invoked when you run the
                  'is_process': isp,
                  'age': self.impl.age}
         events = {'callbacks': len(self.event_loop._callbacks),
-                  'io_loops': self.event_loop.num_loops}
+                  'io_loops': self.event_loop.num_loops,
+                  'lag': self.event_loop_lag}
         data = {'actor': actor,
                 'events': events,
                 'extra': self.extra}
         if isp:
             data['system'] = system.system_info(self.pid)
+        if self._thread_pool:
+            data['thread_pool'] = self._thread_pool.info()
         self.fire_event('on_info', info=data)
         return data
 
@@ -167,6 +167,20 @@ class Arbiter(PoolMixin):
         self.monitors[m.aid] = m
         return m
 
+    def reload(self, name=None):
+        '''Rolling restart of the workers of the :class:`Monitor` ``name``.
+
+        If ``name`` is not given, the workers of all monitors are restarted.
+        Check the :meth:`PoolMixin.restart` method for details.
+
+        :return: the number of workers scheduled for restart.
+        '''
+        num = 0
+        for m in list(itervalues(self.monitors)):
+            if name is None or m.name == name:
+                num += m.restart()
+        return num
+
     def close_monitors(self):
         '''Close all :class:`Monitor` at once.
         '''
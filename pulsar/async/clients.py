@@ -2,10 +2,12 @@ import socket
 import sys
 import math
 import logging
+from collections import OrderedDict
 from functools import partial, reduce
 from threading import Lock
 
-from pulsar.utils.pep import get_event_loop, new_event_loop, itervalues, range
+from pulsar.utils.pep import (get_event_loop, new_event_loop, itervalues,
+                              range, default_timer)
 from pulsar.utils.internet import is_socket_closed
 
 from .defer import Failure, is_failure, multi_async
@@ -77,16 +79,38 @@ class ConnectionPool(ConnectionProducer):
 
     It maintains a live set of :class:`Connection`.
 
+    Available connections are not probed when selected. A connection closed
+    by the remote server while available is discarded as soon as the event
+    loop detects the end of file (the transport is closed and the
+    ``connection_lost`` event fired). Synchronous clients, whose event loop
+    is not running between requests, still probe the socket.
+
     .. attribute:: address
 
         Address to connect to
+
+    .. attribute:: max_idle
+
+        Maximum number of seconds a connection can stay available before it
+        is discarded. ``0`` means no limit.
+
+    .. attribute:: max_lifetime
+
+        Maximum number of seconds a connection can be reused after it was
+        created. ``0`` means no limit.
     '''
-    def __init__(self, request, **params):
+    def __init__(self, request, max_idle=0, max_lifetime=0, **params):
         params['timeout'] = request.timeout
         self.lock = Lock()
         super(ConnectionPool, self).__init__(**params)
         self._address = request.address
-        self._available_connections = set()
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        # available connections with the time they were released
+        self._available_connections = OrderedDict()
+        self._created = {}
+        self._reused = 0
+        self._discarded = 0
 
     def __repr__(self):
         return repr(self.address)
@@ -106,6 +130,27 @@ class ConnectionPool(ConnectionProducer):
         '''
         return len(self._available_connections)
 
+    @property
+    def reused(self):
+        '''Number of times an available connection was reused.'''
+        return self._reused
+
+    @property
+    def discarded(self):
+        '''Number of connections discarded.
+
+        A connection is discarded when it cannot be reused after a request,
+        when it is closed while available or when it exceeds the
+        :attr:`max_idle` or :attr:`max_lifetime` limits.
+        '''
+        return self._discarded
+
+    def new_connection(self, consumer_factory, producer=None):
+        connection = super(ConnectionPool, self).new_connection(
+            consumer_factory, producer)
+        self._created[connection] = default_timer()
+        return connection
+
     def release_connection(self, connection, response=None):
         '''Releases the ``connection`` back to the pool.
 
@@ -117,11 +162,40 @@ class ConnectionPool(ConnectionProducer):
             the connection. It is passed to the
             :meth:`Client.can_reuse_connection` method to check if the
             connection can be reused.
+
+        A reusable connection which exceeded the :attr:`max_lifetime` is
+        closed rather than added to the available connections.
         '''
         with self.lock:
             self._concurrent_connections.discard(connection)
-            if connection.producer.can_reuse_connection(connection, response):
-                self._available_connections.add(connection)
+            if not connection.producer.can_reuse_connection(connection,
+                                                            response):
+                return
+            now = default_timer()
+            if not self._expired(connection, now, now):
+                self._available_connections[connection] = now
+                return
+            self._discarded += 1
+        connection.close()
+
+    def prune(self):
+        '''Close available connections which exceeded the :attr:`max_idle` or
+        :attr:`max_lifetime` limits.
+
+        :return: the number of connections closed.
+        '''
+        stale_connections = []
+        now = default_timer()
+        with self.lock:
+            for connection, released in list(
+                    self._available_connections.items()):
+                if self._expired(connection, released, now):
+                    self._available_connections.pop(connection)
+                    stale_connections.append(connection)
+            self._discarded += len(stale_connections)
+        for connection in stale_connections:
+            connection.close()
+        return len(stale_connections)
 
     def get_or_create_connection(self, client, connection=None):
         '''Get or create a new connection for ``client``.
@@ -135,44 +209,66 @@ class ConnectionPool(ConnectionProducer):
         then it is chosen ahead of others in the pool.
         '''
         stale_connections = []
+        now = default_timer()
+        available = self._available_connections
+        # The event loop of a synchronous client does not run between
+        # requests and cannot detect closed sockets
+        probe = client.force_sync
         with self.lock:
             if connection:
-                if connection in self._available_connections:
-                    self._available_connections.remove(connection)
-                elif not (connection in self._concurrent_connections and
-                          connection.current_consumer is None):
-                    connection = None
+                released = available.pop(connection, None)
+                if released is None:
+                    if not (connection in self._concurrent_connections and
+                            connection.current_consumer is None):
+                        connection = None
+                    else:
+                        released = now
                 if connection:
-                    sock = connection.sock
-                    closed = is_socket_closed(sock)
-                    if closed:
-                        if sock:
-                            stale_connections.append(connection)
+                    if self._expired(connection, released, now, probe):
+                        stale_connections.append(connection)
                         connection = None
                     else:
                         self._concurrent_connections.add(connection)
-            if not connection:
-                try:
-                    closed = True
-                    while closed:
-                        connection = self._available_connections.pop()
-                        sock = connection.sock
-                        closed = is_socket_closed(sock)
-                        if closed and sock:
-                            stale_connections.append(connection)
-                except KeyError:
+            while not connection and available:
+                # the most recently released connection first
+                connection, released = available.popitem()
+                if self._expired(connection, released, now, probe):
+                    stale_connections.append(connection)
                     connection = None
                 else:
                     # we have a connection, lets added it to the concurrent set
                     self._concurrent_connections.add(connection)
+            if connection:
+                self._reused += 1
+            self._discarded += len(stale_connections)
         for sc in stale_connections:
-            sc.transport.close()
+            sc.close()
         if connection is None:
             # build the new connection
             connection = self.new_connection(client.consumer_factory,
                                              producer=client)
         return connection
 
+    #   INTERNALS
+    def _expired(self, connection, released, now, probe=False):
+        if connection.closed:
+            return True
+        elif probe and is_socket_closed(connection.sock):
+            return True
+        elif self.max_idle and now - released > self.max_idle:
+            return True
+        elif self.max_lifetime:
+            created = self._created.get(connection, now)
+            return now - created > self.max_lifetime
+        return False
+
+    def _connection_lost(self, connection, exc):
+        with self.lock:
+            self._created.pop(connection, None)
+            if self._available_connections.pop(connection, None) is not None:
+                self._discarded += 1
+        return super(ConnectionPool, self)._connection_lost(connection, exc)
+
 
 def release_response_connection(response):
     '''Added as a post_request callback to release the connection.
@@ -234,6 +330,8 @@ class Client(Producer):
         :attr:`connection_pool`.
         The :attr:`connection_pool` can also be set at class level.
     :param max_reconnect: set the :attr:`max_reconnect` attribute.
+    :param max_idle: set the :attr:`max_idle` attribute.
+    :param max_lifetime: set the :attr:`max_lifetime` attribute.
     :param consumer_factory: set the :meth:`consumer_factory` callable.
     :parameter client_version: optional version string for this
         :class:`Client`.
@@ -271,6 +369,12 @@ class Client(Producer):
     '''An optional version for this client.'''
     reconnecting_gap = 2
     '''Reconnecting gap in seconds.'''
+    max_idle = 0
+    '''Maximum number of seconds a connection can stay idle in a
+    :class:`ConnectionPool` before being closed. ``0`` means no limit.'''
+    max_lifetime = 0
+    '''Maximum number of seconds a connection is reused after being created.
+    ``0`` means no limit.'''
     ONE_TIME_EVENTS = ('finish',)
     MANY_TIMES_EVENTS = ('connection_made', 'pre_request', 'post_request',
                          'connection_lost')
@@ -278,7 +382,8 @@ class Client(Producer):
     def __init__(self, connection_factory=None, timeout=None,
                  client_version=None, connection_pool=None, trust_env=True,
                  max_connections=None, consumer_factory=None, event_loop=None,
-                 max_reconnect=None, force_sync=False, **params):
+                 max_reconnect=None, force_sync=False, max_idle=None,
+                 max_lifetime=None, **params):
         super(Client, self).__init__(connection_factory=connection_factory,
                                      timeout=timeout,
                                      max_connections=max_connections)
@@ -294,6 +399,11 @@ class Client(Producer):
             self.connection_pools = {}
         if max_reconnect:
             self.max_reconnect = max_reconnect
+        if max_idle is not None:
+            self.max_idle = max_idle
+        if max_lifetime is not None:
+            self.max_lifetime = max_lifetime
+        self._pruning = None
         self.force_sync = force_sync
         self.event_loop = event_loop
         self.setup(**params)
@@ -316,6 +426,27 @@ class Client(Producer):
                                            itervalues(self.connection_pools)),
                       0)
 
+    @property
+    def connections_created(self):
+        '''Total number of connections created.'''
+        return reduce(lambda x, y: x + y, (p.received for p in
+                                           itervalues(self.connection_pools)),
+                      0)
+
+    @property
+    def connections_reused(self):
+        '''Total number of times an available connection was reused.'''
+        return reduce(lambda x, y: x + y, (p.reused for p in
+                                           itervalues(self.connection_pools)),
+                      0)
+
+    @property
+    def connections_discarded(self):
+        '''Total number of connections discarded by the connection pools.'''
+        return reduce(lambda x, y: x + y, (p.discarded for p in
+                                           itervalues(self.connection_pools)),
+                      0)
+
     @property
     def closed(self):
         '''``True`` if the :meth:`close` was invoked on this :class:`Client`.
@@ -441,8 +572,15 @@ class Client(Producer):
                 pool = self.connection_pool(
                     request,
                     max_connections=self.max_connections,
-                    connection_factory=self.connection_factory)
+                    connection_factory=self.connection_factory,
+                    max_idle=self.max_idle,
+                    max_lifetime=self.max_lifetime)
                 self.connection_pools[request.key] = pool
+                if self._pruning is None and (self.max_idle or
+                                              self.max_lifetime):
+                    self._pruning = True
+                    self.get_event_loop().call_soon_threadsafe(
+                        self._schedule_pruning)
         return pool.get_or_create_connection(self, connection)
 
     def update_parameters(self, parameter_list, params):
@@ -490,6 +628,33 @@ class Client(Producer):
         to finish.'''
         self.close(async=False)
 
+    def prune_connections(self):
+        '''Close available connections which exceeded the :attr:`max_idle`
+        or :attr:`max_lifetime` limits in all :attr:`connection_pools`.
+
+        It is called periodically in the :meth:`get_event_loop` when one of
+        the limits is set.
+
+        :return: the number of connections closed.
+        '''
+        pools = list(itervalues(self.connection_pools))
+        return reduce(lambda x, y: x + y, (p.prune() for p in pools), 0)
+
+    #   INTERNALS
+    def _schedule_pruning(self):
+        limits = [v for v in (self.max_idle, self.max_lifetime) if v]
+        if limits and not self.closed:
+            self._pruning = self.get_event_loop().call_later(
+                min(limits), self._prune)
+        else:
+            self._pruning = False
+
+    def _prune(self):
+        try:
+            self.prune_connections()
+        finally:
+            self._schedule_pruning()
+
     #def reconnect_time_lag(self, lag):
     #    lag = self.reconnect_time_lag*(math.log(lag) + 1)
     #    return round(lag, 1)
@@ -1,6 +1,7 @@
 from time import time
 
 from pulsar import CommandError
+from pulsar.utils.pep import default_timer
 
 from .defer import async_while
 from .proxy import command, ActorProxyMonitor
@@ -51,6 +52,7 @@ The command perform the following actions:
 
 * Update the mailbox to the current consumer of the actor connection
 * Update the info dictionary
+* Record the ``spawn_time`` of the actor the first time it is notified
 * Returns the time of the update
 '''
     t = time()
@@ -65,6 +67,12 @@ The command perform the following actions:
         if callback:
             remote_actor.callback = None
             callback.callback(remote_actor)
+        if remote_actor.spawn_time is None:
+            remote_actor.spawn_time = (default_timer() -
+                                       remote_actor.spawning_start)
+            request.actor.logger.debug('%s spawned in %.3f seconds',
+                                       remote_actor, remote_actor.spawn_time)
+        info['spawn_time'] = remote_actor.spawn_time
     return t
 
 
@@ -80,6 +88,35 @@ def info(request):
     return request.actor.info()
 
 
+@command()
+def reload(request, name=None):
+    '''Rolling restart of the workers of the monitor ``name``, or of all
+monitors if ``name`` is not given. This command can only be executed by the
+arbiter::
+
+    send('arbiter', 'reload')
+
+Return the number of workers scheduled for restart.
+'''
+    arb = request.actor
+    if arb.is_arbiter():
+        return arb.reload(name)
+
+
+@command()
+def recycle(request):
+    '''Ask the monitor to replace the calling actor with a new one::
+
+    send('monitor', 'recycle')
+
+The new actor is spawned before the caller is stopped.
+Return the number of actors waiting to be restarted.
+'''
+    pool = request.actor
+    if isinstance(request.caller, ActorProxyMonitor) and pool.is_monitor():
+        return pool.restart([request.caller])
+
+
 @command()
 def kill_actor(request, aid, timeout=5):
     '''Kill an actor with id ``aid``. This command can only be executed by the
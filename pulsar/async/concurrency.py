@@ -141,6 +141,11 @@ This is an internal method called periodically by the :attr:`Actor.event_loop`
 to ping the actor monitor. If successful return a :class:`Deferred` called
 back with the acknowledgement from the monitor.
 '''
+        handler = actor.next_periodic_task
+        if handler is not None and handler.deadline:
+            # how late the event loop run this periodic task
+            actor.event_loop_lag = max(
+                actor.event_loop.timer() - handler.deadline, 0)
         actor.next_periodic_task = None
         ack = None
         if actor.is_running():
@@ -281,6 +286,8 @@ to be spawned.'''
         if actor.is_running():
             interval = MONITOR_TASK_PERIOD
             actor.manage_actors()
+            actor.autoscale()
+            actor.restart_actors()
             actor.spawn_actors()
             actor.stop_actors()
             actor.monitor_task()
@@ -302,6 +309,23 @@ class ArbiterConcurrency(MonitorMixin, ProcessMixin, Concurrency):
     def is_arbiter(self):
         return True
 
+    def setup_event_loop(self, actor):
+        '''Install the reload signal handlers in addition to the exit
+        signal handlers.'''
+        super(ArbiterConcurrency, self).setup_event_loop(actor)
+        if signal:
+            for sig in system.RELOAD_SIGNALS:
+                try:
+                    actor.event_loop.add_signal_handler(
+                        sig, self.handle_reload_signal, actor)
+                except ValueError:
+                    pass
+
+    def handle_reload_signal(self, actor, sig, frame):
+        actor.logger.warning("Got %s. Restarting workers.",
+                             system.SIG_NAMES.get(sig))
+        actor.event_loop.call_soon_threadsafe(actor.reload)
+
     def before_start(self, actor):  # pragma    nocover
         '''Daemonise the system if required.
         '''
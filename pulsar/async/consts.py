@@ -51,6 +51,9 @@ ACTOR_JOIN_THREAD_POOL_TIMEOUT = 5  # TIMEOUT WHEN JOINING THE THREAD POOL
 MONITOR_TASK_PERIOD = 2
 '''Interval for :class:`pulsar.Monitor` and :class:`pulsar.Arbiter`
 periodic task.'''
+AUTOSCALE_SUSTAIN = 10  # SECONDS OF HIGH LOAD BEFORE ADDING A WORKER
+AUTOSCALE_COOLDOWN = 30  # SECONDS BETWEEN TWO AUTOSCALING ACTIONS
+AUTOSCALE_LOW_WATER = 0.3  # NORMALISED LOAD BELOW WHICH A POOL IS IDLE
 #
 # SPECIAL objects for Deferred
 CONTINUE = object()
@@ -488,7 +488,8 @@ default signal handler ``signal.SIG_DFL``.'''
 
     def start_serving(self, protocol_factory, host=None, port=None, ssl=None,
                       family=socket.AF_UNSPEC, flags=socket.AI_PASSIVE,
-                      sock=None, backlog=100, reuse_address=None):
+                      sock=None, backlog=100, reuse_address=None,
+                      reuse_port=False):
         """Creates a TCP server bound to ``host`` and ``port``.
 
         :param protocol_factory: The :class:`Protocol` which handle server
@@ -512,11 +513,15 @@ default signal handler ``signal.SIG_DFL``.'''
             ``TIME_WAIT`` state, without waiting for its natural timeout to
             expire. If not specified will automatically be set to ``True``
             on UNIX.
+        :param reuse_port: tells the kernel to allow several sockets to
+            listen on the same address and to distribute connections
+            across them (``SO_REUSEPORT``). Default ``False``.
         :return: a :class:`Deferred` whose result will be a list of socket
             objects which will later be handled by ``protocol_factory``.
         """
         res = start_serving(self, protocol_factory, host, port, ssl,
-                            family, flags, sock, backlog, reuse_address)
+                            family, flags, sock, backlog, reuse_address,
+                            reuse_port)
         return self.async(res)
 
     def create_datagram_endpoint(self, protocol_factory, local_addr=None,
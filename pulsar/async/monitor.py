@@ -2,7 +2,7 @@ import sys
 from time import time
 
 import pulsar
-from pulsar.utils.pep import iteritems, itervalues, range
+from pulsar.utils.pep import iteritems, itervalues, range, default_timer
 
 from . import proxy
 from .actor import Actor
@@ -11,7 +11,7 @@ from .concurrency import concurrency
 from .consts import *
 
 
-__all__ = ['Monitor', 'PoolMixin']
+__all__ = ['Monitor', 'PoolMixin', 'AutoScaler']
 
 
 def _spawn_actor(cls, monitor, cfg=None, name=None, aid=None, **kw):
@@ -63,6 +63,98 @@ def _spawn_actor(cls, monitor, cfg=None, name=None, aid=None, **kw):
         return deferred
 
 
+class AutoScaler(object):
+    '''Load-based policy for the number of actors in a :class:`PoolMixin`.
+
+    The load of an actor is obtained from the information it sends to its
+    monitor with the ``notify`` command and it is normalised so that
+    ``1`` is the high load threshold given by the
+    :ref:`autoscale_load <setting-autoscale_load>` and
+    :ref:`autoscale_lag <setting-autoscale_lag>` settings.
+
+    The pool grows by one actor once the average load stays above ``1``
+    for :data:`AUTOSCALE_SUSTAIN` seconds and it shrinks by one actor once
+    the average load stays below :data:`AUTOSCALE_LOW_WATER` for
+    :ref:`autoscale_idle <setting-autoscale_idle>` seconds. The gap between
+    the two thresholds provides hysteresis, while two actions are always
+    separated by at least :data:`AUTOSCALE_COOLDOWN` seconds.
+
+    .. attribute:: workers
+
+        The number of actors the pool should have.
+    '''
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.workers = cfg.workers
+        self.load = 0
+        self._high_since = None
+        self._low_since = None
+        self._last_scaled = None
+
+    @property
+    def min_workers(self):
+        return min(max(self.cfg.min_workers, 1), self.max_workers)
+
+    @property
+    def max_workers(self):
+        return max(self.cfg.max_workers, 1)
+
+    def actor_load(self, info):
+        '''Normalised load of an actor from its ``info`` dictionary.'''
+        cfg = self.cfg
+        load = 0
+        if cfg.autoscale_load:
+            requests = info.get('actor', {}).get('concurrent_requests', 0)
+            load = requests/float(cfg.autoscale_load)
+        if cfg.autoscale_lag:
+            lag = info.get('events', {}).get('lag', 0)
+            load = max(load, lag/cfg.autoscale_lag)
+        return load
+
+    def __call__(self, infos, now=None):
+        '''Update :attr:`workers` from the list of actors ``infos``.
+
+        :param infos: list of ``info`` dictionaries of the actors in the pool.
+        :param now: optional current time.
+        :return: the number of actors the pool should have.
+        '''
+        now = default_timer() if now is None else now
+        lo, hi = self.min_workers, self.max_workers
+        workers = min(max(self.workers, lo), hi)
+        if infos:
+            self.load = sum((self.actor_load(i) for i in infos))/len(infos)
+            cool = (self._last_scaled is None or
+                    now - self._last_scaled >= AUTOSCALE_COOLDOWN)
+            if self.load >= 1:
+                self._low_since = None
+                if self._high_since is None:
+                    self._high_since = now
+                if (cool and workers < hi and
+                        now - self._high_since >= AUTOSCALE_SUSTAIN):
+                    workers += 1
+                    self._high_since = None
+                    self._last_scaled = now
+            elif self.load < AUTOSCALE_LOW_WATER:
+                self._high_since = None
+                if self._low_since is None:
+                    self._low_since = now
+                if (cool and workers > lo and
+                        now - self._low_since >= self.cfg.autoscale_idle):
+                    workers -= 1
+                    self._low_since = None
+                    self._last_scaled = now
+            else:
+                self._high_since = self._low_since = None
+        self.workers = workers
+        return workers
+
+    def info(self):
+        return {'workers': self.workers,
+                'min_workers': self.min_workers,
+                'max_workers': self.max_workers,
+                'load': self.load}
+
+
 class PoolMixin(Actor):
     '''Not an actor per se, this is a mixin for :class:`Actor`
 which manages a pool (group) of actors. Given an :attr:`actor_class`
@@ -79,8 +171,20 @@ It is used by both the :class:`Arbiter` and the :class:`Monitor` classes.
 
     list of :class:`ActorProxyMonitor` which have been terminated
     (the remote actor did not have a cleaned shutdown).
+
+.. attribute:: autoscaler
+
+    The :class:`AutoScaler` managing the number of actors when the
+    :ref:`max_workers <setting-max_workers>` setting is greater than zero,
+    otherwise ``None``.
+
+.. attribute:: restarting
+
+    list of :class:`ActorProxyMonitor` waiting to be replaced by a
+    :meth:`restart`.
 '''
     CLOSE_TIMEOUT = 30000000000000
+    autoscaler = None
     actor_class = Actor
     '''The class derived form :class:`Actor` which the monitor manages
 during its life time.
@@ -91,8 +195,21 @@ during its life time.
         super(PoolMixin, self).__init__(impl)
         self.managed_actors = {}
         self.terminated_actors = []
+        self.restarting = []
         self.actor_class = self.params.pop('actor_class') or self.actor_class
 
+    @property
+    def num_workers(self):
+        '''The number of actors this pool should have.
+
+        It is given by the :ref:`workers <setting-workers>` setting unless
+        autoscaling is enabled, in which case it is managed by the
+        :attr:`autoscaler`.
+        '''
+        if self.autoscaler and self.cfg.workers and self.cfg.max_workers:
+            return self.autoscaler.workers
+        return self.cfg.workers
+
     def get_actor(self, aid):
         aid = getattr(aid, 'aid', aid)
         if aid == self.aid:
@@ -181,30 +298,96 @@ the timeout, stop the actor.
                 self.send(actor, 'stop')
         return 1
 
+    def autoscale(self):
+        '''Adjust :attr:`num_workers` to the load of the managed actors.
+
+        It does nothing unless the :ref:`max_workers <setting-max_workers>`
+        setting is greater than zero. The policy is implemented by the
+        :class:`AutoScaler` stored in the :attr:`autoscaler` attribute.
+        '''
+        if self.cfg.workers and self.cfg.max_workers:
+            if self.autoscaler is None:
+                self.autoscaler = AutoScaler(self.cfg)
+            infos = [a.info for a in itervalues(self.managed_actors)
+                     if a.info and not a.stopping_start]
+            workers = self.autoscaler.workers
+            if self.autoscaler(infos) != workers:
+                self.logger.info('Autoscaling to %s workers. Load %.2f',
+                                 self.autoscaler.workers,
+                                 self.autoscaler.load)
+
+    def restart(self, actors=None):
+        '''Schedule a rolling restart of ``actors``.
+
+        Actors are replaced one at a time by the :meth:`restart_actors`
+        method, so that the pool never runs below :attr:`num_workers`.
+
+        :param actors: optional list of :class:`ActorProxyMonitor` to restart.
+            If not given, all managed actors are restarted.
+        :return: the number of actors waiting to be restarted.
+        '''
+        if actors is None:
+            actors = sorted(itervalues(self.managed_actors),
+                            key=lambda a: a.impl.age)
+        for actor in actors:
+            if (actor.aid in self.managed_actors and
+                    not actor.stopping_start and
+                    actor not in self.restarting):
+                self.restarting.append(actor)
+        return len(self.restarting)
+
+    def restart_actors(self):
+        '''Replace the next actor scheduled by :meth:`restart`.
+
+        A new actor is spawned first. Once it has notified the pool, the old
+        actor is gracefully stopped and the replacement of the next one is
+        spawned.
+        '''
+        old = [a for a in self.restarting
+               if a.aid in self.managed_actors and not a.stopping_start]
+        if old:
+            fresh = [a for a in itervalues(self.managed_actors)
+                     if not a.stopping_start and a not in old]
+            if not [a for a in fresh if a.spawn_time is None]:
+                if len(fresh) + len(old) > self.num_workers:
+                    self.manage_actor(old.pop(0), True)
+                if old:
+                    self.spawn()
+            if not old:
+                self.logger.info('Restart completed')
+        self.restarting = old
+
     def spawn_actors(self):
         '''Spawn new actors if needed. If the :class:`PoolMixin` is spawning
 do nothing.'''
-        to_spawn = self.cfg.workers - len(self.managed_actors)
-        if self.cfg.workers and to_spawn > 0:
+        num_workers = self.num_workers
+        to_spawn = num_workers - len(self.managed_actors)
+        if num_workers and to_spawn > 0:
             for _ in range(to_spawn):
                 self.spawn()
 
     def stop_actors(self):
         """Maintain the number of workers by spawning or killing
 as required."""
-        if self.cfg.workers:
-            num_to_kill = len(self.managed_actors) - self.cfg.workers
+        num_workers = self.num_workers
+        # During a restart the additional actor is managed by restart_actors
+        if num_workers and not self.restarting:
+            active = [w for w in itervalues(self.managed_actors)
+                      if not w.stopping_start]
+            num_to_kill = len(active) - num_workers
             for i in range(num_to_kill, 0, -1):
-                w, kage = 0, sys.maxsize
-                for worker in itervalues(self.managed_actors):
+                w, kage = None, sys.maxsize
+                for worker in active:
                     age = worker.impl.age
                     if age < kage:
-                        w, kage = w, age
+                        w, kage = worker, age
+                active.remove(w)
                 self.manage_actor(w, True)
 
     def close_actors(self):
         '''Close all managed :class:`Actor`.'''
-        return async_while(2*ACTOR_ACTION_TIMEOUT, self.manage_actors, True)
+        timeout = 2*ACTOR_ACTION_TIMEOUT + self.cfg.get('graceful_timeout', 0)
+        return async_while(timeout, self.manage_actors, True)
 
 
 class Monitor(PoolMixin):
@@ -250,6 +433,10 @@ class Monitor(PoolMixin):
                           'name': self.name,
                           'age': self.impl.age,
                           'workers': len(self.managed_actors)}}
+        if self.autoscaler:
+            data['actor']['autoscale'] = self.autoscaler.info()
+        if self.restarting:
+            data['actor']['restarting'] = len(self.restarting)
         if not self.started():
             return data
         data['workers'] = [a.info for a in itervalues(self.managed_actors)
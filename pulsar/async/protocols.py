@@ -638,6 +638,19 @@ class ConnectionProducer(Producer):
             logger().info('%s closing %d connections', self, len(all))
         return multi_async(all)
 
+    def close_idle_connections(self, async=True):
+        '''Close connections which are not processing a request.
+
+        :return: the number of connections still processing a request.
+        '''
+        busy = 0
+        for connection in list(self._concurrent_connections):
+            if connection.current_consumer is None:
+                connection.close(async)
+            else:
+                busy += 1
+        return busy
+
     #   INTERNALS
     def _connection_made(self, connection, _):
         self._concurrent_connections.add(connection)
@@ -163,6 +163,12 @@ class ActorProxyMonitor(ActorProxy):
 
         Dictionary of information regarding the remote :class:`Actor`
 
+    .. attribute:: spawn_time
+
+        Seconds between the start of the remote actor and its first
+        notification to the monitor. ``None`` until the remote actor has
+        notified the monitor.
+
     .. attribute:: mailbox
 
         This is the connection with the remote actor. It is available once the
@@ -179,6 +185,7 @@ class ActorProxyMonitor(ActorProxy):
         self.mailbox = None
         self.callback = None
         self.spawning_start = None
+        self.spawn_time = None
         self.stopping_start = None
         super(ActorProxyMonitor, self).__init__(impl)
 
@@ -236,4 +243,7 @@ class ActorProxyMonitor(ActorProxy):
             return False
         else:
             dt = default_timer() - self.stopping_start
-            return dt if dt >= ACTOR_ACTION_TIMEOUT else False
+            # give time to drain connections before terminating
+            timeout = (ACTOR_ACTION_TIMEOUT +
+                       self.cfg.get('graceful_timeout', 0))
+            return dt if dt >= timeout else False
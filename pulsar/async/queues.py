@@ -22,6 +22,9 @@ class errback:
 
 class Queue:
     '''Asynchronous FIFO queue.
+
+    Subclasses can change the order in which items are retrieved by
+    overriding the ``_init``, ``_put``, ``_get`` and :meth:`qsize` methods.
     '''
     def __init__(self, maxsize=0, event_loop=None):
         if event_loop:
@@ -30,10 +33,19 @@ class Queue:
             self._event_loop = get_event_loop()
         self._lock = Lock()
         self._maxsize = max(maxsize or 0, 0)
-        self._queue = deque()
+        self._init()
         self._waiting = deque()
         self._putters = deque()
 
+    def _init(self):
+        self._queue = deque()
+
+    def _put(self, item):
+        self._queue.append(item)
+
+    def _get(self):
+        return self._queue.popleft()
+
     @property
     def maxsize(self):
         '''Integer representing the upper bound limit on the number of items
@@ -91,9 +103,9 @@ If :attr:`maxsize` is less than or equal to zero, there is no upper bound.'''
                         raise Full
                 else:
                     # slots available, append to queue
-                    self._queue.append(item)
+                    self._put(item)
             else:
-                assert not self._queue, 'queue non-empty with waiting getters'
+                assert not self.qsize(), 'queue non-empty with waiting getters'
         if getter:
             getter.callback(item)
         elif wait and not waiter:
@@ -128,14 +140,14 @@ If :attr:`maxsize` is less than or equal to zero, there is no upper bound.'''
                 new_item, putter = self._putters.popleft()
                 if not putter.done():
                     assert self.full(), 'queue non-full with putters'
-                    self._queue.append(new_item)
+                    self._put(new_item)
                     if wait:
                         self._event_loop.call_soon(putter.callback, None)
                     else:
                         putter.callback(None)
                     break
             if self.qsize():
-                item = self._queue.popleft()
+                item = self._get()
                 if wait:
                     d = Deferred()
                     d.callback(item)
@@ -21,11 +21,12 @@ import sys
 import socket
 from functools import partial
 
-from pulsar.utils.exceptions import PulsarException
+from pulsar.utils.exceptions import PulsarException, TooManyConnections
 from pulsar.utils.internet import (TRY_WRITE_AGAIN, TRY_READ_AGAIN,
                                    ACCEPT_ERRORS, EWOULDBLOCK, EPERM,
                                    format_address, ssl_context, ssl,
-                                   ESHUTDOWN, WRITE_BUFFER_MAX_SIZE)
+                                   ESHUTDOWN, WRITE_BUFFER_MAX_SIZE,
+                                   SO_REUSEPORT)
 from pulsar.utils.structures import merge_prefix
 
 from .consts import NUMBER_ACCEPTS
@@ -93,6 +94,15 @@ be accumulating data in an internal buffer.'''
                 self._event_loop.add_writer(self._sock_fd, self._write_ready)
             self._paused_writing = False
 
+    @property
+    def writing_paused(self):
+        '''``True`` when writing is suspended by :meth:`pause_writing`.'''
+        return self._paused_writing
+
+    def get_write_buffer_size(self):
+        '''Number of bytes in the write buffer, waiting to be sent.'''
+        return sum(len(data) for data in self._write_buffer)
+
     def write(self, data):
         '''Write chunk of ``data`` to the endpoint.
         '''
@@ -307,6 +317,14 @@ class TcpServer(Server):
                                     ).add_both(partial(self.fire_event,
                                                        'start'))
 
+    def protocol_factory(self):
+        '''Override :meth:`pulsar.Server.protocol_factory` to stop serving
+        once :attr:`max_connections` connections have been received.'''
+        protocol = super(TcpServer, self).protocol_factory()
+        if self.received >= self.max_connections:
+            self.stop_serving()
+        return protocol
+
     def stop_serving(self):
         '''Stop serving the :class:`pulsar.Server.sock`'''
         if self._sock:
@@ -407,52 +425,87 @@ def create_connection(event_loop, protocol_factory, host, port, ssl,
     yield transport, protocol
 
 
+def server_socket(family, address, socktype=socket.SOCK_STREAM, proto=0,
+                  reuse_address=True, reuse_port=False, socket_factory=None):
+    '''Create a socket of ``family`` bound to ``address``.
+
+    :param reuse_address: set the ``SO_REUSEADDR`` option.
+    :param reuse_port: set the ``SO_REUSEPORT`` option so that several
+        sockets can listen on the same address. The kernel distributes
+        incoming connections across them.
+    :return: the bound socket, not yet listening.
+    '''
+    socket_factory = socket_factory or socket.socket
+    sock = socket_factory(family, socktype, proto)
+    try:
+        if reuse_address:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
+        if reuse_port:
+            if SO_REUSEPORT is None:
+                raise ValueError('SO_REUSEPORT not supported')
+            sock.setsockopt(socket.SOL_SOCKET, SO_REUSEPORT, True)
+        # Disable IPv4/IPv6 dual stack support (enabled by
+        # default on Linux) which makes a single socket
+        # listen on both address families.
+        if family == AF_INET6 and hasattr(socket, 'IPPROTO_IPV6'):
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, True)
+        try:
+            sock.bind(address)
+        except socket.error as err:
+            raise socket.error(err.errno, 'error while attempting '
+                               'to bind on address %r: %s'
+                               % (address, err.strerror.lower()))
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def create_server_sockets(event_loop, host, port, family=socket.AF_UNSPEC,
+                          flags=socket.AI_PASSIVE, reuse_address=None,
+                          reuse_port=False):
+    '''Coroutine which creates the sockets bound to ``host`` and ``port``.
+
+    The sockets are not listening. Check the :func:`server_socket` function
+    for information about ``reuse_address`` and ``reuse_port``.'''
+    if reuse_address is None:
+        reuse_address = os.name == 'posix' and sys.platform != 'cygwin'
+    sockets = []
+    if host == '':
+        host = None
+
+    infos = yield event_loop.getaddrinfo(
+        host, port, family=family,
+        type=socket.SOCK_STREAM, proto=0, flags=flags)
+    if not infos:
+        raise socket.error('getaddrinfo() returned empty list')
+    #
+    socket_factory = getattr(event_loop, 'socket_factory', socket.socket)
+    completed = False
+    try:
+        for af, socktype, proto, canonname, sa in infos:
+            sockets.append(server_socket(af, sa, socktype, proto,
+                                         reuse_address, reuse_port,
+                                         socket_factory))
+        completed = True
+    finally:
+        if not completed:
+            for sock in sockets:
+                sock.close()
+    yield sockets
+
+
 def start_serving(event_loop, protocol_factory, host, port, ssl,
-                  family, flags, sock, backlog, reuse_address):
+                  family, flags, sock, backlog, reuse_address,
+                  reuse_port=False):
     #Coroutine which starts socket servers
     if host is not None or port is not None:
         if sock is not None:
             raise ValueError(
                 'host/port and sock can not be specified at the same time')
-        if reuse_address is None:
-            reuse_address = os.name == 'posix' and sys.platform != 'cygwin'
-        sockets = []
-        if host == '':
-            host = None
-
-        infos = yield event_loop.getaddrinfo(
-            host, port, family=family,
-            type=socket.SOCK_STREAM, proto=0, flags=flags)
-        if not infos:
-            raise socket.error('getaddrinfo() returned empty list')
-        #
-        socket_factory = getattr(event_loop, 'socket_factory', socket.socket)
-        completed = False
-        try:
-            for af, socktype, proto, canonname, sa in infos:
-                sock = socket_factory(af, socktype, proto)
-                sockets.append(sock)
-                if reuse_address:
-                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR,
-                                    True)
-                # Disable IPv4/IPv6 dual stack support (enabled by
-                # default on Linux) which makes a single socket
-                # listen on both address families.
-                if af == AF_INET6 and hasattr(socket, 'IPPROTO_IPV6'):
-                    sock.setsockopt(socket.IPPROTO_IPV6,
-                                    socket.IPV6_V6ONLY,
-                                    True)
-                try:
-                    sock.bind(sa)
-                except socket.error as err:
-                    raise socket.error(err.errno, 'error while attempting '
-                                       'to bind on address %r: %s'
-                                       % (sa, err.strerror.lower()))
-            completed = True
-        finally:
-            if not completed:
-                for sock in sockets:
-                    sock.close()
+        sockets = yield create_server_sockets(event_loop, host, port, family,
+                                              flags, reuse_address,
+                                              reuse_port)
     else:
         if sock is None:
             raise ValueError(
@@ -546,7 +599,11 @@ def sock_accept_connection(event_loop, protocol_factory, sock, ssl):
                     logger(event_loop).info('Could not accept new connection')
                     break
                 raise
-            protocol = protocol_factory()
+            try:
+                protocol = protocol_factory()
+            except TooManyConnections:
+                conn.close()
+                break
             if ssl:
                 SocketStreamSslTransport(event_loop, conn, protocol, ssl,
                                          extra={'addr': address})
@@ -1,6 +1,6 @@
 import logging
 from multiprocessing import dummy, current_process
-from threading import Lock
+from threading import Lock, current_thread
 from functools import partial
 
 try:
@@ -11,11 +11,11 @@ ThreadQueue = queue.Queue
 Empty = queue.Empty
 Full = queue.Full
 
-from pulsar.utils.pep import set_event_loop, new_event_loop
+from pulsar.utils.pep import set_event_loop, new_event_loop, default_timer
 from pulsar.utils.exceptions import StopEventLoop
 
-from .access import get_actor, set_actor, thread_local_data, LOGGER
-from .defer import Deferred, safe_async
+from .access import get_actor, set_actor, LOGGER
+from .defer import Deferred, safe_async, multi_async
 from .pollers import Poller, READ
 
 
@@ -68,16 +68,19 @@ class PoolThread(Thread):
         super(Thread, self).run()
 
     def loop(self):
-        return thread_local_data('_request_loop', ct=self)
+        # the request loop is stored in a thread local and it is not
+        # accessible from other threads, use the loop set by the pool
+        return getattr(self, '_loop', None)
 
 
 class IOqueue(Poller):
 
-    def __init__(self, actor, queue, maxtasks):
+    def __init__(self, actor, queue, maxtasks, done=None):
         super(IOqueue, self).__init__()
         self._actor = actor
         self._queue = queue
         self._maxtasks = maxtasks
+        self._done = done
         self._wakeup = 0
         self.received = 0
         self.completed = 0
@@ -127,9 +130,11 @@ install itself as a request loop rather than the IO event loop.'''
             raise KeyError('Received an event on unregistered file '
                            'descriptor %s' % fd)
         self.received += 1
-        future, func, args, kwargs = task
+        future, func, args, kwargs, queued = task
+        started = default_timer()
         result = safe_async(func, *args, **kwargs)
-        result.add_both(partial(self._handle_result, future))
+        result.add_both(partial(self._handle_result, future, started - queued,
+                                started))
         return future
 
     def get(self, timeout=0.5):
@@ -147,9 +152,12 @@ install itself as a request loop rather than the IO event loop.'''
         if fd != self.fileno():
             raise IOError('Only read events on %s allowed' % self.fileno())
 
-    def _handle_result(self, future, result):
+    def _handle_result(self, future, wait_time, started, result):
         self.completed += 1
-        future.callback(result)
+        if self._done:
+            self._done(future, result, wait_time, default_timer() - started)
+        else:
+            future.callback(result)
 
 
 RUN = 0
@@ -161,7 +169,11 @@ class ThreadPool(object):
     '''A thread pool for an actor.
 
     This pool maintains a group of threads to perform asynchronous tasks via
-    the :meth:`apply` method.
+    the :meth:`apply` and :meth:`map` methods.
+
+    Results are delivered back to the :attr:`event_loop` in batches: all
+    tasks completed before the event loop gets a chance to process them are
+    called back with a single thread-safe wake-up.
     '''
     worker_name = 'pool-worker'
 
@@ -174,6 +186,12 @@ class ThreadPool(object):
         self._closed = Deferred(event_loop=self.event_loop)
         self._maxtasks = maxtasks
         self._inqueue = ThreadQueue()
+        self._results = []
+        self._lock = Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._wait_time = 0
+        self._run_time = 0
         self._check = self.event_loop.call_soon(self._maintain)
 
     @property
@@ -203,11 +221,49 @@ class ThreadPool(object):
 
         This method create a new task for function ``func`` and adds it to
         the queue.
-        Return a :class:`Deferred` called back once the task has finished.
+        Return a :class:`Deferred` called back, in the :attr:`event_loop`,
+        once the task has finished.
         '''
         assert self._state == RUN, 'Pool not running'
-        d = Deferred()
-        self._inqueue.put((d, func, args, kwargs))
+        d = Deferred(event_loop=self.event_loop)
+        self._submitted += 1
+        self._inqueue.put((d, func, args, kwargs, default_timer()))
+        return d
+
+    def map(self, func, *iterables):
+        '''Equivalent to ``map(func, *iterables)``.
+
+        Each item is submitted as a separate task via :meth:`apply`.
+        Return a :class:`Deferred` called back with the list of results, in
+        the order of the ``iterables``, once all tasks have finished.
+        '''
+        return multi_async([self.apply(func, *args)
+                            for args in zip(*iterables)])
+
+    def info(self):
+        '''Dictionary of information about this pool.
+
+        * ``threads`` number of threads.
+        * ``queued`` number of tasks waiting in the queue.
+        * ``running`` number of tasks being executed by the threads.
+        * ``submitted`` number of tasks submitted to the pool.
+        * ``completed`` number of completed tasks.
+        * ``wait_time`` average time (in seconds) a task waited in the queue.
+        * ``run_time`` average time (in seconds) needed to execute a task.
+        '''
+        with self._lock:
+            completed = self._completed
+            wait_time = self._wait_time
+            run_time = self._run_time
+        queued = self._inqueue.qsize()
+        return {'status': self.status,
+                'threads': self.num_threads,
+                'queued': queued,
+                'running': max(self._submitted - completed - queued, 0),
+                'submitted': self._submitted,
+                'completed': completed,
+                'wait_time': wait_time/completed if completed else 0,
+                'run_time': run_time/completed if completed else 0}
 
     def close(self, timeout=None):
         '''Close the thread pool.
@@ -287,16 +343,37 @@ class ThreadPool(object):
             worker.start()
             self._actor.logger.debug('Added %s', worker)
 
+    def _done(self, future, result, wait_time, run_time):
+        # Invoked by the pool threads when a task has finished. The result
+        # is added to the pending results and, if no delivery is already
+        # scheduled, the actor event loop is woken up.
+        with self._lock:
+            self._completed += 1
+            self._wait_time += wait_time
+            self._run_time += run_time
+            self._results.append((future, result))
+            wake = len(self._results) == 1
+        if wake:
+            self.event_loop.call_soon_threadsafe(self._deliver)
+
+    def _deliver(self):
+        with self._lock:
+            results, self._results = self._results, []
+        for future, result in results:
+            future.callback(result)
+
     def _close_pool(self):
         for i in range(len(self._pool)):
             self._inqueue.put(None)
 
     def _run(self):
         # The run method for the threads in this therad pool
-        poller = IOqueue(self._actor, self._inqueue, self._maxtasks)
+        poller = IOqueue(self._actor, self._inqueue, self._maxtasks,
+                         self._done)
         # Create the event loop which get tasks from the task queue
         logger = logging.getLogger('pulsar.%s.%s' % (self._actor.name,
                                                      self.worker_name))
         event_loop = new_event_loop(io=poller, poll_timeout=1, logger=logger)
+        current_thread()._loop = event_loop
         event_loop.add_reader(poller.fileno(), poller.handle_events)
         event_loop.run_forever()
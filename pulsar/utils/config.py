@@ -841,6 +841,88 @@ class Workers(Setting):
         """
 
 
+class MinWorkers(Setting):
+    name = "min_workers"
+    section = "Worker Processes"
+    flags = ["--min-workers"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The minimum number of workers when autoscaling is enabled.
+
+        Autoscaling is enabled when :ref:`max_workers <setting-max_workers>`
+        is greater than zero. In this case the monitor will never shrink the
+        pool below this number (or one if this is set to zero).
+        """
+
+
+class MaxWorkers(Setting):
+    name = "max_workers"
+    section = "Worker Processes"
+    flags = ["--max-workers"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum number of workers when autoscaling is enabled.
+
+        Any value greater than zero enables load-based autoscaling. The
+        monitor starts with :ref:`workers <setting-workers>` workers and
+        adds one when the workers report a sustained load above
+        :ref:`autoscale_load <setting-autoscale_load>` concurrent requests
+        or an event loop lag above
+        :ref:`autoscale_lag <setting-autoscale_lag>`. It removes one after
+        the pool has been idle for
+        :ref:`autoscale_idle <setting-autoscale_idle>` seconds.
+
+        If this is set to zero (the default) autoscaling is disabled.
+        """
+
+
+class AutoscaleLoad(Setting):
+    name = "autoscale_load"
+    section = "Worker Processes"
+    flags = ["--autoscale-load"]
+    validator = validate_pos_int
+    type = int
+    default = 100
+    desc = """\
+        Number of concurrent requests per worker considered as high load
+        by the autoscaling policy.
+
+        A value of zero disables this load indicator.
+        """
+
+
+class AutoscaleLag(Setting):
+    name = "autoscale_lag"
+    section = "Worker Processes"
+    flags = ["--autoscale-lag"]
+    validator = validate_pos_float
+    type = float
+    default = 0.5
+    desc = """\
+        Event loop lag, in seconds, considered as high load by the
+        autoscaling policy.
+
+        A value of zero disables this load indicator.
+        """
+
+
+class AutoscaleIdle(Setting):
+    name = "autoscale_idle"
+    section = "Worker Processes"
+    flags = ["--autoscale-idle"]
+    validator = validate_pos_int
+    type = int
+    default = 60
+    desc = """\
+        Number of seconds the pool of workers must be idle before the
+        autoscaling policy removes a worker.
+        """
+
+
 class Concurrency(Setting):
     inherit = True  # Inherited by the arbiter
     name = "concurrency"
@@ -852,6 +934,22 @@ class Concurrency(Setting):
         """
 
 
+class Preload(Setting):
+    name = "preload_app"
+    section = "Worker Processes"
+    flags = ["--preload"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Load application code in the arbiter before forking workers.
+
+        The application handler is built once and workers share it
+        copy-on-write, which saves memory and makes spawning new workers
+        faster. Only effective with ``process`` concurrency on posix.
+        """
+
+
 class MaxRequests(Setting):
     name = "max_requests"
     section = "Worker Processes"
@@ -68,6 +68,13 @@ TRY_READ_AGAIN = (EWOULDBLOCK, EAGAIN)
 
 SOCKET_INTERRUPT_ERRORS = (EINTR, ECONNRESET)
 
+# Only linux (3.9 or above) load-balances connections across sockets
+# listening on the same address. Python 2 does not expose the constant.
+if sys.platform.startswith('linux'):
+    SO_REUSEPORT = getattr(socket, 'SO_REUSEPORT', 15)
+else:   # pragma    nocover
+    SO_REUSEPORT = None
+
 
 def parse_address(netloc, default_port=8000):
     '''Parse an internet address ``netloc`` and return a tuple with
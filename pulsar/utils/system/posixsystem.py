@@ -15,6 +15,7 @@ __all__ = ['close_on_exec',
            'daemonize',
            'socketpair',
            'EXIT_SIGNALS',
+           'RELOAD_SIGNALS',
            'get_uid',
            'get_gid',
            'get_maxfd',
@@ -22,6 +23,8 @@ __all__ = ['close_on_exec',
 
 # standard signal quit
 EXIT_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGABRT, signal.SIGQUIT)
+# rolling restart of workers
+RELOAD_SIGNALS = (signal.SIGHUP,)
 # Default maximum for the number of available file descriptors.
 REDIRECT_TO = getattr(os, "devnull", "/dev/null")
 
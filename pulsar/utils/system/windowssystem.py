@@ -13,6 +13,7 @@ __all__ = ['close_on_exec',
            'daemonize',
            'socketpair',
            'EXIT_SIGNALS',
+           'RELOAD_SIGNALS',
            'get_uid',
            'get_gid',
            'get_maxfd',
@@ -26,6 +27,7 @@ SetHandleInformation.restype = ctypes.wintypes.BOOL
 
 HANDLE_FLAG_INHERIT = 0x00000001
 EXIT_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGABRT, signal.SIGBREAK)
+RELOAD_SIGNALS = ()
 
 
 set_owner_process = lambda gid, uid: None
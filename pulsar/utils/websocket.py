@@ -5,7 +5,6 @@ These two classes can be used for both clients and server protocols.
 .. _WebSocket: http://tools.ietf.org/html/rfc6455'''
 import os
 from struct import pack, unpack
-from array import array
 from io import BytesIO
 
 from .pep import ispy3k, range, to_bytes
@@ -27,12 +26,37 @@ else:  # pragma : nocover
     def is_text_data(data):
         return True
 
+# translation tables for XOR with one byte
+_XOR_TABLES = {}
+
 
 def int2bytes(*ints):
     '''convert a series of integers into bytes'''
     return b''.join((i2b(i) for i in ints))
 
 
+def xor_table(n):
+    '''Translation table for XOR-ing bytes with ``n``.'''
+    table = _XOR_TABLES.get(n)
+    if table is None:
+        table = bytes(bytearray(i ^ n for i in range(256)))
+        _XOR_TABLES[n] = table
+    return table
+
+
+def websocket_mask(data, masking_key):
+    '''XOR ``data`` with the 4 bytes ``masking_key`` repeated.
+
+    Rather than looping over each byte, the four strided slices of the payload
+    which share the same key byte are translated in one operation each.
+    '''
+    data = bytearray(data)
+    for i, n in enumerate(bytearray(masking_key)):
+        if n:
+            data[i::4] = data[i::4].translate(xor_table(n))
+    return bytes(data)
+
+
 def get_version(version):
     try:
         version = int(version or DEFAULT_VERSION)
@@ -43,12 +67,62 @@ def get_version(version):
     return version
 
 
+def parse_extension(offer):
+    '''Parse an extension ``offer`` from a ``Sec-WebSocket-Extensions``
+    header into a two elements tuple, the name of the extension and a
+    dictionary of parameters. Parameters without a value are ``True``.'''
+    bits = offer.split(';')
+    params = {}
+    for param in bits[1:]:
+        param = param.strip()
+        if param:
+            if '=' in param:
+                key, value = param.split('=', 1)
+                params[key.strip()] = value.strip().strip('"')
+            else:
+                params[param] = True
+    return bits[0].strip(), params
+
+
 class Extension(object):
+    '''Base class for websocket extensions registered in ``WS_EXTENSIONS``.
 
-    def receive(self, data):
+    .. attribute:: stateless
+
+        ``True`` when frames sent with this extension do not depend on the
+        frames previously sent on the same connection, so that the same
+        bytes can be written to several connections.
+    '''
+    name = None
+    stateless = True
+
+    @classmethod
+    def negotiate(cls, params, kind):
+        '''Return an extension for the negotiated ``params`` or ``None``
+        to decline the offer.
+
+        :param params: dictionary of parameters of the offer (``kind`` 0)
+            or of the server response (``kind`` 1).
+        :param kind: the :attr:`FrameParser.kind` of the parser.
+        '''
+        return cls()
+
+    def response(self):
+        '''The value for the ``Sec-WebSocket-Extensions`` header.'''
+        return self.name
+
+    def receive(self, frame, data, max_size=None):
+        '''Transform the ``data`` of a message received with the first
+        ``frame`` of the message.
+
+        :param max_size: optional maximum size in bytes of the transformed
+            data. A :class:`.ProtocolError` is raised when it is exceeded.
+        '''
         return data
 
-    def send(self, data):
+    def send(self, params, data):
+        '''Transform the ``data`` of a message to send. ``params`` is the
+        dictionary of :class:`Frame` parameters which can be updated.'''
         return data
 
 
@@ -208,12 +282,7 @@ simple masking algorithm::
 
 This method is invoked when encoding/decoding frames with a :attr:`masking_key`
 attribute set.'''
-        mask_size = len(self.masking_key)
-        key = array('B', self.masking_key)
-        data = array('B', data)
-        for i in range(len(data)):
-            data[i] ^= key[i % mask_size]
-        return data.tobytes() if ispy3k else data.tostring()
+        return websocket_mask(data, self.masking_key)
     unmask = mask
 
 
@@ -231,16 +300,24 @@ class FrameParser(object):
     * 1 for parsing server frames and sending client frames (to be used
       by the client)
     * 2 Assumes always unmasked data
+
+.. attribute:: max_message_size
+
+    Optional maximum size in bytes of a message. A frame which makes the
+    message larger raises a :class:`.ProtocolError` before its payload is
+    buffered. The limit also applies to the message transformed by the
+    negotiated extensions, for example once decompressed.
 '''
-    def __init__(self, version=None, kind=0, extensions=None, protocols=None):
+    def __init__(self, version=None, kind=0, extensions=None, protocols=None,
+                 max_message_size=None):
         self.version = get_version(version)
+        self._kind = kind
         self._ext_middleware, self._extensions =\
-            self.ws_middleware(extensions, WS_EXTENSIONS)
+            self.ws_extensions(extensions)
         self._pro_middleware, self._protocols =\
-            self.ws_middleware(extensions, WS_PROTOCOLS)
-        self._frame = None  # current frame
-        self._buf = None
-        self._kind = kind
+            self.ws_middleware(protocols, WS_PROTOCOLS)
+        self.max_message_size = max_message_size
+        self._reset()
 
     def ws_middleware(self, names, group):
         mw = []
@@ -251,12 +328,29 @@ class FrameParser(object):
                     av.append(name)
                     mw.append(group[name]())
         return mw, tuple(av)
-
+
+    def ws_extensions(self, offers):
+        '''Negotiate extensions from a list of ``offers``.
+
+        The first acceptable offer of each registered extension is used.
+        Return a list of :class:`Extension` and a tuple of their responses.
+        '''
+        mw = []
+        names = set()
+        for offer in offers or ():
+            name, params = parse_extension(offer)
+            if name in WS_EXTENSIONS and name not in names:
+                extension = WS_EXTENSIONS[name].negotiate(params, self.kind)
+                if extension is not None:
+                    names.add(name)
+                    mw.append(extension)
+        return mw, tuple(e.response() for e in mw)
+
     @property
     def kind(self):
         return self._kind
 
-    @property
+    @property
     def extensions(self):
         return self._extensions
 
@@ -264,7 +358,7 @@ class FrameParser(object):
     def protocols(self):
         return self._protocols
 
-    @property
+    @property
     def masked(self):
         return self.kind == 1
 
@@ -272,13 +366,30 @@ class FrameParser(object):
     def expect_masked(self):
         return True if self.kind == 0 else False
 
+    @property
+    def stateless(self):
+        '''``True`` if the frames encoded by this parser do not depend on
+        the frames previously encoded.'''
+        return all(e.stateless for e in self._ext_middleware)
+
     def encode(self, data, final=True, masking_key=None, **params):
         '''Encode data into a :class:`Frame`.
 
+Data messages sent in a single frame are transformed by the negotiated
+extensions.
+
 :parameter final: Indicating if this is a final Frame.
 :parameter masking_key: Optional making key used only if :attr:`kind` is 1
     (Client frames).
     '''
+        opcode = params.get('opcode')
+        if (self._ext_middleware and final and data is not None and
+                opcode in (None, 0x1, 0x2)):
+            if opcode is None:
+                params['opcode'] = 0x1 if is_text_data(data) else 0x2
+            data = to_bytes(data)
+            for extension in self._ext_middleware:
+                data = extension.send(params, data)
         if self.masked:
             masking_key = masking_key or os.urandom(4)
             return Frame(data, masking_key=masking_key, final=final, **params)
@@ -309,86 +420,151 @@ class FrameParser(object):
     def decode(self, data=None):
         '''Decode bytes data into a :class:`Frame`. If :attr:`kind` is 0
 it decodes into a client frame (masked frame) while if is 1 or 2 it decodes
-into a server frame (unmasked).'''
+into a server frame (unmasked).
+
+Frames are parsed from an internal buffer with a read cursor. The payloads of
+a fragmented message are collected and a single :class:`Frame` with the whole
+message as ``body`` is returned once the final fragment arrives. Control
+frames are returned as soon as they are available.
+
+Return ``None`` if more data is needed.'''
+        buf = self._buf
         if data:
-            if self._buf:
-                data = self._buf + data
-        else:
-            data = self._buf
-        if not data:
-            return None
+            if self._pos:
+                del buf[:self._pos]
+                self._pos = 0
+            buf.extend(data)
+        try:
+            return self._decode()
+        except ProtocolError:
+            # the connection must be failed, discard the parser state
+            self._reset()
+            raise
+
+    #    INTERNALS
+    def _decode(self):
+        frame = self._decode_frame()
+        while frame is not None:
+            if frame.opcode > 0x7:
+                return frame
+            elif frame.opcode:
+                if self._fragments is not None:
+                    raise ProtocolError('WEBSOCKET expected a continuation '
+                                        'frame')
+                if frame.final:
+                    return self._message(frame, frame.body)
+                self._fragments = (frame, [frame.body])
+            elif self._fragments is None:
+                raise ProtocolError('WEBSOCKET unexpected continuation frame')
+            else:
+                self._fragments[1].append(frame.body)
+                if frame.final:
+                    first, payloads = self._fragments
+                    return self._message(first, b''.join(payloads))
+            frame = self._decode_frame()
+
+    def _decode_frame(self):
+        # Decode a frame from the buffer starting at the cursor
+        buf = self._buf
+        pos = self._pos
+        available = len(buf) - pos
         masked_frame = self.expect_masked
-        frame = self._frame
+        frame = self._frame
         # No opcode yet
         if frame is None:
-            if len(data) < 2:
-                return self.save_buf(frame, data)
-            first_byte, second_byte = unpack("BB", data[:2])
+            if available < 2:
+                return
+            first_byte, second_byte = buf[pos], buf[pos+1]
             fin = (first_byte >> 7) & 1
             rsv1 = (first_byte >> 6) & 1
             rsv2 = (first_byte >> 5) & 1
             rsv3 = (first_byte >> 4) & 1
             opcode = first_byte & 0xf
-            if fin not in (0, 1):
-                raise ProtocolError('FIN must be 0 or 1')
             is_masked = bool(second_byte & 0x80)
             if masked_frame != is_masked:
                 if masked_frame:
                     raise ProtocolError('WEBSOCKET unmasked client frame.')
                 else:
-                    raise ProtocolError('WEBSOCKET masked server frame.')
+                    raise ProtocolError('WEBSOCKET masked server frame.')
             payload_length = second_byte & 0x7f
             # All control frames MUST have a payload length of 125 bytes
             # or less
             if opcode > 0x7 and payload_length > 125:
                 raise ProtocolError('WEBSOCKET frame too large')
-            msg, data = data[:2], data[2:]
-            frame = Frame(msg, opcode, self.version, final=fin,
-                          rsv1=rsv1, rsv2=rsv2, rsv3=rsv3, build_frame=False)
+            frame = Frame(bytes(buf[pos:pos+2]), opcode, self.version,
+                          final=fin, rsv1=rsv1, rsv2=rsv2, rsv3=rsv3,
+                          build_frame=False)
             frame.payload_length = payload_length
+            self._frame = frame
+            pos = self._pos = pos + 2
+            available -= 2
         #
         if frame.masking_key is None:
-            # All control frames MUST have a payload length of 125 bytes
-            # or less
+            mask_length = 4 if masked_frame else 0
             d = None
-            mask_length = 4 if masked_frame else 0
-            if frame.payload_length == 0x7e:  # 126
-                if len(data) < 2 + mask_length:  # 2 + 4 for mask
-                    return self.save_buf(frame, data)
-                d, data = data[:2], data[2:]
+            if frame.payload_length == 0x7e:  # 126
+                if available < 2 + mask_length:  # 2 + 4 for mask
+                    return
+                d = bytes(buf[pos:pos+2])
                 frame.payload_length = unpack("!H", d)[0]
             elif frame.payload_length == 0x7f:  # 127
-                if len(data) < 8 + mask_length:  # 8 + 4 for mask
-                    return self.save_buf(frame, data)
-                d, data = data[:8], data[8:]
+                if available < 8 + mask_length:  # 8 + 4 for mask
+                    return
+                d = bytes(buf[pos:pos+8])
                 frame.payload_length = unpack("!Q", d)[0]
-            elif len(data) < mask_length:
-                return self.save_buf(frame, data)
+            elif available < mask_length:
+                return
             if d:
                 frame.msg.extend(d)
-            if mask_length:
-                frame.masking_key, data = (data[:mask_length],
-                                           data[mask_length:])
-            else:
-                frame.masking_key = b''
+                pos += len(d)
+                available -= len(d)
+            self._check_size(frame)
+            frame.masking_key = bytes(buf[pos:pos+mask_length])
             frame.msg.extend(frame.masking_key)
+            pos = self._pos = pos + mask_length
+            available -= mask_length
 
-        if len(data) < frame.payload_length:
-            self.save_buf(frame, data)
+        if available < frame.payload_length:
+            return
         # We have a frame
+        end = pos + frame.payload_length
+        payload = bytes(buf[pos:end])
+        frame.msg.extend(payload)
+        self._frame = None
+        if end == len(buf):
+            del buf[:]
+            self._pos = 0
         else:
-            payload = data[:frame.payload_length]  # payload data
-            frame.msg.extend(payload)
-            self.save_buf(None, data[frame.payload_length:])
-            for extension in self.extensions:
-                data = extension.receive(frame, data)
-            if frame.masking_key:
-                payload = frame.unmask(payload)
-            if frame.opcode == 0x1:
-                payload = payload.decode("utf-8", "replace")
-            frame.body = payload
-            return frame
-
-    def save_buf(self, frame, data):
-        self._frame = frame
-        self._buf = data
+            self._pos = end
+        if frame.masking_key:
+            payload = frame.unmask(payload)
+        frame.body = payload
+        return frame
+
+    def _check_size(self, frame):
+        # Reject a data frame making the message larger than
+        # max_message_size before its payload is buffered
+        if self.max_message_size and frame.opcode < 0x8:
+            size = frame.payload_length
+            if self._fragments is not None and not frame.opcode:
+                size += sum(len(b) for b in self._fragments[1])
+            if size > self.max_message_size:
+                raise ProtocolError('WEBSOCKET message too large')
+
+    def _message(self, frame, payload):
+        self._fragments = None
+        frame.fin = 1
+        frame.payload_length = len(payload)
+        for extension in reversed(self._ext_middleware):
+            payload = extension.receive(frame, payload,
+                                        max_size=self.max_message_size)
+        if frame.opcode == 0x1:
+            payload = payload.decode("utf-8", "replace")
+        frame.body = payload
+        return frame
+
+    def _reset(self):
+        self._frame = None
+        self._buf = bytearray()
+        self._pos = 0
+        self._fragments = None
@@ -2,8 +2,9 @@
 import json
 import time
 
-from pulsar import Deferred
-from pulsar.apps.pubsub import PubSub
+from pulsar import Deferred, get_actor, async_sleep
+from pulsar.apps.pubsub import PubSub, Client, PubSubBackend
+from pulsar.apps.pubsub.local import Subscriptions
 from pulsar.apps.test import unittest, HttpTestClient
 from pulsar.utils.security import gen_unique_id
 
@@ -20,6 +21,31 @@ class DummyClient2(Deferred):
         self.callback(json.loads(message))
 
 
+class ListClient(Client):
+
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, channel, message):
+        self.messages.append((channel, message))
+
+
+class UpperClient(ListClient):
+    encoder = staticmethod(lambda message: message.upper())
+
+
+class SlowClient(ListClient):
+    max_queue = 2
+    accept = False
+    closed = False
+
+    def ready(self):
+        return self.accept
+
+    def close(self):
+        self.closed = True
+
+
 def json_encoder(message):
     v =  {'message': message,
           'time': time.time()}
@@ -154,4 +180,155 @@ class pubsubTest(unittest.TestCase):
         channels = yield p2.unsubscribe('blaaanskjnk')
         self.assertEqual(channels, 1)
         channels = yield p2.unsubscribe('hhhhhh')
-        self.assertEqual(channels, 0)
\ No newline at end of file
+        self.assertEqual(channels, 0)
+
+    def test_one_delivery(self):
+        p = self.pubsub()
+        d = DummyClient1()
+        p.add_client(d)
+        yield p.subscribe('dup.one', 'dup.*', '*.one')
+        clients = yield p.publish('dup.one', 'Hello world!')
+        self.assertEqual(clients, 1)
+        message = yield d
+        self.assertEqual(message, 'Hello world!')
+        # the client was called once only
+        self.assertTrue(d in p.clients)
+
+    def test_info(self):
+        p = self.pubsub()
+        p.add_client(ListClient())
+        info = get_actor().info()
+        self.assertEqual(info['pubsub'][p.id]['clients'], 1)
+        self.assertEqual(info['pubsub'][p.id]['dropped'], 0)
+
+
+class TestDispatch(unittest.TestCase):
+
+    def test_batch(self):
+        backend = PubSubBackend('local', None)
+        c1, c2, c3 = ListClient(), UpperClient(), UpperClient()
+        for c in (c1, c2, c3):
+            backend.add_client(c)
+        backend.broadcast('foo', b'hello')
+        backend.broadcast('bla', 'world')
+        self.assertEqual(c1.messages, [])
+        self.assertEqual(backend.dispatch(), 2)
+        self.assertEqual(c1.messages, [('foo', 'hello'), ('bla', 'world')])
+        self.assertEqual(c2.messages, [('foo', 'HELLO'), ('bla', 'WORLD')])
+        self.assertEqual(c3.messages, c2.messages)
+        # The encoded message is shared
+        self.assertTrue(c2.messages[0][1] is c3.messages[0][1])
+        self.assertEqual(backend.dispatch(), 0)
+
+    def test_dispatch_on_loop(self):
+        backend = PubSubBackend('local', None)
+        d = DummyClient1()
+        backend.add_client(d)
+        backend.broadcast('foo', 'hello')
+        message = yield d
+        self.assertEqual(message, 'hello')
+
+    def slow_backend(self, overflow):
+        backend = PubSubBackend('local', None)
+        client = SlowClient()
+        client.overflow = overflow
+        backend.add_client(client)
+        for message in ('a', 'b', 'c'):
+            backend.broadcast('foo', message)
+        backend.dispatch()
+        return backend, client
+
+    def test_drop_oldest(self):
+        backend, client = self.slow_backend('drop_oldest')
+        self.assertEqual(client.messages, [])
+        self.assertEqual(len(backend.queues[client]), 2)
+        client.accept = True
+        backend.broadcast('foo', 'd')
+        backend.dispatch()
+        self.assertEqual(client.messages, [('foo', 'b'), ('foo', 'c'),
+                                           ('foo', 'd')])
+        self.assertEqual(backend.queues, {})
+        info = backend.info()
+        self.assertEqual(info['delivered'], 3)
+        self.assertEqual(info['dropped'], 1)
+        self.assertEqual(info['queued'], 0)
+
+    def test_drop_newest(self):
+        backend, client = self.slow_backend('drop_newest')
+        client.accept = True
+        self.assertEqual(backend.dispatch(), 0)
+        self.assertEqual(client.messages, [('foo', 'a'), ('foo', 'b')])
+        self.assertEqual(backend.info()['dropped'], 1)
+
+    def test_disconnect(self):
+        backend, client = self.slow_backend('disconnect')
+        self.assertTrue(client.closed)
+        self.assertFalse(client in backend.clients)
+        self.assertEqual(backend.queues, {})
+        info = backend.info()
+        self.assertEqual(info['dropped'], 3)
+        self.assertEqual(info['disconnected'], 1)
+        self.assertEqual(info['clients'], 0)
+
+    def test_retry(self):
+        backend, client = self.slow_backend('drop_oldest')
+        client.accept = True
+        yield async_sleep(backend.retry_interval + 0.1)
+        self.assertEqual(client.messages, [('foo', 'b'), ('foo', 'c')])
+        self.assertEqual(backend.queues, {})
+
+    def test_retry_backoff(self):
+        backend, client = self.slow_backend('drop_oldest')
+        backend.max_retry_interval = 0.3
+        interval = backend.retry_interval
+        self.assertEqual(backend.local.retry_delay, interval)
+        backend._retry()
+        self.assertEqual(backend.local.retry_delay, 2*interval)
+        backend._retry()
+        self.assertEqual(backend.local.retry_delay, 0.3)
+        self.assertEqual(client.messages, [])
+        client.accept = True
+        backend._retry()
+        self.assertEqual(client.messages, [('foo', 'b'), ('foo', 'c')])
+        self.assertEqual(backend.queues, {})
+        self.assertEqual(backend.local.retry_delay, None)
+
+
+class TestSubscriptions(unittest.TestCase):
+
+    def match(self, s, channel):
+        return sorted(((c, sorted(g)) for c, g in s.match(channel)))
+
+    def test_channels(self):
+        s = Subscriptions()
+        s.subscribe('a', 'foo')
+        s.subscribe('b', 'foo')
+        s.subscribe('a', 'bla')
+        self.assertEqual(self.match(s, 'foo'), [('foo', ['a', 'b'])])
+        self.assertEqual(self.match(s, 'fo'), [])
+        self.assertEqual(s.count('a'), 2)
+        s.unsubscribe('a', ['foo'])
+        self.assertEqual(self.match(s, 'foo'), [('foo', ['b'])])
+        s.unsubscribe('a')
+        self.assertEqual(s.count('a'), 0)
+        self.assertEqual(s.channels, {'foo': set(['b'])})
+
+    def test_patterns(self):
+        s = Subscriptions()
+        s.subscribe('a', 'foo.*')
+        s.subscribe('b', 'foo.bla.*')
+        s.subscribe('c', '*')
+        s.subscribe('d', 'f?o.b[lx]a')
+        self.assertEqual(self.match(s, 'foo'), [('foo', ['c'])])
+        self.assertEqual(self.match(s, 'foo.bla'),
+                         [('foo.bla', ['a']), ('foo.bla', ['c']),
+                          ('foo.bla', ['d'])])
+        self.assertEqual(self.match(s, 'foo.bla.x'),
+                         [('foo.bla.x', ['a']), ('foo.bla.x', ['b']),
+                          ('foo.bla.x', ['c'])])
+        self.assertEqual(len(list(s.match('*'))), 4)
+        s.unsubscribe('b')
+        s.unsubscribe('a')
+        self.assertFalse(s.trie.children)
+        self.assertEqual(self.match(s, 'foo.bla.x'),
+                         [('foo.bla.x', ['c'])])
\ No newline at end of file
@@ -88,6 +88,49 @@ class TestParser(client.RedisTest):
         self.assertEqual(p.get(), b'QUEUED')
         self.assertEqual(p.get(), [None, 1, 39])
 
+    def test_nested_chunks(self):
+        test = b'*3\r\n*2\r\n:1\r\n$5\r\nhello\r\n*0\r\n$-1\r\n+OK\r\n'
+        p = self.parser()
+        for n in range(len(test)-6):
+            p.feed(test[n:n+1])
+            self.assertEqual(p.get(), False)
+        p.feed(test[-6:])
+        self.assertEqual(p.get(), [[1, b'hello'], [], None])
+        self.assertEqual(p.buffer(), b'+OK\r\n')
+        self.assertEqual(p.get(), b'OK')
+        self.assertEqual(p.buffer(), b'')
+
+    def test_large_array(self):
+        test = b'*10000\r\n' + b''.join(
+            ('$%s\r\n%s\r\n' % (len(str(n)), n)).encode('utf-8')
+            for n in range(10000))
+        p = self.parser()
+        p.feed(test[:1000])
+        self.assertEqual(p.get(), False)
+        p.feed(test[1000:])
+        result = p.get()
+        self.assertEqual(len(result), 10000)
+        self.assertEqual(result[-1], b'9999')
+
+    def test_pack_command(self):
+        p = self.parser()
+        self.assertEqual(p.pack_command('GET', 'key'),
+                         b'*2\r\n$3\r\nGET\r\n$3\r\nkey\r\n')
+        self.assertEqual(p.pack_command('SET', b'key', 1.5),
+                         b'*3\r\n$3\r\nSET\r\n$3\r\nkey\r\n'
+                         b'$3\r\n1.5\r\n')
+        value = b'x'*2000
+        self.assertEqual(p.pack_command('HINCRBY', value, 'f', 34),
+                         b'*4\r\n$7\r\nHINCRBY\r\n$2000\r\n' + value +
+                         b'\r\n$1\r\nf\r\n$2\r\n34\r\n')
+
+    def test_pack_pipeline(self):
+        p = self.parser()
+        commands = [(('SET', 'a', 1), {}), (('GET', 'a'), {})]
+        self.assertEqual(p.pack_pipeline(commands),
+                         p.pack_command('SET', 'a', 1) +
+                         p.pack_command('GET', 'a'))
+
     def test_nested10(self):
         client = self.client()
         result = yield client.eval(lua_nested_table, 0, 10)
@@ -0,0 +1,302 @@
+'''Auto pipelining, multiplexed connections and client cache against a
+local fake redis server.'''
+import pulsar
+from pulsar import ProtocolError, Deferred, multi_async, async_while
+from pulsar.utils.pep import get_event_loop, range
+from pulsar.apps.test import unittest, run_test_server
+from pulsar.apps.redis import RedisPool, ClientCache
+from pulsar.apps.redis.parser import Parser
+
+from .client import available
+
+if available:
+    from redis.exceptions import ResponseError, ConnectionError
+
+
+def bulk(value):
+    return ('$%s\r\n' % len(value)).encode('utf-8') + value + b'\r\n'
+
+
+def array(*values):
+    return ('*%s\r\n' % len(values)).encode('utf-8') + b''.join(
+        bulk(v) if isinstance(v, bytes) else (':%s\r\n' % v).encode('utf-8')
+        for v in values)
+
+
+class FakeRedisProtocol(pulsar.ProtocolConsumer):
+    '''Reply to PING, SET, GET, RENAME, RPUSH, LRANGE, RPOPLPUSH, SUBSCRIBE
+    and PUBLISH commands. CLOSE closes the connection.
+
+    Each read from the socket is a round trip and it is counted by the
+    server.
+    '''
+    parser = None
+
+    def data_received(self, data):
+        server = self.producer
+        server.reads += 1
+        server.connections.add(self.connection)
+        if self.parser is None:
+            self.parser = Parser(ProtocolError, Exception)
+        self.parser.feed(data)
+        replies = []
+        command = self.parser.get()
+        while command is not False:
+            reply = self.reply(server, *command)
+            if reply is None:
+                break
+            replies.append(reply)
+            command = self.parser.get()
+        self.transport.write(b''.join(replies))
+        if reply is None:
+            self.transport.close()
+
+    def reply(self, server, name, *args):
+        data = server.data
+        name = name.upper()
+        if name == b'PING':
+            return b'+PONG\r\n'
+        elif name == b'SET':
+            data[args[0]] = args[1]
+            return b'+OK\r\n'
+        elif name == b'CLOSE':
+            # close the connection without replying
+            return None
+        elif name == b'GET':
+            value = data.get(args[0])
+            if value is None:
+                return b'$-1\r\n'
+            return bulk(value)
+        elif name == b'RENAME':
+            if args[0] not in data:
+                return b'-ERR no such key\r\n'
+            data[args[1]] = data.pop(args[0])
+            return b'+OK\r\n'
+        elif name == b'RPUSH':
+            values = data.setdefault(args[0], [])
+            values.extend(args[1:])
+            return (':%s\r\n' % len(values)).encode('utf-8')
+        elif name == b'LRANGE':
+            values = data.get(args[0], [])
+            stop = int(args[2])
+            stop = len(values) + stop + 1 if stop < 0 else stop + 1
+            return array(*values[int(args[1]):stop])
+        elif name == b'RPOPLPUSH':
+            values = data.get(args[0])
+            if not values:
+                return b'$-1\r\n'
+            value = values.pop()
+            data.setdefault(args[1], []).insert(0, value)
+            return bulk(value)
+        elif name == b'SUBSCRIBE':
+            server.subscribers.setdefault(args[0], []).append(self.transport)
+            return array(b'subscribe', args[0], 1)
+        elif name == b'PUBLISH':
+            subscribers = server.subscribers.get(args[0], ())
+            for transport in subscribers:
+                transport.write(array(b'message', args[0], args[1]))
+            return (':%s\r\n' % len(subscribers)).encode('utf-8')
+        else:
+            return b'-ERR unknown command\r\n'
+
+
+def execute(*commands):
+    # Execute commands, (method, arg1, ...) tuples, in the same iteration of
+    # the redis pool event loop. Return a Deferred called back with the list
+    # of Deferreds returned by the commands.
+    d = Deferred()
+    get_event_loop().call_soon_threadsafe(
+        lambda: d.callback([c[0](*c[1:]) for c in commands]))
+    return d
+
+
+@unittest.skipUnless(available, 'Requires redis-py installed')
+class FakeRedisTest(unittest.TestCase):
+
+    def fake_server(self):
+        return run_test_server(get_event_loop(), FakeRedisProtocol)
+
+    def client(self, server, cache=None, **kw):
+        server.reads = 0
+        server.connections = set()
+        server.data = {}
+        server.subscribers = {}
+        yield server.start_serving()
+        pool = RedisPool(timeout=30, **kw)
+        yield pool.redis(server.sock.getsockname(), cache=cache)
+
+
+class TestAutoPipeline(FakeRedisTest):
+
+    def test_fan_out(self):
+        with self.fake_server() as server:
+            client = yield self.client(server, auto_pipeline=True)
+            result = yield execute(*[(client.set, 'key%s' % n, n)
+                                     for n in range(100)])
+            result = yield multi_async(result)
+            self.assertEqual(result, [True]*100)
+            result = yield execute(*[(client.get, 'key%s' % n)
+                                     for n in range(100)])
+            result = yield multi_async(result)
+            self.assertEqual(result, [str(n).encode('utf-8')
+                                      for n in range(100)])
+            self.assertEqual(len(server.connections), 1)
+            self.assertTrue(server.reads < 10)
+
+    def test_error(self):
+        with self.fake_server() as server:
+            client = yield self.client(server, auto_pipeline=True)
+            ping, error, get = yield execute((client.ping,),
+                                             (client.execute_command, 'FOO'),
+                                             (client.get, 'bla'))
+            result = yield ping
+            self.assertEqual(result, True)
+            yield self.async.assertRaises(ResponseError, lambda: error)
+            result = yield get
+            self.assertEqual(result, None)
+            self.assertEqual(len(server.connections), 1)
+
+    def test_no_auto_pipeline(self):
+        with self.fake_server() as server:
+            client = yield self.client(server)
+            result = yield multi_async([client.ping() for n in range(10)])
+            self.assertEqual(result, [True]*10)
+            self.assertEqual(server.reads, 10)
+
+
+class TestMultiplexed(FakeRedisTest):
+
+    def test_multiplex(self):
+        with self.fake_server() as server:
+            client = yield self.client(server, multiplex=2)
+            result = yield multi_async([client.set('key%s' % n, n)
+                                        for n in range(100)])
+            self.assertEqual(result, [True]*100)
+            result = yield multi_async([client.get('key%s' % n)
+                                        for n in range(100)])
+            self.assertEqual(result, [str(n).encode('utf-8')
+                                      for n in range(100)])
+            self.assertEqual(len(server.connections), 2)
+
+    def test_multiplex_auto_pipeline(self):
+        with self.fake_server() as server:
+            client = yield self.client(server, multiplex=2,
+                                       auto_pipeline=True)
+            result = yield execute(*[(client.ping,) for n in range(100)])
+            result = yield multi_async(result)
+            self.assertEqual(result, [True]*100)
+            self.assertEqual(len(server.connections), 1)
+            self.assertTrue(server.reads < 10)
+
+    def test_connection_lost(self):
+        with self.fake_server() as server:
+            client = yield self.client(server, multiplex=1)
+            ping, close, get = yield execute(
+                (client.ping,), (client.execute_command, 'CLOSE'),
+                (client.get, 'bla'))
+            result = yield ping
+            self.assertEqual(result, True)
+            yield self.async.assertRaises(ConnectionError, lambda: close)
+            yield self.async.assertRaises(ConnectionError, lambda: get)
+            result = yield client.ping()
+            self.assertEqual(result, True)
+            self.assertEqual(len(server.connections), 2)
+
+
+class TestClientCache(FakeRedisTest):
+
+    def test_repeat_reads(self):
+        with self.fake_server() as server:
+            cache = ClientCache(patterns=['config:*'])
+            client = yield self.client(server, cache=cache)
+            result = yield client.set('config:a', 'foo')
+            self.assertEqual(result, True)
+            reads = server.reads
+            for n in range(10):
+                result = yield client.get('config:a')
+                self.assertEqual(result, b'foo')
+            # Only the first read hits the server
+            self.assertEqual(server.reads, reads + 1)
+            self.assertEqual(cache.hits, 9)
+            self.assertEqual(cache.misses, 1)
+            # Keys not matching the patterns are not cached
+            yield client.get('other')
+            yield client.get('other')
+            self.assertEqual(server.reads, reads + 3)
+            self.assertEqual(len(cache), 1)
+
+    def test_write_invalidates(self):
+        with self.fake_server() as server:
+            cache = ClientCache()
+            client = yield self.client(server, cache=cache)
+            yield client.set('a', 'foo')
+            result = yield client.get('a')
+            self.assertEqual(result, b'foo')
+            self.assertEqual(len(cache), 1)
+            yield client.set('a', 'bla')
+            self.assertEqual(len(cache), 0)
+            result = yield client.get('a')
+            self.assertEqual(result, b'bla')
+            result = yield client.get('a')
+            self.assertEqual(result, b'bla')
+            self.assertEqual(cache.hits, 1)
+
+    def test_rename_invalidates(self):
+        with self.fake_server() as server:
+            cache = ClientCache()
+            client = yield self.client(server, cache=cache)
+            yield client.set('a', 'foo')
+            yield client.set('b', 'bla')
+            result = yield client.get('b')
+            self.assertEqual(result, b'bla')
+            yield client.rename('a', 'b')
+            self.assertEqual(len(cache), 0)
+            result = yield client.get('b')
+            self.assertEqual(result, b'foo')
+
+    def test_rpoplpush_invalidates(self):
+        with self.fake_server() as server:
+            cache = ClientCache()
+            client = yield self.client(server, cache=cache)
+            yield client.rpush('a', 'foo')
+            yield client.rpush('b', 'bla')
+            result = yield client.lrange('b', 0, -1)
+            self.assertEqual(result, [b'bla'])
+            result = yield client.rpoplpush('a', 'b')
+            self.assertEqual(result, b'foo')
+            self.assertEqual(len(cache), 0)
+            result = yield client.lrange('b', 0, -1)
+            self.assertEqual(result, [b'foo', b'bla'])
+
+    def test_ttl_and_size(self):
+        with self.fake_server() as server:
+            cache = ClientCache(ttl=0, max_entries=2)
+            client = yield self.client(server, cache=cache)
+            yield client.get('a')
+            yield client.get('a')
+            self.assertEqual(cache.hits, 0)
+            cache.ttl = 60
+            for key in ('a', 'b', 'c'):
+                yield client.get(key)
+            self.assertEqual(len(cache), 2)
+            yield client.get('c')
+            self.assertEqual(cache.hits, 1)
+
+    def test_invalidation_channel(self):
+        with self.fake_server() as server:
+            cache = ClientCache(channel='invalidate')
+            client = yield self.client(server, cache=cache)
+            yield cache.listen(client)
+            address = client.connection_info.address
+            other = client.connection_pool.redis(address)
+            yield other.set('a', 'foo')
+            result = yield client.get('a')
+            self.assertEqual(result, b'foo')
+            yield other.set('a', 'bla')
+            result = yield client.get('a')
+            self.assertEqual(result, b'foo')
+            result = yield other.publish('invalidate', 'a')
+            self.assertEqual(result, 1)
+            yield async_while(5, len, cache)
+            result = yield client.get('a')
+            self.assertEqual(result, b'bla')
@@ -0,0 +1,94 @@
+'''Websocket broadcast with fake transports.'''
+from pulsar.apps.test import unittest
+from pulsar.apps.ws import WS, WebSocketProtocol, broadcast
+from pulsar.utils.websocket import FrameParser
+
+
+class FakeTransport(object):
+    closing = False
+    writing_paused = False
+
+    def __init__(self, buffer_size=0):
+        self.buffer_size = buffer_size
+        self.data = []
+
+    def get_write_buffer_size(self):
+        return self.buffer_size
+
+    def write(self, data):
+        self.data.append(data)
+
+
+class FakeConnection(object):
+
+    def __init__(self, transport):
+        self.transport = transport
+
+
+def websocket(transport=None, parser=None):
+    websocket = WebSocketProtocol(None, WS(), parser or FrameParser())
+    websocket._connection = FakeConnection(transport or FakeTransport())
+    return websocket
+
+
+class TestBroadcast(unittest.TestCase):
+
+    def test_encode_once(self):
+        websockets = [websocket() for _ in range(10)]
+        self.assertEqual(broadcast(websockets, 'Hello'), 10)
+        data = websockets[0].transport.data[0]
+        self.assertEqual(data, FrameParser().encode('Hello').msg)
+        for ws in websockets:
+            self.assertTrue(ws.transport.data[0] is data)
+
+    def test_same_bytes_as_write(self):
+        ws1, ws2 = websocket(), websocket()
+        broadcast([ws1], b'\x00\x01')
+        ws2.write(b'\x00\x01')
+        self.assertEqual(ws1.transport.data, ws2.transport.data)
+
+    def test_skip(self):
+        closing = FakeTransport()
+        closing.closing = True
+        paused = FakeTransport()
+        paused.writing_paused = True
+        full = FakeTransport(2000)
+        websockets = [websocket(closing), websocket(paused), websocket(full),
+                      websocket()]
+        self.assertEqual(broadcast(websockets, 'Hello', max_buffer_size=1000),
+                         1)
+        self.assertFalse(closing.data)
+        self.assertFalse(paused.data)
+        self.assertFalse(full.data)
+        self.assertEqual(broadcast(websockets[2:], 'Hello'), 2)
+
+    def test_masked(self):
+        websockets = [websocket(parser=FrameParser(kind=1)) for _ in range(2)]
+        self.assertEqual(broadcast(websockets, 'Hello'), 2)
+        data1 = websockets[0].transport.data[0]
+        data2 = websockets[1].transport.data[0]
+        self.assertNotEqual(data1[2:6], data2[2:6])
+        parser = FrameParser()
+        self.assertEqual(parser.decode(data1).body, 'Hello')
+        self.assertEqual(parser.decode(data2).body, 'Hello')
+
+    def test_deflate(self):
+        offers = ['permessage-deflate']
+        websockets = [websocket(parser=FrameParser(extensions=offers))
+                      for _ in range(2)]
+        message = 'x'*500
+        self.assertEqual(broadcast(websockets, message), 2)
+        data1 = websockets[0].transport.data[0]
+        data2 = websockets[1].transport.data[0]
+        self.assertFalse(data1 is data2)
+        extensions = websockets[0].parser.extensions
+        client = FrameParser(kind=1, extensions=extensions)
+        self.assertEqual(client.decode(data1).body, message)
+        # stateless compression, the frame is shared
+        offers = ['permessage-deflate; server_no_context_takeover']
+        websockets = [websocket(parser=FrameParser(extensions=offers))
+                      for _ in range(2)]
+        self.assertEqual(broadcast(websockets, message), 2)
+        data1 = websockets[0].transport.data[0]
+        self.assertTrue(websockets[1].transport.data[0] is data1)
+        self.assertEqual(client.decode(data1).body, message)
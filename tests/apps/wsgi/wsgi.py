@@ -151,6 +151,16 @@ class testWsgiApplication(unittest.TestCase):
         app = server(bind='127.0.0.1:0')
         app2 = pickle.loads(pickle.dumps(app))
 
+    def test_preload(self):
+        from examples.httpbin.manage import server
+        app = server(bind='127.0.0.1:0', preload_app=True)
+        self.assertTrue(app.cfg.preload_app)
+        self.assertFalse(app.callable.local.handler)
+        app.preload(None)
+        handler = app.callable.local.handler
+        self.assertTrue(handler)
+        self.assertEqual(app.callable.handler, handler)
+
 
 class TestWsgiMiddleware(unittest.TestCase):
 
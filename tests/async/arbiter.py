@@ -88,6 +88,8 @@ class TestArbiterThread(ActorTestMixin, unittest.TestCase):
         self.assertEqual(future.aid, proxy.aid)
         self.assertEqual(proxy.name, name)
         self.assertTrue(proxy.aid in arbiter.managed_actors)
+        self.assertTrue(proxy.spawn_time > 0)
+        self.assertEqual(proxy.info['spawn_time'], proxy.spawn_time)
         yield send(proxy, 'stop')
 
     @run_on_arbiter
@@ -174,3 +176,85 @@ class TestArbiterThread(ActorTestMixin, unittest.TestCase):
 @dont_run_with_thread
 class TestArbiterProcess(TestArbiterThread):
     concurrency = 'process'
+
+
+class TestAutoScaler(unittest.TestCase):
+
+    def scaler(self, **params):
+        defaults = dict(workers=2, min_workers=1, max_workers=4,
+                        autoscale_idle=60)
+        defaults.update(params)
+        cfg = pulsar.Config(**defaults)
+        return pulsar.AutoScaler(cfg)
+
+    def busy(self, n=2):
+        return n*[{'actor': {'concurrent_requests': 200},
+                   'events': {'lag': 0}}]
+
+    def idle(self, n=2):
+        return n*[{'actor': {'concurrent_requests': 0},
+                   'events': {'lag': 0}}]
+
+    def test_actor_load(self):
+        scaler = self.scaler(autoscale_load=100, autoscale_lag=0.5)
+        self.assertEqual(scaler.actor_load({}), 0)
+        self.assertEqual(scaler.actor_load(
+            {'actor': {'concurrent_requests': 50}}), 0.5)
+        self.assertEqual(scaler.actor_load(
+            {'actor': {'concurrent_requests': 50},
+             'events': {'lag': 1}}), 2)
+        scaler = self.scaler(autoscale_load=0, autoscale_lag=0)
+        self.assertEqual(scaler.actor_load(
+            {'actor': {'concurrent_requests': 50},
+             'events': {'lag': 1}}), 0)
+
+    def test_grow_when_sustained(self):
+        scaler = self.scaler()
+        self.assertEqual(scaler(self.busy(), 0), 2)
+        self.assertEqual(scaler(self.busy(), pulsar.AUTOSCALE_SUSTAIN-1), 2)
+        self.assertEqual(scaler(self.busy(), pulsar.AUTOSCALE_SUSTAIN), 3)
+        self.assertEqual(scaler.load, 2)
+
+    def test_cooldown_and_bounds(self):
+        scaler = self.scaler()
+        now = pulsar.AUTOSCALE_SUSTAIN
+        scaler(self.busy(), 0)
+        self.assertEqual(scaler(self.busy(), now), 3)
+        # high load again but in the cool-down period
+        scaler(self.busy(), now + 1)
+        self.assertEqual(scaler(self.busy(), 2*now + 1), 3)
+        now += pulsar.AUTOSCALE_COOLDOWN
+        scaler(self.busy(), now)
+        self.assertEqual(scaler(self.busy(), now + pulsar.AUTOSCALE_SUSTAIN),
+                         4)
+        # max_workers reached
+        now += 10*pulsar.AUTOSCALE_COOLDOWN
+        scaler(self.busy(), now)
+        self.assertEqual(scaler(self.busy(), now + pulsar.AUTOSCALE_SUSTAIN),
+                         4)
+
+    def test_shrink_after_idle(self):
+        scaler = self.scaler()
+        self.assertEqual(scaler(self.idle(), 0), 2)
+        self.assertEqual(scaler(self.idle(), 59), 2)
+        self.assertEqual(scaler(self.idle(), 60), 1)
+        # min_workers reached
+        self.assertEqual(scaler(self.idle(), 1000), 1)
+        self.assertEqual(scaler(self.idle(), 2000), 1)
+
+    def test_hysteresis(self):
+        scaler = self.scaler()
+        medium = [{'actor': {'concurrent_requests': 50}}]
+        scaler(self.busy(), 0)
+        # a medium load resets the high load period
+        scaler(medium, 5)
+        self.assertEqual(scaler(self.busy(), pulsar.AUTOSCALE_SUSTAIN), 2)
+        scaler(self.idle(), 20)
+        scaler(medium, 50)
+        self.assertEqual(scaler(self.idle(), 80), 2)
+
+    def test_no_info(self):
+        scaler = self.scaler(workers=6)
+        self.assertEqual(scaler([], 0), 4)
+        self.assertEqual(scaler.info()['max_workers'], 4)
+        self.assertEqual(scaler.info()['min_workers'], 1)
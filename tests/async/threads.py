@@ -32,4 +32,29 @@ class TestThreadQueue(unittest.TestCase):
         yield async_while(3, lambda: pool.num_threads)
         self.assertFalse(pool.num_threads)
         
-        
\ No newline at end of file
+        
+    def test_apply(self):
+        pool = self.get_pool(threads=2)
+        result = yield pool.apply(lambda a, b=1: a + b, 3, b=4)
+        self.assertEqual(result, 7)
+        info = pool.info()
+        self.assertEqual(info['submitted'], 1)
+        self.assertEqual(info['completed'], 1)
+        self.assertEqual(info['queued'], 0)
+        self.assertEqual(info['running'], 0)
+        self.assertTrue(info['run_time'] >= 0)
+        self.assertTrue(info['wait_time'] >= 0)
+
+    def test_apply_error(self):
+        pool = self.get_pool()
+        yield self.async.assertRaises(ZeroDivisionError, pool.apply,
+                                      lambda: 1/0)
+
+    def test_map(self):
+        pool = self.get_pool(threads=3)
+        result = yield pool.map(lambda a, b: a*b, range(20), range(20))
+        self.assertEqual(result, [a*a for a in range(20)])
+        info = pool.info()
+        self.assertEqual(info['submitted'], 20)
+        self.assertEqual(info['completed'], 20)
+        self.assertEqual(info['status'], 'running')
@@ -0,0 +1,72 @@
+'''Dispatch of pubsub messages to 1, 100 and 10,000 local clients.
+
+Compare clients encoding a websocket frame for each message they receive
+with clients sharing a :attr:`pulsar.apps.pubsub.Client.encoder`, called
+once per message by :meth:`pulsar.apps.pubsub.PubSubBackend.dispatch`.
+To run::
+
+    python runtests.py bench.pubsub_broadcast --benchmark
+'''
+from pulsar.utils.pep import range
+from pulsar.utils.websocket import FrameParser
+from pulsar.apps.test import unittest
+from pulsar.apps.pubsub import Client, PubSubBackend
+
+
+def encode_frame(message):
+    return FrameParser().encode(message)
+
+
+class FrameClient(Client):
+    parser = FrameParser()
+
+    def __call__(self, channel, message):
+        self.frame = self.parser.encode(message)
+
+
+class EncodedClient(Client):
+    encoder = staticmethod(encode_frame)
+
+    def __call__(self, channel, message):
+        self.frame = message
+
+
+class Broadcast(object):
+    __benchmark__ = True
+    __number__ = 10
+    messages = bench_items = 10
+    bench_unit = 'messages'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.message = b'x'*200
+        cls.backends = {}
+        for Client in (FrameClient, EncodedClient):
+            backend = PubSubBackend('local', None)
+            for _ in range(cls.clients):
+                backend.add_client(Client())
+            cls.backends[Client] = backend
+
+    def dispatch(self, backend):
+        for _ in range(self.messages):
+            backend.broadcast('bench', self.message)
+        self.assertEqual(backend.dispatch(), self.messages)
+
+    def test_encode_per_client(self):
+        self.dispatch(self.backends[FrameClient])
+
+    def test_shared_encoder(self):
+        self.dispatch(self.backends[EncodedClient])
+
+
+class TestBroadcast1(Broadcast, unittest.TestCase):
+    clients = 1
+
+
+class TestBroadcast100(Broadcast, unittest.TestCase):
+    clients = 100
+
+
+class TestBroadcast10000(Broadcast, unittest.TestCase):
+    __number__ = 3
+    clients = 10000
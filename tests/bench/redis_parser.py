@@ -0,0 +1,117 @@
+'''Redis reply parsing with large replies generated locally and command
+packing.
+
+Compare the pure python parser with the C parser, when the extension is
+available. To run::
+
+    python runtests.py bench.redis_parser --benchmark
+'''
+from pulsar import ProtocolError
+from pulsar.utils.pep import range
+from pulsar.apps.test import unittest
+from pulsar.apps.redis.parser import Parser
+try:
+    from pulsar.apps.redis import cparser
+except ImportError:     # pragma    nocover
+    cparser = None
+
+
+def bulk(value):
+    return ('$%s\r\n' % len(value)).encode('utf-8') + value + b'\r\n'
+
+
+def array_reply(size):
+    # The reply of a LRANGE or MGET with size elements
+    value = b'x'*20
+    return ('*%s\r\n' % size).encode('utf-8') + b''.join(
+        bulk(value) for _ in range(size))
+
+
+def pipeline_reply(size):
+    # The replies of a pipeline of size INCR commands
+    return b''.join((':%s\r\n' % n).encode('utf-8') for n in range(size))
+
+
+class TestPythonParser(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 20
+    size = 10000
+    chunk_size = 4096
+
+    @classmethod
+    def setUpClass(cls):
+        cls.array = array_reply(cls.size)
+        cls.pipeline = pipeline_reply(cls.size)
+
+    def parser(self):
+        return Parser(ProtocolError, Exception)
+
+    def test_array(self):
+        parser = self.parser()
+        parser.feed(self.array)
+        self.assertEqual(len(parser.get()), self.size)
+
+    def test_array_chunks(self):
+        # The reply is received in several network reads
+        parser = self.parser()
+        data = self.array
+        result = False
+        for n in range(0, len(data), self.chunk_size):
+            parser.feed(data[n:n+self.chunk_size])
+            result = parser.get()
+        self.assertEqual(len(result), self.size)
+
+    def test_pipeline(self):
+        parser = self.parser()
+        parser.feed(self.pipeline)
+        get = parser.get
+        for n in range(self.size):
+            self.assertEqual(get(), n)
+
+
+@unittest.skipUnless(cparser, 'Requires cython extensions')
+class TestCParser(TestPythonParser):
+
+    def parser(self):
+        return cparser.RedisParser(ProtocolError, Exception)
+
+
+class TestPythonPack(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 20
+    commands = bench_items = 10000
+    bench_unit = 'commands'
+
+    def parser(self):
+        return Parser(ProtocolError, Exception)
+
+    def test_get(self):
+        pack = self.parser().pack_command
+        for n in range(self.commands):
+            pack('GET', 'key:1')
+
+    def test_set(self):
+        pack = self.parser().pack_command
+        value = b'x'*20
+        for n in range(self.commands):
+            pack('SET', 'key:1', value)
+
+    def test_hincrby(self):
+        pack = self.parser().pack_command
+        for n in range(self.commands):
+            pack('HINCRBY', 'hash:1', 'field', 1)
+
+    def test_pipeline(self):
+        # 100-commands pipelines
+        pack = self.parser().pack_pipeline
+        commands = [(('HINCRBY', 'hash:1', 'field%s' % n, n), {})
+                    for n in range(100)]
+        for n in range(self.commands//100):
+            pack(commands)
+
+
+@unittest.skipUnless(cparser, 'Requires cython extensions')
+class TestCPack(TestPythonPack):
+
+    def parser(self):
+        return cparser.RedisParser(ProtocolError, Exception)
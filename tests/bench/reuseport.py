@@ -0,0 +1,83 @@
+'''Accept distribution and latency of a socket server with several workers.
+
+Compare workers sharing the arbiter listening socket with workers listening
+on their own ``SO_REUSEPORT`` socket. To run::
+
+    python runtests.py bench.reuseport --benchmark
+'''
+from pulsar import send, multi_async
+from pulsar.utils.internet import SO_REUSEPORT
+from pulsar.utils.pep import default_timer, range
+from pulsar.apps.test import unittest, dont_run_with_thread
+from pulsar.apps.test.plugins.bench import BENCHMARK_TEMPLATE, RATE_TEMPLATE
+
+from examples.echo.manage import server, Echo
+
+
+def echo(pool, address):
+    start = default_timer()
+    # QUIT is echoed back and the server closes the connection
+    yield pool.request(address, b'QUIT')
+    yield default_timer() - start
+
+
+@dont_run_with_thread
+class TestSharedSocket(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10
+    workers = 4
+    connections = bench_items = 200
+    bench_unit = 'connections'
+    reuse_port = False
+    server = None
+    benchmark_template = (BENCHMARK_TEMPLATE + RATE_TEMPLATE +
+                          ' Latency {0[latency]} ms. Connections per worker '
+                          '{0[accepted]}.')
+
+    @classmethod
+    def setUpClass(cls):
+        s = server(name=cls.__name__.lower(), bind='127.0.0.1:0',
+                   workers=cls.workers, concurrency='process',
+                   reuse_port=cls.reuse_port)
+        cls.server = yield send('arbiter', 'run', s)
+        cls.latency = []
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.server:
+            yield send('arbiter', 'kill_actor', cls.server.name)
+
+    def getTime(self, dt):
+        return self.elapsed
+
+    def getSummary(self, info, number, total_time, total_time2):
+        latency = self.latency
+        info['latency'] = '%.3f' % (1000*sum(latency)/len(latency))
+        info['accepted'] = self.accepted
+        return info
+
+    def worker_connections(self):
+        info = yield send('arbiter', 'info')
+        workers = info['monitors'][self.server.name]['workers']
+        infos = yield multi_async((send(w['actor']['actor_id'], 'info')
+                                   for w in workers))
+        yield sorted((sum(s['received_connections'] for s in i['socket'])
+                      for i in infos), reverse=True)
+
+    def test_accept(self):
+        # Each concurrent request is served by a new connection
+        pool = Echo()
+        address = self.server.address
+        start = default_timer()
+        latency = yield multi_async((echo(pool, address)
+                                     for _ in range(self.connections)))
+        self.elapsed = default_timer() - start
+        self.latency.extend(latency)
+        yield pool.close()
+        self.accepted = yield self.worker_connections()
+        self.assertEqual(len(self.accepted), self.workers)
+
+
+@unittest.skipUnless(SO_REUSEPORT, 'SO_REUSEPORT not available')
+class TestReusePort(TestSharedSocket):
+    reuse_port = True
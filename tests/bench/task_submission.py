@@ -0,0 +1,42 @@
+'''Submission of 1,000 tasks to the local task store.
+
+Compare :meth:`pulsar.apps.tasks.backends.local.LocalTaskBackend.put_tasks`,
+used by :meth:`pulsar.apps.tasks.backends.TaskBackend.run_jobs`, with saving
+and queuing one task at a time as done by
+:meth:`pulsar.apps.tasks.backends.TaskBackend.run_job`. In a running task
+queue each call to the store is also a round trip to the task queue
+monitor, therefore the gain of bulk submission is larger. To run::
+
+    python runtests.py bench.task_submission --benchmark
+'''
+from pulsar import maybe_async
+from pulsar.utils.pep import range
+from pulsar.apps.test import unittest
+from pulsar.apps.tasks import states
+from pulsar.apps.tasks.backends.local import LocalTaskBackend
+
+
+class TestTaskSubmission(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10
+    size = bench_items = 1000
+    bench_unit = 'tasks submitted'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tasks = [{'id': 'task%s' % n, 'name': 'addition',
+                      'args': (), 'kwargs': {'a': n, 'b': 1},
+                      'priority': 1} for n in range(cls.size)]
+
+    def test_put_tasks(self):
+        backend = LocalTaskBackend('bench')
+        self.assertEqual(len(backend.put_tasks(self.tasks)), self.size)
+
+    def test_put_task(self):
+        backend = LocalTaskBackend('bench')
+        for params in self.tasks:
+            params = dict(params)
+            task_id = params.pop('id')
+            backend.save_task(task_id, status=states.PENDING, **params)
+            maybe_async(backend.put_task(task_id))
+        self.assertEqual(backend.queue.qsize(), self.size)
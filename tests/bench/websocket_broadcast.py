@@ -0,0 +1,37 @@
+'''Broadcast of a message to 10,000 websockets with fake transports.
+
+Compare :func:`pulsar.apps.ws.broadcast`, which encodes the frame once, with
+writing the message to each websocket. To run::
+
+    python runtests.py bench.websocket_broadcast --benchmark
+'''
+from pulsar.utils.pep import range
+from pulsar.apps.test import unittest
+from pulsar.apps.ws import broadcast
+
+from tests.apps.ws import websocket
+
+
+class TestBroadcast(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10
+    clients = bench_items = 10000
+    bench_unit = 'messages'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.websockets = [websocket() for _ in range(cls.clients)]
+        cls.message = 'x'*200
+
+    def setUp(self):
+        for ws in self.websockets:
+            ws.transport.data = []
+
+    def test_broadcast(self):
+        self.assertEqual(broadcast(self.websockets, self.message),
+                         self.clients)
+
+    def test_write(self):
+        message = self.message
+        for ws in self.websockets:
+            ws.write(message)
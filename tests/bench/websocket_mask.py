@@ -0,0 +1,57 @@
+'''Websocket payload masking with payloads from 10 bytes to 10 MB.
+
+Compare the whole buffer masking algorithm with the byte by byte loop.
+To run::
+
+    python runtests.py bench.websocket_mask --benchmark
+'''
+import os
+
+from pulsar.apps.test import unittest
+from pulsar.utils.websocket import websocket_mask
+
+from tests.utils.frame import loop_mask
+
+
+SIZES = {'test_10b': 10,
+         'test_1kb': 2**10,
+         'test_100kb': 100*2**10,
+         'test_10mb': 10*2**20}
+
+
+class TestMask(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10
+    mask = staticmethod(websocket_mask)
+    bench_unit = 'MB'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.masking_key = os.urandom(4)
+        cls.payloads = dict(((name, os.urandom(size))
+                             for name, size in SIZES.items()))
+
+    def _mask(self):
+        data = self.payloads[self._testMethodName]
+        self.bench_items = len(data)/2.**20
+        self.assertEqual(len(self.mask(data, self.masking_key)), len(data))
+
+    def test_10b(self):
+        self._mask()
+
+    def test_1kb(self):
+        self._mask()
+
+    def test_100kb(self):
+        self._mask()
+
+    def test_10mb(self):
+        self._mask()
+
+
+class TestLoopMask(TestMask):
+    mask = staticmethod(loop_mask)
+
+    @unittest.skip('Too slow with the byte by byte loop')
+    def test_10mb(self):
+        pass
@@ -47,6 +47,53 @@ class TestPulsarStreams(unittest.TestCase):
         self.assertFalse(client.available_connections)
         self.assertEqual(connection.session, 1)
         self.assertEqual(connection.processed, 1)
+        self.assertEqual(client.connections_created, 1)
+        self.assertEqual(client.connections_reused, 1)
+
+    def test_connection_counters(self):
+        client = self.client()
+        for n in range(3):
+            result = yield client.request(self.server.address, b'ciao')
+            self.assertEqual(result, b'ciao')
+        self.assertEqual(client.connections_created, 1)
+        self.assertEqual(client.connections_reused, 2)
+        self.assertEqual(client.connections_discarded, 0)
+        self.assertEqual(client.available_connections, 1)
+
+    def test_server_closed_idle_connection(self):
+        client = self.client()
+        result = yield client.request(self.server.address, b'QUIT')
+        self.assertEqual(result, b'QUIT')
+        # the server closed the connection, the pool discards it
+        yield pulsar.async_while(5, lambda: client.available_connections)
+        self.assertEqual(client.available_connections, 0)
+        self.assertEqual(client.connections_discarded, 1)
+        result = yield client.request(self.server.address, b'ciao')
+        self.assertEqual(result, b'ciao')
+        self.assertEqual(client.connections_created, 2)
+        self.assertEqual(client.connections_reused, 0)
+
+    def test_max_idle(self):
+        client = self.client(max_idle=1)
+        result = yield client.request(self.server.address, b'ciao')
+        self.assertEqual(result, b'ciao')
+        self.assertEqual(client.available_connections, 1)
+        # the periodic pruning closes the idle connection
+        yield pulsar.async_while(5, lambda: client.available_connections)
+        self.assertEqual(client.available_connections, 0)
+        self.assertEqual(client.connections_discarded, 1)
+        client.close()
+
+    def test_max_lifetime(self):
+        client = self.client(max_lifetime=0.5)
+        result = yield client.request(self.server.address, b'ciao')
+        self.assertEqual(result, b'ciao')
+        yield pulsar.async_sleep(0.6)
+        result = yield client.request(self.server.address, b'ciao')
+        self.assertEqual(result, b'ciao')
+        self.assertEqual(client.connections_created, 2)
+        self.assertEqual(client.connections_reused, 0)
+        client.close()
         
         
 @dont_run_with_thread
@@ -1,12 +1,24 @@
 from random import randint
+from array import array
 import struct
 
 from pulsar import ProtocolError
 from pulsar.apps.test import unittest
-from pulsar.utils.websocket import Frame, int2bytes, i2b, FrameParser
+from pulsar.utils.websocket import (Frame, int2bytes, i2b, FrameParser,
+                                    websocket_mask)
+from pulsar.utils.pep import ispy3k
 import pulsar.apps.ws
 
 
+def loop_mask(data, masking_key):
+    # The byte by byte masking algorithm
+    key = array('B', masking_key)
+    data = array('B', data)
+    for i in range(len(data)):
+        data[i] ^= key[i % 4]
+    return data.tobytes() if ispy3k else data.tostring()
+
+
 class FrameTest(unittest.TestCase):
     
     @classmethod
@@ -75,6 +87,16 @@ class FrameTest(unittest.TestCase):
         msg = int2bytes(0x81,0x85,0x37,0xfa,0x21,0x3d,0x7f,0x9f,0x4d,0x51,0x58)
         self.assertTrue(f.masked)
         self.assertEqual(msg, f.msg)
+
+    def testMaskAgainstLoop(self):
+        for masking_key in (b'ciao', int2bytes(0, 0, 0, 0),
+                            int2bytes(0, 255, 0, 1)):
+            for data in (b'', b'\x00', b'\x00\x00abc', b'Hello', self.bdata,
+                         self.bdata[:253], self.large_bdata):
+                self.assertEqual(websocket_mask(data, masking_key),
+                                 loop_mask(data, masking_key))
+                masked = websocket_mask(bytearray(data), masking_key)
+                self.assertEqual(websocket_mask(masked, masking_key), data)
         
     def testParser(self):
         p = FrameParser()
@@ -113,10 +135,152 @@ class FrameTest(unittest.TestCase):
         self.assertTrue(pframe)
         self.assertEqual(pframe.payload_length, len(self.large_bdata))
         self.assertEqual(pframe.body, self.large_bdata)
+
+    def testChunkedParsing(self):
+        p = FrameParser()
+        frame = Frame(self.large_bdata, opcode=0x2, final=True,
+                      masking_key='ciao')
+        ping = Frame('ping', opcode=0x9, final=True, masking_key='ciao')
+        data = frame.msg + ping.msg
+        frames = []
+        for n in range(0, len(data), 1000):
+            pframe = p.decode(data[n:n+1000])
+            while pframe:
+                frames.append(pframe)
+                pframe = p.decode()
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[0].body, self.large_bdata)
+        self.assertTrue(frames[1].is_ping)
+        self.assertEqual(frames[1].body, b'ping')
+
+    def testFragmentedMessage(self):
+        p = FrameParser()
+        f1 = Frame('Hel', opcode=0x1, final=False, masking_key='ciao')
+        f2 = Frame('lo', opcode=0x0, final=False, masking_key='ciao')
+        f3 = Frame(' world', opcode=0x0, final=True, masking_key='ciao')
+        ping = Frame('ping', opcode=0x9, final=True, masking_key='ciao')
+        self.assertEqual(p.decode(f1.msg), None)
+        # control frames can be injected in between fragments
+        pframe = p.decode(f2.msg + ping.msg)
+        self.assertTrue(pframe.is_ping)
+        pframe = p.decode(f3.msg)
+        self.assertTrue(pframe.is_message)
+        self.assertTrue(pframe.final)
+        self.assertEqual(pframe.body, 'Hello world')
+        self.assertEqual(pframe.payload_length, 11)
+
+    def testBadContinuation(self):
+        p = FrameParser()
+        frame = Frame('lo', opcode=0x0, final=True, masking_key='ciao')
+        self.assertRaises(ProtocolError, p.decode, frame.msg)
+        f1 = Frame('Hel', opcode=0x1, final=False, masking_key='ciao')
+        f2 = Frame('lo', opcode=0x1, final=True, masking_key='ciao')
+        self.assertEqual(p.decode(f1.msg), None)
+        self.assertRaises(ProtocolError, p.decode, f2.msg)
+
+    def testMaxMessageSize(self):
+        p = FrameParser(max_message_size=200)
+        frame = Frame(self.bdata, opcode=0x2, final=True, masking_key='ciao')
+        # rejected from the frame header only
+        self.assertRaises(ProtocolError, p.decode, frame.msg[:8])
+        f1 = Frame(self.bdata[:150], opcode=0x2, final=False,
+                   masking_key='ciao')
+        f2 = Frame(self.bdata[:100], opcode=0x0, final=True,
+                   masking_key='ciao')
+        self.assertEqual(p.decode(f1.msg), None)
+        self.assertRaises(ProtocolError, p.decode, f2.msg)
+        frame = Frame(self.bdata[:200], opcode=0x2, final=True,
+                      masking_key='ciao')
+        pframe = p.decode(frame.msg)
+        self.assertEqual(pframe.body, self.bdata[:200])
         
         
 class Extensions(unittest.TestCase):
     
     def testDeflate(self):
         parser = FrameParser(extensions=['x-webkit-deflate-frame'])
-        pass
\ No newline at end of file
+
+    def parsers(self, *offers, **kw):
+        server = FrameParser(extensions=offers, **kw)
+        client = FrameParser(kind=1, extensions=server.extensions)
+        return server, client
+
+    def testPerMessageDeflateNegotiation(self):
+        server, client = self.parsers('permessage-deflate; '
+                                      'client_max_window_bits')
+        self.assertEqual(server.extensions, ('permessage-deflate',))
+        self.assertEqual(client.extensions, ('permessage-deflate',))
+        server, client = self.parsers('permessage-deflate; '
+                                      'server_no_context_takeover; '
+                                      'client_max_window_bits=10')
+        self.assertEqual(server.extensions,
+                         ('permessage-deflate; server_no_context_takeover; '
+                          'client_max_window_bits=10',))
+        self.assertTrue(server.stateless)
+        self.assertFalse(client.stateless)
+        # first acceptable offer
+        server, client = self.parsers('permessage-deflate; foo',
+                                      'permessage-deflate; '
+                                      'server_max_window_bits=8',
+                                      'permessage-deflate; '
+                                      'server_max_window_bits=10')
+        self.assertEqual(server.extensions,
+                         ('permessage-deflate; server_max_window_bits=10',))
+        server, client = self.parsers('permessage-deflate; foo')
+        self.assertEqual(server.extensions, ())
+        self.assertTrue(server.stateless)
+
+    def testPerMessageDeflate(self):
+        server, client = self.parsers('permessage-deflate')
+        message = '{"channel": "webchat", "message": "%s"}' % ('x'*200)
+        frame = client.encode(message)
+        self.assertTrue(frame.rsv1)
+        self.assertTrue(len(frame.msg) < len(message))
+        pframe = server.decode(frame.msg)
+        self.assertTrue(pframe.is_message)
+        self.assertEqual(pframe.body, message)
+        # context takeover, the second message is smaller
+        frame2 = client.encode(message)
+        self.assertTrue(len(frame2.msg) < len(frame.msg))
+        self.assertEqual(server.decode(frame2.msg).body, message)
+        # server to client
+        data = b''.join((i2b(randint(0, 255)) for v in range(1000)))*100
+        frame = server.encode(data, opcode=0x2)
+        self.assertTrue(frame.rsv1)
+        pframe = client.decode(frame.msg[:100])
+        self.assertEqual(pframe, None)
+        pframe = client.decode(frame.msg[100:])
+        self.assertTrue(pframe.is_bytes)
+        self.assertEqual(pframe.body, data)
+
+    def testPerMessageDeflateThreshold(self):
+        server, client = self.parsers('permessage-deflate')
+        frame = server.encode('Hello')
+        self.assertFalse(frame.rsv1)
+        self.assertEqual(client.decode(frame.msg).body, 'Hello')
+        # control frames are never compressed
+        frame = server.ping('x'*125)
+        self.assertFalse(frame.rsv1)
+
+    def testPerMessageDeflateNoContextTakeover(self):
+        server, client = self.parsers('permessage-deflate; '
+                                      'server_no_context_takeover')
+        message = 'x'*500
+        frame1 = server.encode(message)
+        frame2 = server.encode(message)
+        self.assertTrue(frame1.rsv1)
+        self.assertEqual(frame1.msg, frame2.msg)
+        self.assertEqual(client.decode(frame1.msg).body, message)
+        self.assertEqual(client.decode(frame2.msg).body, message)
+
+    def testPerMessageDeflateMaxMessageSize(self):
+        server, client = self.parsers('permessage-deflate',
+                                      max_message_size=1000)
+        message = 'x'*1000
+        frame = client.encode(message)
+        self.assertTrue(frame.rsv1)
+        self.assertEqual(server.decode(frame.msg).body, message)
+        # A few hundred bytes inflating to one megabyte
+        frame = client.encode('x'*1000000)
+        self.assertTrue(len(frame.msg) < 1000)
+        self.assertRaises(ProtocolError, server.decode, frame.msg)